@@ -0,0 +1,42 @@
+"""
+Compare ModuleDayDataDecoder against the generic ProtobufParser.
+
+Usage:
+    python benchmarks/bench_module_day_data.py PAYLOAD [PAYLOAD ...] [--repeat N]
+
+Each PAYLOAD is a recorded down_module_day_data response body (raw bytes).
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "hoymiles_nimbus"))
+
+from parsers import ModuleDayDataDecoder, ProtobufParser  # noqa: E402
+
+
+def bench(blob, repeat):
+    generic = min(timeit.repeat(lambda: ProtobufParser(blob).get_compact(), number=1, repeat=repeat))
+    schema = min(timeit.repeat(lambda: ModuleDayDataDecoder(blob).get_compact(), number=1, repeat=repeat))
+    same = ProtobufParser(blob).get_compact() == ModuleDayDataDecoder(blob).get_compact()
+    return generic, schema, same
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("payloads", nargs="+", help="recorded down_module_day_data payload files")
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    print(f"{'payload':40} {'bytes':>10} {'generic ms':>11} {'schema ms':>10} {'speedup':>8}  same")
+    for path in args.payloads:
+        with open(path, "rb") as f:
+            blob = f.read()
+        generic, schema, same = bench(blob, args.repeat)
+        print(f"{os.path.basename(path):40} {len(blob):>10} {generic * 1000:>11.2f} {schema * 1000:>10.2f} "
+              f"{generic / schema:>7.1f}x  {'yes' if same else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
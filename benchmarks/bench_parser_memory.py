@@ -0,0 +1,53 @@
+"""
+Measure ProtobufParser memory use with tracemalloc.
+
+Usage:
+    python benchmarks/bench_parser_memory.py PAYLOAD [PAYLOAD ...]
+
+Each PAYLOAD is a recorded down_module_day_data response body (raw bytes).
+For every payload the peak and retained memory of building the full tree,
+the eager parser (tree + compact) and the lazy compact path are reported,
+also as a multiple of the payload size.
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "hoymiles_nimbus"))
+
+from parsers import ProtobufParser  # noqa: E402
+
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("payloads", nargs="+", help="recorded down_module_day_data payload files")
+    args = arg_parser.parse_args()
+
+    cases = {
+        "tree": lambda blob: ProtobufParser(blob, lazy=True).tree,
+        "eager": lambda blob: ProtobufParser(blob),
+        "lazy compact": lambda blob: ProtobufParser(blob, lazy=True).get_compact(),
+    }
+
+    print(f"{'payload':30} {'case':14} {'bytes':>10} {'peak KiB':>10} {'retained KiB':>13} {'x payload':>10}")
+    for path in args.payloads:
+        with open(path, "rb") as f:
+            blob = f.read()
+        for name, build in cases.items():
+            retained, peak = measure(lambda: build(blob))
+            print(f"{os.path.basename(path):30} {name:14} {len(blob):>10} {peak / 1024:>10.0f} "
+                  f"{retained / 1024:>13.0f} {retained / len(blob):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
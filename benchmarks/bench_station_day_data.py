@@ -0,0 +1,75 @@
+"""
+Compare the station day curve against module day data as a source for station power.
+
+Usage:
+    python benchmarks/bench_station_day_data.py --module M [M ...] --station S [S ...] [--repeat N]
+
+Each M is a recorded down_module_day_data response body and each S the
+down_station_day_data body of the same station and day (raw bytes), paired
+in order. For every pair the payload size, the decode time and the station
+power and energy derived from either source are reported.
+
+Only recorded pairs say anything about the StationDayDataDecoder layout,
+which is inferred: matching power and energy confirm it. A synthetic curve
+(tools/payload_generator.py --station-day) is built to fit that layout and
+only measures size and decode time.
+"""
+import argparse
+import math
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "hoymiles_nimbus"))
+
+from parsers import SLOT_MINUTES, StationDayDataDecoder, decode_module_day_data, decode_samples  # noqa: E402
+
+
+def station_totals_from_modules(decoded):
+    """Station power (sum of each port's latest watt) and energy from module day data."""
+    power = 0.0
+    energy = 0.0
+    for micro in list(decoded.iter_compact())[2:]:
+        day = micro[1]
+        for port in (item for item in day[1:] if isinstance(item, list)):
+            watts = [value for value in decode_samples(port[1])["watt"] if not math.isnan(value)]
+            if watts:
+                power += watts[-1]
+                energy += sum(watts) * SLOT_MINUTES / 60 / 1000
+    return power, energy
+
+
+def bench(module_blob, station_blob, repeat):
+    module_time = min(timeit.repeat(lambda: station_totals_from_modules(decode_module_day_data(module_blob)),
+                                    number=1, repeat=repeat))
+    station_time = min(timeit.repeat(lambda: StationDayDataDecoder(station_blob), number=1, repeat=repeat))
+    curve = StationDayDataDecoder(station_blob)
+    return module_time, station_time, station_totals_from_modules(decode_module_day_data(module_blob)), curve
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--module", nargs="+", required=True, help="recorded down_module_day_data payload files")
+    arg_parser.add_argument("--station", nargs="+", required=True, help="recorded down_station_day_data payload files")
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    args = arg_parser.parse_args()
+    if len(args.module) != len(args.station):
+        arg_parser.error("pass one --station file per --module file")
+
+    print(f"{'payload':30} {'source':8} {'bytes':>10} {'decode ms':>10} {'power W':>10} {'energy kWh':>11}")
+    for module_path, station_path in zip(args.module, args.station):
+        with open(module_path, "rb") as f:
+            module_blob = f.read()
+        with open(station_path, "rb") as f:
+            station_blob = f.read()
+        module_time, station_time, (power, energy), curve = bench(module_blob, station_blob, args.repeat)
+        name = os.path.basename(module_path)
+        print(f"{name:30} {'module':8} {len(module_blob):>10} {module_time * 1000:>10.2f} {power:>10.1f} {energy:>11.3f}")
+        print(f"{name:30} {'station':8} {len(station_blob):>10} {station_time * 1000:>10.2f} "
+              f"{curve.current_power:>10.1f} {curve.energy_kwh:>11.3f}")
+        cheaper = "station" if len(station_blob) < len(module_blob) else "module"
+        print(f"{name:30} cheaper source: {cheaper} ({len(module_blob) / max(1, len(station_blob)):.1f}x size ratio)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Benchmark suite for the parser, the data model and a full polling cycle.
+
+Usage:
+    python benchmarks/bench_suite.py [--repeat N] [--json RESULTS.json] [--only NAME [NAME ...]]
+                                     [--stations 10 --micros 20 --ports 4]
+
+Benchmarks:
+    parser       ProtobufParser on small, midday and full-day payloads
+    data_point   ProtobufParser.decode_data_point throughput
+    model_fill   Station.set_data -> Microinverter.set_data -> SolarModule.set_data
+    find_module  System.find_module lookups at fleet scale
+    cycle        map_system + fill_system_data against tools/fake_cloud.py, with
+                 HoymilesClient and with AsyncHoymilesClient (case suffix _async)
+
+Payloads are synthesized, so runs are comparable between machines and
+commits. With --json the results are written as one JSON document
+(environment, commit and one entry per measurement) for tracking over
+time; "-" writes it to stdout instead of the table.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "custom_components", "hoymiles_nimbus"))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from async_hoymiles_client import AsyncHoymilesClient  # noqa: E402
+from classes.system import System  # noqa: E402
+from fake_cloud import FakeCloud, start_in_thread  # noqa: E402
+from fleet import build_station  # noqa: E402
+from hoymiles_client import HoymilesClient  # noqa: E402
+from parsers import ProtobufParser, decode_module_day_data  # noqa: E402
+from payload_generator import generate_module_day_data  # noqa: E402
+
+BENCH_DATE = "2026-06-21"
+BENCH_STATION_ID = 100000
+# name -> (micros, ports, slots)
+PAYLOAD_SIZES = {
+    "small": (1, 2, 12),
+    "midday": (10, 4, 100),
+    "full_day": (40, 4, 204),
+}
+
+
+def measure(func, repeat, number=1):
+    """Best and mean seconds per call of func over repeat rounds of number calls."""
+    times = [elapsed / number for elapsed in timeit.repeat(func, number=number, repeat=repeat)]
+    return min(times), sum(times) / len(times)
+
+
+def result(name, case, best, mean, ops=1, **extra):
+    """One measurement; ops is the number of items processed per call."""
+    return {"benchmark": name, "case": case, "best_s": best, "mean_s": mean,
+            "ops_per_s": ops / best, **extra}
+
+
+def payload(size):
+    micros, ports, slots = PAYLOAD_SIZES[size]
+    return generate_module_day_data(BENCH_STATION_ID, BENCH_DATE, micros, ports, slots)
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+def bench_parser(args):
+    results = []
+    for size in PAYLOAD_SIZES:
+        blob = payload(size)
+        best, mean = measure(lambda: ProtobufParser(blob).get_compact(), args.repeat)
+        results.append(result("parser", size, best, mean, bytes=len(blob), mb_per_s=len(blob) / best / 1e6))
+    return results
+
+
+def bench_data_point(args):
+    compact = ProtobufParser(payload("full_day")).get_compact()
+    points = [sample for micro in compact[2:] for port in micro[1][1:] if isinstance(port, list)
+              and isinstance(port[1], list) for sample in port[1]]
+    decode = ProtobufParser.decode_data_point
+    best, mean = measure(lambda: [decode(point) for point in points], args.repeat)
+    return [result("data_point", "full_day", best, mean, ops=len(points), points=len(points))]
+
+
+def bench_model_fill(args):
+    results = []
+    for size, (micros, ports, slots) in PAYLOAD_SIZES.items():
+        blob = payload(size)
+        station = build_station(BENCH_STATION_ID, micros, ports)
+        best, mean = measure(lambda: station.set_data(decode_module_day_data(blob), date=BENCH_DATE), args.repeat)
+        modules = micros * ports
+        results.append(result("model_fill", size, best, mean, ops=modules, modules=modules, slots=slots))
+    return results
+
+
+def bench_find_module(args):
+    system = System(build_station(BENCH_STATION_ID + index, args.micros, args.ports) for index in range(args.stations))
+    keys = [(station.station_id, module.id) for station in system
+            for micro in station.microinverters for module in micro.modules]
+    lookups = random.Random(0).choices(keys, k=10000)
+    best, mean = measure(lambda: [system.find_module(*key) for key in lookups], args.repeat)
+    return [result("find_module", f"{len(keys)}_modules", best, mean, ops=len(lookups), modules=len(keys))]
+
+
+def _cycle_results(case, rounds, modules, requests):
+    return [
+        result("cycle", f"{case}_map_system", min(r[0] for r in rounds), sum(r[0] for r in rounds) / len(rounds),
+               ops=modules, modules=modules),
+        result("cycle", f"{case}_fill_system_data", min(r[1] for r in rounds), sum(r[1] for r in rounds) / len(rounds),
+               ops=modules, modules=modules, requests=requests),
+    ]
+
+
+async def _async_cycle(base_url, repeat):
+    client = AsyncHoymilesClient("bench", "bench", base_url, rate_limit=1e6, rate_burst=10 ** 6)
+    rounds = []
+    try:
+        for _ in range(repeat):
+            client.cache.invalidate()
+            start = time.perf_counter()
+            system = await client.map_system()
+            mapped = time.perf_counter()
+            await client.fill_system_data(system, date=BENCH_DATE)
+            rounds.append((mapped - start, time.perf_counter() - mapped))
+    finally:
+        await client.close()
+    return rounds
+
+
+def bench_cycle(args):
+    cloud = FakeCloud(stations=args.stations, micros=args.micros, ports=args.ports, latency=args.latency)
+    server, base_url = start_in_thread(cloud)
+    modules = args.stations * args.micros * args.ports
+    fleet = f"{args.stations}x{args.micros}x{args.ports}"
+    results = []
+    try:
+        # Rate limiting would measure the limiter, not the client; the cache is cleared every round
+        client = HoymilesClient("bench", "bench", base_url, rate_limit=1e6, rate_burst=10 ** 6)
+        rounds = []
+        for _ in range(args.repeat):
+            client.cache.invalidate()
+            start = time.perf_counter()
+            system = client.map_system()
+            mapped = time.perf_counter()
+            client.fill_system_data(system, date=BENCH_DATE)
+            rounds.append((mapped - start, time.perf_counter() - mapped))
+        client.close()
+        results += _cycle_results(fleet, rounds, modules, dict(cloud.stats))
+
+        # Same fleet and cloud through AsyncHoymilesClient, as used by the integration
+        cloud.stats.clear()
+        rounds = asyncio.run(_async_cycle(base_url, args.repeat))
+        results += _cycle_results(f"{fleet}_async", rounds, modules, dict(cloud.stats))
+    finally:
+        server.shutdown()
+    return results
+
+
+BENCHMARKS = {
+    "parser": bench_parser,
+    "data_point": bench_data_point,
+    "model_fill": bench_model_fill,
+    "find_module": bench_find_module,
+    "cycle": bench_cycle,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--json", help="write results as JSON to this file (- for stdout)")
+    arg_parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    arg_parser.add_argument("--stations", type=int, default=10, help="fleet size for find_module and cycle")
+    arg_parser.add_argument("--micros", type=int, default=20, help="microinverters per station")
+    arg_parser.add_argument("--ports", type=int, default=4, help="ports per microinverter")
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="mean fake cloud latency in seconds")
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    results = []
+    for name in args.only or BENCHMARKS:
+        results.extend(BENCHMARKS[name](args))
+
+    if args.json:
+        document = {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "results": results,
+        }
+        if args.json == "-":
+            json.dump(document, sys.stdout, indent=2)
+            print()
+            return
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    print(f"{'benchmark':12} {'case':32} {'best ms':>10} {'mean ms':>10} {'ops/s':>12}")
+    for row in results:
+        print(f"{row['benchmark']:12} {row['case']:32} {row['best_s'] * 1000:>10.2f} {row['mean_s'] * 1000:>10.2f} "
+              f"{row['ops_per_s']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
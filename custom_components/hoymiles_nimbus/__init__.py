@@ -3,38 +3,102 @@
 from __future__ import annotations
 
 import logging
+from datetime import timedelta
+from functools import partial
+
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall
 from homeassistant.const import Platform
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
 
-from .hoymiles_client import HoymilesClient
+from .async_hoymiles_client import AsyncHoymilesClient
+from .backfill import BackfillJob
+from .coordinator import HoymilesDataUpdateCoordinator
+from .response_cache import build_cache_policies
+from .topology_cache import TopologyCache
 
 DOMAIN = "hoymiles_nimbus"
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.NUMBER]
 
+SERVICE_BACKFILL = "backfill"
+BACKFILL_SCHEMA = vol.Schema({
+    vol.Required("start_date"): cv.date,
+    vol.Optional("end_date"): cv.date,
+    vol.Optional("config_entry_id"): cv.string,
+})
+
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Hoymiles S-Cloud from a config entry."""
     hass.data.setdefault(DOMAIN, {})
     
-    client = HoymilesClient(
+    client = AsyncHoymilesClient(
         username=entry.data["username"],
         password=entry.data["password"],
         base_url=entry.data.get("base_url", "https://neapi.hoymiles.com/"),
+        session=async_get_clientsession(hass),
+        cache_policies=build_cache_policies(
+            realtime_ttl=entry.options.get("realtime_cache_ttl"),
+            topology_ttl=entry.options.get("topology_cache_ttl"),
+        ),
     )
 
-    hass.data[DOMAIN][entry.entry_id] = client
+    coordinator = HoymilesDataUpdateCoordinator(hass, entry, client)
+    await coordinator.async_setup()
+    await coordinator.async_config_entry_first_refresh()
+
+    hass.data[DOMAIN][entry.entry_id] = coordinator
     _LOGGER.debug("Hoymiles Cloud config entry setup complete: %s", entry.data)
     
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    if not hass.services.has_service(DOMAIN, SERVICE_BACKFILL):
+        hass.services.async_register(DOMAIN, SERVICE_BACKFILL, partial(_async_handle_backfill, hass), schema=BACKFILL_SCHEMA)
     
     return True
 
+
+async def _async_handle_backfill(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Start a backfill of module statistics for every (or the given) config entry."""
+    end_date = call.data.get("end_date") or dt_util.now().date() - timedelta(days=1)
+    for entry_id, coordinator in hass.data.get(DOMAIN, {}).items():
+        if call.data.get("config_entry_id") not in (None, entry_id):
+            continue
+        if coordinator.backfill_task is not None and not coordinator.backfill_task.done():
+            _LOGGER.warning("A backfill is already running for %s", entry_id)
+            continue
+        job = BackfillJob(hass, entry_id, coordinator.client, coordinator.system)
+        # Raise here, before the task starts, so the caller sees a rejected range
+        await job.async_check_range(call.data["start_date"], end_date)
+        coordinator.backfill_task = coordinator.entry.async_create_background_task(
+            hass, job.async_run(call.data["start_date"], end_date), "hoymiles_nimbus backfill"
+        )
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry so changed options (e.g. cache TTLs) take effect."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator.commands.close()
+        await coordinator.async_archive_pending()
+        await coordinator.client.close()
+        if not hass.data[DOMAIN]:
+            hass.services.async_remove(DOMAIN, SERVICE_BACKFILL)
     
     return unload_ok
 
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached topology and backfill checkpoint when a config entry is deleted."""
+    await TopologyCache(hass, entry.entry_id).async_remove()
+    await BackfillJob(hass, entry.entry_id, None, []).async_remove()
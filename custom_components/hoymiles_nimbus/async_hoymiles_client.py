@@ -0,0 +1,469 @@
+import asyncio
+import datetime
+import functools
+import hashlib
+import logging
+import time
+
+import aiohttp
+
+# Handle imports for both standalone and Home Assistant contexts
+try:
+    from .classes.system import System
+    from .hoymiles_client import (
+        API_URIS,
+        DEFAULT_CONNECT_TIMEOUT,
+        DEFAULT_DISCOVERY_CONCURRENCY,
+        DEFAULT_READ_TIMEOUT,
+        SELECT_BY_PAGE_URIS,
+        assemble_station,
+        build_power_limit_payload,
+        log_discovery_timings,
+        request_key,
+    )
+    from .parsers import ProtobufParser, decode_module_day_data, decode_station_day_data
+    from .rate_limit import DEFAULT_MAX_RETRIES, DEFAULT_RATE_BURST, DEFAULT_RATE_LIMIT, AsyncTokenBucket
+    from .request_policy import AUTH_ATTEMPTS, RequestPolicy
+    from .response_cache import ResponseCache
+    from .token_manager import (
+        DEFAULT_TOKEN_MAX_AGE,
+        AsyncTokenManager,
+        AuthenticationError,
+        is_auth_failure,
+        is_auth_failure_body,
+    )
+except ImportError:
+    from classes.system import System
+    from hoymiles_client import (
+        API_URIS,
+        DEFAULT_CONNECT_TIMEOUT,
+        DEFAULT_DISCOVERY_CONCURRENCY,
+        DEFAULT_READ_TIMEOUT,
+        SELECT_BY_PAGE_URIS,
+        assemble_station,
+        build_power_limit_payload,
+        log_discovery_timings,
+        request_key,
+    )
+    from parsers import ProtobufParser, decode_module_day_data, decode_station_day_data
+    from rate_limit import DEFAULT_MAX_RETRIES, DEFAULT_RATE_BURST, DEFAULT_RATE_LIMIT, AsyncTokenBucket
+    from request_policy import AUTH_ATTEMPTS, RequestPolicy
+    from response_cache import ResponseCache
+    from token_manager import (
+        DEFAULT_TOKEN_MAX_AGE,
+        AsyncTokenManager,
+        AuthenticationError,
+        is_auth_failure,
+        is_auth_failure_body,
+    )
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AsyncHoymilesClient:
+    """
+    Asyncio client for the Hoymiles S-Cloud API.
+
+    Mirrors the API surface of HoymilesClient, but every call is a coroutine
+    running on the event loop. Inside Home Assistant pass the shared session
+    from ``async_get_clientsession(hass)``; standalone callers may omit it and
+    the client will own (and close) its own session.
+    """
+
+    def __init__(self, username, password, base_url, session=None,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT,
+                 discovery_concurrency=DEFAULT_DISCOVERY_CONCURRENCY,
+                 token_max_age=DEFAULT_TOKEN_MAX_AGE,
+                 cache_policies=None,
+                 rate_limit=DEFAULT_RATE_LIMIT,
+                 rate_burst=DEFAULT_RATE_BURST,
+                 max_retries=DEFAULT_MAX_RETRIES):
+        """Initialize the client with credentials, base URL and aiohttp session."""
+        _LOGGER.debug("Initializing AsyncHoymilesClient")
+
+        self.username = username
+        self.password = password
+        self.base_url = base_url
+        self.uris = dict(API_URIS)
+
+        self.tokens = AsyncTokenManager(self._authenticate, token_max_age)
+        # Per-endpoint response cache, see response_cache.DEFAULT_CACHE_POLICIES
+        self.cache = ResponseCache(cache_policies)
+        self._revalidating = {}
+
+        self.timeout = aiohttp.ClientTimeout(connect=connect_timeout, sock_read=read_timeout)
+        self._session = session
+        self._owns_session = session is None
+
+        # Parallelism used by map_system; 1 keeps discovery fully sequential
+        self.discovery_concurrency = max(1, int(discovery_concurrency))
+        self.last_map_timings = {}
+
+        # Single-flight: identical requests in flight share one response
+        self._inflight = {}
+        self.request_stats = {"issued": 0, "coalesced": 0, "throttled": 0, "retried": 0, "failed": 0}
+
+        # Pacing and retries for everything sent by this client
+        self.limiter = AsyncTokenBucket(rate_limit, rate_burst)
+        self.policy = RequestPolicy(
+            max_retries, self.limiter, self.request_stats,
+            retryable=(aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError),
+        )
+
+    # ============================================================================
+    # TRANSPORT
+    # ============================================================================
+
+    @property
+    def session(self):
+        """Return the aiohttp session, creating a private one when none was given."""
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self):
+        """Close the session if this client owns it; a shared session is left open."""
+        for task in list(self._revalidating.values()):
+            task.cancel()
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # ============================================================================
+    # HTTP HELPER METHODS
+    # ============================================================================
+
+    async def _post_request(self, uri, payload=None, headers=None, use_auth=True, binary=False, response_type='json', parser=ProtobufParser):
+        """
+        Helper method to make POST requests.
+
+        Concurrent calls with the same endpoint and payload are coalesced:
+        only the first one is sent and the others await its result. The
+        request runs in its own task, so a cancelled caller does not cancel
+        it for the others.
+        """
+        key = request_key(uri, payload, response_type)
+        task = self._inflight.get(key)
+        if task is None:
+            self.request_stats["issued"] += 1
+            task = asyncio.ensure_future(self._request(uri, payload, headers, use_auth, binary, response_type, parser))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._request_done(key, done))
+        else:
+            self.request_stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _request_done(self, key, task):
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception retrieved even when every caller was cancelled
+            task.exception()
+
+    async def _request(self, uri, payload, headers, use_auth, binary, response_type, parser):
+        """
+        Send a POST request, handling authentication.
+
+        With use_auth, a token is obtained from the token manager (logging in
+        when needed). If the cloud rejects it, the client logs in once more and
+        replays the request.
+        """
+        url = f"{self.base_url}{uri}"
+        if headers is None:
+            headers = {"Content-Type": "application/json"}
+
+        _LOGGER.debug(f"POST Request URL: {url}")
+        _LOGGER.debug(f"POST Request Payload: {payload}")
+
+        if not use_auth:
+            _, result = await self._send_with_retry(url, payload, headers, binary, response_type, parser)
+            return result
+
+        for attempt in range(AUTH_ATTEMPTS):
+            token = await self.tokens.get()
+            auth_failed, result = await self._send_with_retry(url, payload, {**headers, "Authorization": token}, binary, response_type, parser)
+            if not auth_failed:
+                return result
+            self.policy.token_rejected(self.tokens, token, attempt, uri)
+
+    async def _send_with_retry(self, url, payload, headers, binary, response_type, parser):
+        """
+        Send a request through the rate limiter, retrying transient failures.
+
+        Connection errors, timeouts, 429 and 5xx responses are retried up to
+        max_retries times with exponential backoff and jitter; a Retry-After
+        header sets the minimum delay and also holds back the other requests.
+        The decisions are made by RequestPolicy, shared by both clients.
+        """
+        for attempt in self.policy.attempts():
+            self.policy.record_wait(await self.limiter.acquire())
+            try:
+                return await self._send(url, payload, headers, binary, response_type, parser)
+            except Exception as err:  # pylint: disable=broad-except
+                delay = self.policy.retry_delay(attempt, err, url)
+            await asyncio.sleep(delay)
+
+    async def _send(self, url, payload, headers, binary, response_type, parser):
+        """Send one POST request; returns (auth_failed, result)."""
+        try:
+            async with self.session.post(url, json=payload, headers=headers, timeout=self.timeout) as response:
+                _LOGGER.debug(f"Response Status Code: {response.status}")
+                if self.policy.check_status(response.status, response.headers):
+                    return True, None
+                response.raise_for_status()
+
+                if response_type == 'protobuf' and binary:
+                    content = await response.read()
+                    if is_auth_failure_body(content):
+                        return True, None
+                    _LOGGER.debug("API Response: %s - Protobuf data received", response.status)
+                    # Decoding a full day takes long enough to stall the event loop
+                    return False, await asyncio.get_running_loop().run_in_executor(None, parser, content)
+                try:
+                    response_data = await response.json(content_type=None)
+                except ValueError:
+                    _LOGGER.error("Failed to parse response as JSON")
+                    return False, None
+                if is_auth_failure(response_data):
+                    return True, None
+                _LOGGER.debug("API Response: %s - Success", response.status)
+                return False, response_data
+        except aiohttp.ClientError as e:
+            _LOGGER.warning("API Response: Request failed - %s", str(e))
+            raise
+
+    async def _cached_call(self, endpoint, key, factory):
+        """
+        Return the cached result for (endpoint, key), awaiting factory() on a miss.
+
+        A stale entry within the policy's stale_ttl is returned immediately
+        and refreshed in a background task.
+        """
+        value, fresh = self.cache.lookup(endpoint, key)
+        if value is ResponseCache.MISS:
+            value = await factory()
+            self.cache.store(endpoint, key, value)
+        elif not fresh and (endpoint, key) not in self._revalidating:
+            self._revalidating[(endpoint, key)] = asyncio.ensure_future(self._revalidate(endpoint, key, factory))
+        return value
+
+    async def _revalidate(self, endpoint, key, factory):
+        try:
+            self.cache.store(endpoint, key, await factory())
+        except Exception as e:  # pylint: disable=broad-except
+            _LOGGER.debug("Background refresh of %s %s failed: %s", endpoint, key, e)
+        finally:
+            self._revalidating.pop((endpoint, key), None)
+
+    # ============================================================================
+    # AUTHENTICATION METHODS
+    # ============================================================================
+
+    def get_password_hash(self):
+        return hashlib.md5(self.password.encode('utf-8')).hexdigest()
+
+    @property
+    def token(self):
+        """The current token, or None before the first login."""
+        return self.tokens.token
+
+    async def login(self):
+        """Authenticate with Hoymiles S-Cloud and retrieve a fresh token."""
+        await self.tokens.refresh()
+        return True
+
+    async def _authenticate(self):
+        """Perform the login request; called by the token manager."""
+        _LOGGER.info("Logging into Hoymiles S-Cloud for user: %s", self.username)
+        payload = {
+            "user_name": self.username,
+            "password": self.get_password_hash(),
+        }
+        response_data = await self._post_request(self.uris['login'], payload=payload, use_auth=False)
+        if response_data and "data" in response_data and "token" in (response_data["data"] or {}):
+            _LOGGER.info("Successfully authenticated with Hoymiles S-Cloud")
+            return response_data["data"]["token"]
+        _LOGGER.error("Login failed: Token not found in response")
+        raise AuthenticationError("Login failed: Token not found in response")
+
+    # ============================================================================
+    # DATA FETCHING METHODS
+    # ============================================================================
+
+    async def select_by_station(self, station_id):
+        """Select microinverters by station ID."""
+        async def fetch():
+            payload = {
+                "sid": station_id,
+                "page": 1,
+                "page_size": 1000,
+                "show_warn": 0
+            }
+            response = await self._post_request(self.uris['select_by_station'], payload=payload)
+            return response.get("data", {})
+        return await self._cached_call("select_by_station", (station_id,), fetch)
+
+    async def micro_find(self, micro_id, station_id):
+        """Find a microinverter by its ID."""
+        async def fetch():
+            payload = {
+                "id": micro_id,
+                "sid": station_id,
+            }
+            response = await self._post_request(self.uris['micro_find'], payload=payload)
+            return response.get('data', {})
+        return await self._cached_call("micro_find", (micro_id, station_id), fetch)
+
+    async def select_by_page(self, type):
+        uri = SELECT_BY_PAGE_URIS.get(type)
+        if not uri:
+            raise ValueError(f"Invalid type for select_by_page: {type}")
+
+        async def fetch():
+            payload = {
+                "page": 1,
+                "page_size": 100,
+            }
+            response = await self._post_request(uri, payload=payload)
+            return response.get("data", {}).get("list", [])
+        return await self._cached_call("select_by_page", (type,), fetch)
+
+    async def count_station_real_data(self, id):
+        """Get the count of station real data."""
+        async def fetch():
+            payload = {
+                "sid": id,
+            }
+            return await self._post_request(self.uris['count_station_data'], payload=payload)
+        return await self._cached_call("count_station_real_data", (id,), fetch)
+
+    async def findStation(self, sid):
+        """Find a station by its ID."""
+        async def fetch():
+            payload = {
+                "id": sid,
+            }
+            response = await self._post_request(self.uris['find'], payload=payload)
+            return response.get('data', {})
+        return await self._cached_call("findStation", (sid,), fetch)
+
+    async def down_module_day_data(self, sid, date):
+        """Download module day data for a specific date."""
+        payload = {
+            "sid": sid,
+            "date": date,
+        }
+        return await self._post_request(self.uris['down_module_day_data'], payload=payload, response_type='protobuf', binary=True, parser=decode_module_day_data)
+
+    async def down_station_day_data(self, sid, date):
+        """Download the station power curve for a specific date (None if it cannot be decoded)."""
+        payload = {
+            "sid": sid,
+            "date": date,
+        }
+        return await self._post_request(self.uris['down_station_day_data'], payload=payload, response_type='protobuf', binary=True, parser=decode_station_day_data)
+
+    # ============================================================================
+    # CONTROL OPERATIONS
+    # ============================================================================
+
+    async def set_power_limit(self, sid, power_limit):
+        """Set the power limit for all microinverters of a station."""
+        payload = build_power_limit_payload(sid, power_limit)
+        _LOGGER.debug("Setting power limit for SID %s to %s%%", sid, payload["data"]["power_limit"])
+        response = await self._post_request(self.uris['command_put'], payload=payload)
+        # The cached station config still holds the previous limit
+        self.cache.invalidate("findStation", (sid,))
+        return response
+
+    # ============================================================================
+    # SYSTEM MAPPING AND DATA PROCESSING
+    # ============================================================================
+
+    async def map_system(self):
+        """Build a hierarchical system map of stations, microinverters, and modules."""
+        return await self._cached_call("map_system", (), self._map_system)
+
+    async def _map_system(self):
+        started = time.monotonic()
+        timings = {"concurrency": self.discovery_concurrency}
+        semaphore = asyncio.Semaphore(self.discovery_concurrency)
+
+        async def limited(coro):
+            async with semaphore:
+                return await coro
+
+        stations = await self.select_by_page("station")
+        timings["stations"] = time.monotonic() - started
+        system = System()
+        if not stations:
+            _LOGGER.warning("No stations found.")
+            return system
+
+        # Fetch microinverters for every station
+        phase = time.monotonic()
+        micro_lists = await asyncio.gather(*(
+            limited(self.select_by_station(station_data.get("id"))) for station_data in stations
+        ))
+        timings["micro_lists"] = time.monotonic() - phase
+
+        # Fetch module details for every microinverter
+        phase = time.monotonic()
+        jobs = [
+            (station_data.get("id"), micro_data.get("id"))
+            for station_data, microinverters in zip(stations, micro_lists)
+            if microinverters
+            for micro_data in microinverters.get("list", [])
+        ]
+        details = await asyncio.gather(*(
+            limited(self.micro_find(micro_id, station_id)) for station_id, micro_id in jobs
+        ))
+        timings["micro_details"] = time.monotonic() - phase
+
+        details_by_micro = {micro_id: detail for (_, micro_id), detail in zip(jobs, details)}
+        for station_data, microinverters in zip(stations, micro_lists):
+            if not microinverters:
+                _LOGGER.warning(f"No microinverters found for station ID {station_data.get('id')}.")
+                continue
+            system.append(assemble_station(station_data, microinverters.get("list", []), details_by_micro))
+
+        timings["total"] = time.monotonic() - started
+        self.last_map_timings = timings
+        log_discovery_timings(timings, len(system), len(jobs))
+        return system
+
+    async def fill_system_data(self, system, date=None, incremental=False, on_payload=None, now=None):
+        """
+        Fill system hierarchy with actual performance data for a given date.
+
+        Payloads are decoded in the loop's default executor, one station at a
+        time. The decoded samples are stored in the model on the loop, so
+        entities reading it there never see a module half updated.
+
+        With incremental=True, stations that cannot have a new 5-minute slot
+        yet are skipped without a download, and only new slots are ingested.
+        on_payload(station_id, date, data) is called for every downloaded
+        payload, e.g. to archive it. Returns the number of stations whose day
+        data was downloaded. now (default: local time) is the current
+        time used for date and the incremental check; pass an aware datetime
+        in the configured time zone when it differs from the process's.
+        """
+        if now is None:
+            now = datetime.datetime.now()
+        if date is None:
+            date = now.strftime("%Y-%m-%d")
+        _LOGGER.debug(f"Filling system data for date: {date}")
+        downloaded = 0
+        for station in system:
+            if incremental and not station.needs_refresh(date, now):
+                _LOGGER.debug("Skipping day data for station %s, no new slot expected after %s", station.station_id, station.last_slot)
+                continue
+            data = await self.down_module_day_data(station.station_id, date)
+            downloaded += 1
+            update = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(station.decode_data, data, incremental=incremental, date=date)
+            )
+            station.apply_data(update)
+            if on_payload is not None:
+                on_payload(station.station_id, date, data)
+        return downloaded
@@ -0,0 +1,181 @@
+"""Import historical per-module data as Home Assistant long-term statistics."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from datetime import date, datetime, time, timedelta
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfEnergy, UnitOfPower
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .async_hoymiles_client import AsyncHoymilesClient
+from .classes.solar_module import SolarModule
+from .classes.station import SLOT_MINUTES, Station
+
+DOMAIN = "hoymiles_nimbus"
+STORAGE_VERSION = 1
+
+# Days downloaded at the same time per station; requests also pass the
+# client's rate limiter
+DEFAULT_BACKFILL_CONCURRENCY = 4
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def module_statistic_ids(module: SolarModule) -> tuple[str, str]:
+    """External statistic ids (power, energy) of a module."""
+    slug = slugify(str(module.id))
+    return f"{DOMAIN}:module_{slug}_power", f"{DOMAIN}:module_{slug}_energy"
+
+
+def hourly_statistics(module: SolarModule) -> list[tuple[int, float, float, float, float]]:
+    """
+    Aggregate a module's day of samples per hour.
+
+    Returns (hour, mean W, min W, max W, energy kWh) for every hour with at
+    least one power sample.
+    """
+    hours: dict[int, list[float]] = {}
+    for minute, watt in zip(module.minutes, module.watt):
+        if not math.isnan(watt):
+            hours.setdefault(minute // 60, []).append(watt)
+    return [
+        (hour, sum(values) / len(values), min(values), max(values), sum(values) * SLOT_MINUTES / 60 / 1000)
+        for hour, values in sorted(hours.items())
+    ]
+
+
+def _day_statistics(station: Station, day: date, payload) -> list[tuple[SolarModule, list]]:
+    """
+    Apply one day's payload to a copy of the station layout and aggregate it.
+
+    Runs in the executor; the live model keeps today's data. Returns
+    (module, hourly_statistics rows) for every module with samples.
+    """
+    day_station = Station.from_dict(station.to_dict())
+    day_station.set_data(payload, date=day.isoformat())
+    return [
+        (module, rows)
+        for micro in day_station.microinverters
+        for module in micro.modules
+        if (rows := hourly_statistics(module))
+    ]
+
+
+class BackfillJob:
+    """
+    Downloads down_module_day_data for a date range and imports it as statistics.
+
+    For every module an hourly power statistic (mean/min/max) and a
+    cumulative energy statistic are written. Completed (station, date) pairs
+    and the running energy sums are checkpointed after every batch of days,
+    so an interrupted backfill continues where it stopped. Days are imported
+    oldest first per station to keep the energy sums consistent, and a later
+    run may only add days after those already imported.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, client: AsyncHoymilesClient,
+                 system: list[Station], concurrency: int = DEFAULT_BACKFILL_CONCURRENCY) -> None:
+        self.hass = hass
+        self.client = client
+        self.system = system
+        self.concurrency = max(1, concurrency)
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.backfill")
+        self._checkpoint: dict | None = None
+
+    async def async_remove(self) -> None:
+        """Delete the checkpoint."""
+        self._checkpoint = None
+        await self._store.async_remove()
+
+    async def _async_load_checkpoint(self) -> dict:
+        if self._checkpoint is None:
+            data = await self._store.async_load() or {}
+            self._checkpoint = {"done": data.get("done", {}), "sums": data.get("sums", {})}
+        return self._checkpoint
+
+    async def async_check_range(self, start: date, end: date) -> None:
+        """
+        Refuse an empty range, or one that would import days before a
+        station's latest imported day.
+
+        The energy statistics carry a running sum, so an earlier day imported
+        after later ones would get larger sums than the days following it and
+        the statistic would go backwards. Raises ServiceValidationError.
+        """
+        if start > end:
+            raise ServiceValidationError(f"The backfill start date {start} is after its end date {end}")
+        checkpoint = await self._async_load_checkpoint()
+        days = [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+        for station in self.system:
+            done = set(checkpoint["done"].get(str(station.station_id), []))
+            if not done:
+                continue
+            todo = [day for day in days if day not in done]
+            if todo and todo[0] < max(done):
+                raise ServiceValidationError(
+                    f"Station {station.name} is backfilled up to {max(done)}; "
+                    f"a backfill can only add days after that, not {todo[0]}"
+                )
+
+    async def async_run(self, start: date, end: date) -> int:
+        """Backfill start..end (inclusive); returns the number of station days imported."""
+        await self.async_check_range(start, end)
+        checkpoint = await self._async_load_checkpoint()
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        imported = 0
+        for station in list(self.system):
+            done = set(checkpoint["done"].get(str(station.station_id), []))
+            todo = [day for day in days if day.isoformat() not in done]
+            _LOGGER.info("Backfilling %d day(s) for station %s", len(todo), station.station_id)
+            for index in range(0, len(todo), self.concurrency):
+                batch = todo[index:index + self.concurrency]
+                try:
+                    payloads = await asyncio.gather(*(
+                        self.client.down_module_day_data(station.station_id, day.isoformat()) for day in batch
+                    ))
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.warning("Backfill of station %s stopped at %s: %s", station.station_id, batch[0], err)
+                    break
+                for day, payload in zip(batch, payloads):
+                    modules = await self.hass.async_add_executor_job(_day_statistics, station, day, payload)
+                    self._import_day(station, day, modules, checkpoint)
+                    done.add(day.isoformat())
+                    imported += 1
+                checkpoint["done"][str(station.station_id)] = sorted(done)
+                await self._store.async_save(checkpoint)
+        return imported
+
+    def _import_day(self, station: Station, day: date, modules, checkpoint: dict) -> None:
+        midnight = datetime.combine(day, time(), tzinfo=dt_util.get_default_time_zone())
+
+        for module, rows in modules:
+            power_id, energy_id = module_statistic_ids(module)
+            power_stats: list[StatisticData] = []
+            energy_stats: list[StatisticData] = []
+            total = checkpoint["sums"].get(energy_id, 0.0)
+            today = 0.0
+            for hour, mean, low, high, energy in rows:
+                start = midnight + timedelta(hours=hour)
+                power_stats.append(StatisticData(start=start, mean=mean, min=low, max=high))
+                total += energy
+                today += energy
+                energy_stats.append(StatisticData(start=start, state=today, sum=total))
+            checkpoint["sums"][energy_id] = total
+
+            name = f"{station.name} Panel {module.id}"
+            async_add_external_statistics(self.hass, StatisticMetaData(
+                has_mean=True, has_sum=False, name=f"{name} Power", source=DOMAIN,
+                statistic_id=power_id, unit_of_measurement=UnitOfPower.WATT,
+            ), power_stats)
+            async_add_external_statistics(self.hass, StatisticMetaData(
+                has_mean=False, has_sum=True, name=f"{name} Energy", source=DOMAIN,
+                statistic_id=energy_id, unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+            ), energy_stats)
@@ -5,11 +5,12 @@ except ImportError:
 
 
 class DataPoint:
-    def __init__(self, time, value):
+    def __init__(self, time, value, decoded=None):
         self.time = time  # Expected to be a string in "HH:MM" format
-        self.value = value  # Expected to be a float or int
+        self.value = value  # Raw sample values (float32 bits)
 
-        data = ProtobufParser.decode_data_point(value)
+        # decoded may be passed in by batch decoding (see parsers.decode_samples)
+        data = decoded if decoded is not None else ProtobufParser.decode_data_point(value)
 
         self.volt = data[0] if len(data) > 0 else None
         self.ampere = data[1] if len(data) > 1 else None
@@ -1,5 +1,10 @@
 import logging
 
+try:
+    from .solar_module import SolarModule
+except ImportError:
+    from classes.solar_module import SolarModule
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -8,17 +13,28 @@ class Microinverter:
         self.id = micro_id
         self.sn = sn
         self.modules = []  # List of SolarModule objects
+        self._modules_by_port = {}
 
     def add_module(self, module):
         self.modules.append(module)
+        self._modules_by_port[module.port] = module
+
+    def set_data(self, data, since=None):
+        """Distribute day data to the modules; returns the latest time slot seen."""
+        updates, latest = self.decode_data(data, since)
+        for module, decoded in updates:
+            module.apply_data(decoded, since)
+        return latest
 
-    def set_data(self, data):
+    def decode_data(self, data, since=None):
+        """Decode day data per module without storing it; returns ([(module, decoded), ...], latest time slot)."""
         main = data[0]
         times = [i for i in main[1:] if isinstance(i, str)]
         module_data = [i for i in main[1:] if isinstance(i, list) and isinstance(i[1], list)]
 
         # TODO There is more data in main[1:] that might be useful
 
+        updates = []
         for mod_data in module_data:
 
             port = mod_data[0]
@@ -29,12 +45,53 @@ class Microinverter:
                 _LOGGER.warning("Module with port %s not found in microinverter ID %s", port, self.id)
                 continue
 
-            module.set_data(mod_data[1], times)
+            decoded = module.decode_data(mod_data[1], times, since)
+            if decoded is not None:
+                updates.append((module, decoded))
+
+        return updates, max(times) if times else None
+
+    def to_dict(self):
+        """Serialize the microinverter and its module layout."""
+        return {
+            "id": self.id,
+            "sn": self.sn,
+            "modules": [module.to_dict() for module in self.modules],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        micro = cls(data["id"], data["sn"])
+        for module_data in data.get("modules", []):
+            micro.add_module(SolarModule.from_dict(module_data))
+        return micro
+
+    def merge_topology(self, other):
+        """
+        Merge the layout of other (same id) into this microinverter.
+
+        Modules on known ports are updated in place, new ports are added and
+        missing ports are dropped. Returns True when anything changed.
+        """
+        changed = self.sn != other.sn
+        self.sn = other.sn
+        modules = []
+        for new_module in other.modules:
+            module = self._modules_by_port.get(new_module.port)
+            if module is None:
+                module = new_module
+                changed = True
+            elif module.merge_topology(new_module):
+                changed = True
+            modules.append(module)
+        if len(modules) != len(self.modules):
+            changed = True
+        self.modules = modules
+        self._modules_by_port = {module.port: module for module in modules}
+        return changed
 
     def find_module_by_port(self, port):
-        for module in self.modules:
-            if module.port == port:
-                return module
-        return None
+        return self._modules_by_port.get(port)
+
     def __repr__(self):
         return f"Microinverter(id={self.id}, sn={self.sn}, modules={len(self.modules)})"
\ No newline at end of file
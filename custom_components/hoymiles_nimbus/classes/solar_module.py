@@ -1,50 +1,152 @@
 import logging
+import math
+from array import array
+from bisect import bisect_left
 
 try:
     from .data_point import DataPoint
+    from ..parsers import SAMPLE_SCHEMA, decode_samples
 except ImportError:
     from classes.data_point import DataPoint
+    from parsers import SAMPLE_SCHEMA, decode_samples
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _value_or_none(value):
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def _time_to_minute(time):
+    """Convert "HH:MM" to minute of day."""
+    return int(time[:2]) * 60 + int(time[3:5])
+
+
+def _minute_to_time(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def _extend_floats(target, column):
+    """Append a decoded float32 column (array('f') or NumPy array) to target."""
+    if isinstance(column, array):
+        target.extend(column)
+    else:
+        target.frombytes(column.astype('float32').tobytes())
+
+
 class SolarModule:
+    """
+    A solar panel on one microinverter port.
+
+    Samples are stored column-wise in compact parallel arrays (minute of day,
+    voltage, current, power); DataPoint objects are only created on demand.
+    Missing values are stored as NaN and reported as None.
+    """
+
     def __init__(self, id, port, x,y):
         self.id = id
         self.port = port
         self.x = x
         self.y = y
-        self.data_points = []  # List of DataPoint objects
+        self._clear()
+
+    def _clear(self):
+        self.minutes = array('H')
+        self.volt = array('f')
+        self.ampere = array('f')
+        self.watt = array('f')
+
+    @property
+    def data_points(self):
+        """List of DataPoint views, built on demand."""
+        return [self._data_point(i) for i in range(len(self.minutes))]
+
+    def _data_point(self, i):
+        decoded = [_value_or_none(self.volt[i]), _value_or_none(self.ampere[i]), _value_or_none(self.watt[i])]
+        return DataPoint(_minute_to_time(self.minutes[i]), None, decoded)
     
     def add_data_point(self, data_point):
-        self.data_points.append(data_point)
+        self.minutes.append(_time_to_minute(data_point.time))
+        for column, value in ((self.volt, data_point.volt), (self.ampere, data_point.ampere), (self.watt, data_point.watt)):
+            column.append(math.nan if value is None else value)
 
-    def set_data(self, data, times):
+    def set_data(self, data, times, since=None):
+        """
+        Load the day's samples for this module.
+
+        When since is given ("HH:MM"), existing samples are kept and only
+        slots later than since are appended.
+        """
+        decoded = self.decode_data(data, times, since)
+        if decoded is not None:
+            self.apply_data(decoded, since)
+
+    def decode_data(self, data, times, since=None):
+        """
+        Decode the samples set_data() would store, without changing this module.
+
+        Returns (minutes, columns) for apply_data(), or None when data and
+        times do not match.
+        """
         if len(data) != len(times):
             _LOGGER.warning("Data length %d does not match times length %d for module ID %s", len(data), len(times), self.id)
-            return
-        
-        self.data_points = []  # Clear existing data points
-        for time, value in zip(times, data):
-            dp = DataPoint(time, value)
-            self.add_data_point(dp)
+            return None
+
+        if since is not None:
+            new_slots = [i for i, time in enumerate(times) if time > since]
+            times = [times[i] for i in new_slots]
+            data = [data[i] for i in new_slots]
+
+        # Decode the whole series at once instead of sample by sample
+        return array('H', (_time_to_minute(time) for time in times)), decode_samples(data)
+
+    def apply_data(self, decoded, since=None):
+        """Store samples returned by decode_data(); without since the day is replaced."""
+        minutes, columns = decoded
+        if since is None:
+            self._clear()  # Clear existing samples
+        self.minutes.extend(minutes)
+        for name, target in zip(SAMPLE_SCHEMA, (self.volt, self.ampere, self.watt)):
+            _extend_floats(target, columns[name])
 
     def getCurrentPower(self):
-        if not self.data_points:
+        if not self.watt:
             return 0
-        latest = self.data_points[-1]
-        return latest.watt if latest.watt is not None else 0
-        # _LOGGER.debug("Setting data for module %s: %s", self.id, self.data_points)
+        watt = _value_or_none(self.watt[-1])
+        return watt if watt is not None else 0
+
+    def power_at(self, time):
+        """Power in W in slot time ("HH:MM"), or None without a value for that slot."""
+        minute = _time_to_minute(time)
+        index = bisect_left(self.minutes, minute)
+        if index == len(self.minutes) or self.minutes[index] != minute:
+            return None
+        return _value_or_none(self.watt[index])
 
     def getLatestDataPoint(self):
-        if not self.data_points:
+        if not self.minutes:
             return None
-        return self.data_points[-1]
+        return self._data_point(-1)
     
+    def to_dict(self):
+        """Serialize the module layout (not its measurements)."""
+        return {"id": self.id, "port": self.port, "x": self.x, "y": self.y}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data["port"], data.get("x"), data.get("y"))
+
+    def merge_topology(self, other):
+        """Take the layout of other (same port) and keep the samples; returns True when changed."""
+        changed = (self.id, self.x, self.y) != (other.id, other.x, other.y)
+        self.id, self.x, self.y = other.id, other.x, other.y
+        return changed
+
     def getLatestTime(self):
-        if not self.data_points:
+        if not self.minutes:
             return None
-        return self.data_points[-1].time
+        return _minute_to_time(self.minutes[-1])
 
     def __repr__(self):
-        return f"SolarModule(id={self.id}, port={self.port}, x={self.x}, y={self.y}, data_points={len(self.data_points)})" 
\ No newline at end of file
+        return f"SolarModule(id={self.id}, port={self.port}, x={self.x}, y={self.y}, data_points={len(self.minutes)})"
@@ -1,47 +1,178 @@
+import datetime
 import logging
 
+try:
+    from .micro_inverter import Microinverter
+    from ..parsers import SLOT_MINUTES
+except ImportError:
+    from classes.micro_inverter import Microinverter
+    from parsers import SLOT_MINUTES
+
 _LOGGER = logging.getLogger(__name__)
 
+# The cloud adds one sample slot every SLOT_MINUTES, published with some delay
+SLOT_PUBLISH_DELAY = datetime.timedelta(minutes=1)
+
 
 class Station:
     def __init__(self, station_id, name):
         self.station_id = station_id
         self.name = name
         self.microinverters = []  # List of Microinverter objects
+        self._micros_by_id = {}
+        self.data_date = None  # Date ("YYYY-MM-DD") of the ingested day data
+        self.last_slot = None  # Latest "HH:MM" slot ingested for data_date
+        self._topology_version = 0  # Bumped by merge_topology(), see apply_data()
 
     def add_microinverter(self, microinverter):
         self.microinverters.append(microinverter)
+        self._micros_by_id[microinverter.id] = microinverter
+
+    def needs_refresh(self, date, now=None):
+        """
+        Return False when the cloud cannot have a newer slot for date yet.
+
+        A new slot is expected SLOT_MINUTES after the last ingested one, plus
+        SLOT_PUBLISH_DELAY for the cloud to publish it. now must be in the
+        time zone date was derived from (default: naive local time).
+        """
+        if self.data_date != date or self.last_slot is None:
+            return True
+        if now is None:
+            now = datetime.datetime.now()
+        hours, minutes = (int(part) for part in self.last_slot.split(":"))
+        last = now.replace(hour=hours, minute=minutes, second=0, microsecond=0)
+        return now >= last + datetime.timedelta(minutes=SLOT_MINUTES) + SLOT_PUBLISH_DELAY
+
+    def set_data(self, data, incremental=False, date=None):
+        """
+        Load day data into the microinverters and modules.
 
-    def set_data(self, data):
-        tree = data.get_compact()  # Store the day's data for the station
-        id = tree[0]
-        date = tree[1]
+        With incremental=True and data for the same date as before, only slots
+        newer than last_slot are appended to the modules. date is the requested
+        day ("YYYY-MM-DD"); it defaults to the date in the payload.
+        """
+        self.apply_data(self.decode_data(data, incremental, date))
+
+    def decode_data(self, data, incremental=False, date=None):
+        """
+        Decode day data like set_data() without changing the model.
+
+        This is the expensive part of set_data() and may run in a worker
+        thread while the model is read elsewhere. Returns the update for
+        apply_data(), or None when the data does not fit this station.
+        """
+        # Stream top-level fields so microinverters are decoded one at a time
+        fields = data.iter_compact()
+        header = [field for _, field in zip(range(2), fields)]
+        if len(header) < 2:
+            _LOGGER.warning("Data format for station ID %s is unexpected: %s", self.station_id, header)
+            return None
+        id = header[0]
+        if date is None:
+            date = header[1]
 
         if id != self.station_id:
             _LOGGER.warning("Data station ID %s does not match Station ID %s", id, self.station_id)
-            return
-        
-        if len(tree) < 3:
-            _LOGGER.warning("Data format for station ID %s is unexpected: %s", self.station_id, tree)
-            return
+            return None
 
-        for micro_data in tree[2:]:
+        since = self.last_slot if incremental and self.data_date == date else None
+        latest = since
+        updates = []
+        micro_count = 0
+        for micro_data in fields:
+            micro_count += 1
             micro_id = micro_data[0]
             micro_inverter = self.find_microinverter(micro_id)
             if not micro_inverter:
                 _LOGGER.warning("Microinverter ID %s not found in station ID %s", micro_id, self.station_id)
                 continue
 
-            micro_inverter.set_data(micro_data[1:])
-            
-        # _LOGGER.debug("Additional tree data: %s", tree[3] if len(tree) > 3 else "None")
-        # _LOGGER.debug("Setting data for station %s: %s", self.station_id, tree)
+            micro_updates, micro_latest = micro_inverter.decode_data(micro_data[1:], since)
+            updates.extend(micro_updates)
+            if micro_latest and (latest is None or micro_latest > latest):
+                latest = micro_latest
+
+        if not micro_count:
+            _LOGGER.warning("Data format for station ID %s is unexpected: no microinverter data", self.station_id)
+            return None
+        return date, since, latest, updates, self._topology_version
+
+    def apply_data(self, update):
+        """
+        Store an update returned by decode_data().
+
+        Only appends decoded arrays, so readers on the same thread never see a
+        module half updated. An update decoded before a topology change is
+        dropped; the next download then reloads the whole day.
+        """
+        if update is None:
+            return
+        date, since, latest, updates, version = update
+        if version != self._topology_version:
+            _LOGGER.debug("Topology of station %s changed while decoding, dropping the day data", self.station_id)
+            return
+        for module, decoded in updates:
+            module.apply_data(decoded, since)
+        self.data_date = date
+        self.last_slot = latest
+
+    def to_dict(self):
+        """Serialize the station topology (microinverters and modules)."""
+        return {
+            "id": self.station_id,
+            "name": self.name,
+            "microinverters": [micro.to_dict() for micro in self.microinverters],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        station = cls(data["id"], data.get("name"))
+        for micro_data in data.get("microinverters", []):
+            station.add_microinverter(Microinverter.from_dict(micro_data))
+        return station
+
+    def merge_topology(self, other):
+        """
+        Merge the layout of other (same station id) into this station.
+
+        Known microinverters are merged in place, new ones are added and
+        missing ones are dropped. Returns True when anything changed.
+        """
+        changed = self.name != other.name
+        self.name = other.name
+        micros = []
+        added = False
+        for new_micro in other.microinverters:
+            micro = self._micros_by_id.get(new_micro.id)
+            if micro is None:
+                micro = new_micro
+                added = True
+            elif micro.merge_topology(new_micro):
+                changed = True
+            micros.append(micro)
+        if added or len(micros) != len(self.microinverters):
+            changed = True
+        self.microinverters = micros
+        self._micros_by_id = {micro.id: micro for micro in micros}
+        if changed:
+            # New modules have no samples yet, so reload the whole day next time
+            self.last_slot = None
+            self._topology_version += 1
+        return changed
+
+    def power_at(self, time):
+        """Sum of the modules' power in slot time ("HH:MM"), or None when no module has a value."""
+        values = [
+            power
+            for micro in self.microinverters
+            for module in micro.modules
+            if (power := module.power_at(time)) is not None
+        ]
+        return sum(values) if values else None
 
     def find_microinverter(self, micro_id):
-        for micro in self.microinverters:
-            if micro.id == micro_id:
-                return micro
-        return None
+        return self._micros_by_id.get(micro_id)
     
     def __repr__(self):
         return f"Station(id={self.station_id}, name={self.name}, microinverters={len(self.microinverters)})"
@@ -0,0 +1,74 @@
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class System(list):
+    """
+    The list of Station objects returned by map_system, with lookup indexes.
+
+    Indexes by station id, microinverter id, (microinverter sn, port) and
+    (station id, module id) are built when stations are added. Call
+    rebuild_index() after changing the hierarchy of stations that are
+    already in the system.
+    """
+
+    def __init__(self, stations=()):
+        super().__init__(stations)
+        self.rebuild_index()
+
+    def append(self, station):
+        super().append(station)
+        self._index_station(station)
+
+    def rebuild_index(self):
+        self.stations_by_id = {}
+        self.micros_by_id = {}
+        self.modules_by_port = {}
+        self.modules_by_id = {}
+        for station in self:
+            self._index_station(station)
+
+    def _index_station(self, station):
+        self.stations_by_id[station.station_id] = station
+        for micro in station.microinverters:
+            self.micros_by_id[micro.id] = micro
+            for module in micro.modules:
+                self.modules_by_port[(micro.sn, module.port)] = module
+                self.modules_by_id[(station.station_id, module.id)] = module
+
+    def merge_topology(self, other):
+        """
+        Merge a freshly mapped system into this one in place.
+
+        Existing Station/Microinverter/SolarModule objects (and their samples)
+        are kept, only new, changed or removed nodes are touched. Returns True
+        when the topology changed.
+        """
+        changed = False
+        stations = []
+        for new_station in other:
+            station = self.stations_by_id.get(new_station.station_id)
+            if station is None:
+                station = new_station
+                changed = True
+            elif station.merge_topology(new_station):
+                changed = True
+            stations.append(station)
+        if len(stations) != len(self):
+            changed = True
+        self[:] = stations
+        self.rebuild_index()
+        return changed
+
+    def find_station(self, station_id):
+        return self.stations_by_id.get(station_id)
+
+    def find_microinverter(self, micro_id):
+        return self.micros_by_id.get(micro_id)
+
+    def find_module_by_port(self, micro_sn, port):
+        return self.modules_by_port.get((micro_sn, port))
+
+    def find_module(self, station_id, module_id):
+        return self.modules_by_id.get((station_id, module_id))
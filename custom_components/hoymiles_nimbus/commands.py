@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+
+try:
+    from .hoymiles_client import build_power_limit_payload
+except ImportError:
+    from hoymiles_client import build_power_limit_payload
+
+_LOGGER = logging.getLogger(__name__)
+
+# Values submitted within this window are merged into one batch (seconds)
+COMMAND_BATCH_DELAY = 1.0
+# Minimum time between two writes to the same station (seconds)
+DEFAULT_WRITE_INTERVAL = 30.0
+DEFAULT_COMMAND_CONCURRENCY = 4
+# Delays before reading back findStation to confirm a write (seconds)
+CONFIRM_DELAYS = (2.0, 5.0, 10.0)
+
+
+class PowerLimitQueue:
+    """
+    Batches power limit writes for all stations of one client.
+
+    submit() only records the latest value per station. After
+    COMMAND_BATCH_DELAY every pending station whose last write is at least
+    write_interval ago is written concurrently (at most concurrency at a
+    time, on top of the client's rate limiter); the rest waits for its turn.
+    Each write is confirmed by reading the limit back with findStation.
+    """
+
+    def __init__(self, client, write_interval=DEFAULT_WRITE_INTERVAL,
+                 concurrency=DEFAULT_COMMAND_CONCURRENCY, on_batch_done=None):
+        self.client = client
+        self.write_interval = write_interval
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._on_batch_done = on_batch_done
+        self._pending = {}
+        self._last_write = {}
+        self._timer = None
+        self._timer_due = None
+        self._tasks = set()
+        # sid -> {"value", "confirmed", "time"} of the last dispatched write
+        self.results = {}
+
+    def submit(self, sid, value):
+        """Queue value as the new power limit of station sid, replacing any pending value."""
+        self._pending[sid] = build_power_limit_payload(sid, value)["data"]["power_limit"]
+        # Bring the timer forward when it waits for another station's cooldown
+        now = time.monotonic()
+        due = max(self._due(sid), now + COMMAND_BATCH_DELAY)
+        if self._timer is None or due < self._timer_due:
+            self._cancel_timer()
+            self._schedule(due - now)
+
+    def pending_value(self, sid):
+        """The value waiting to be written for sid, or None."""
+        return self._pending.get(sid)
+
+    def close(self):
+        """Cancel the timer and any writes in progress."""
+        self._cancel_timer()
+        for task in list(self._tasks):
+            task.cancel()
+
+    def _due(self, sid):
+        """Monotonic time from which sid may be written again."""
+        return self._last_write.get(sid, -self.write_interval) + self.write_interval
+
+    def _schedule(self, delay):
+        self._timer_due = time.monotonic() + delay
+        self._timer = asyncio.get_running_loop().call_later(delay, self._flush)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._timer_due = None
+
+    def _flush(self):
+        self._timer = None
+        self._timer_due = None
+        now = time.monotonic()
+        ready = {}
+        next_due = None
+        for sid, value in self._pending.items():
+            due = self._due(sid)
+            if due <= now:
+                ready[sid] = value
+            else:
+                next_due = due if next_due is None else min(next_due, due)
+        for sid in ready:
+            del self._pending[sid]
+        if next_due is not None:
+            self._schedule(next_due - now)
+        if ready:
+            task = asyncio.ensure_future(self._dispatch(ready))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch):
+        _LOGGER.debug("Writing power limits for %d station(s): %s", len(batch), batch)
+        await asyncio.gather(*(self._write(sid, value) for sid, value in batch.items()))
+        if self._on_batch_done is not None:
+            await self._on_batch_done()
+
+    async def _write(self, sid, value):
+        self._last_write[sid] = time.monotonic()
+        async with self._semaphore:
+            try:
+                await self.client.set_power_limit(sid, value)
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.warning("Setting power limit %s%% for station %s failed: %s", value, sid, err)
+                self.results[sid] = {"value": value, "confirmed": False, "time": time.time()}
+                return
+        confirmed = await self._confirm(sid, value)
+        if confirmed is None:
+            _LOGGER.debug("Power limit %s%% for station %s was superseded before it was confirmed", value, sid)
+            return
+        self.results[sid] = {"value": value, "confirmed": confirmed, "time": time.time()}
+        if not confirmed:
+            _LOGGER.warning("Station %s did not report power limit %s%% after the write", sid, value)
+
+    async def _confirm(self, sid, value):
+        """
+        Read back findStation until it reports value, or give up.
+
+        Returns None when a newer value was queued meanwhile; that write is
+        confirmed instead.
+        """
+        for delay in CONFIRM_DELAYS:
+            await asyncio.sleep(delay)
+            if sid in self._pending:
+                return None
+            self.client.cache.invalidate("findStation", (sid,))
+            try:
+                station = await self.client.findStation(sid)
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.debug("Reading back station %s failed: %s", sid, err)
+                continue
+            reported = ((station or {}).get("config") or {}).get("power_limit")
+            if reported is not None and int(reported) == value:
+                return True
+        return False
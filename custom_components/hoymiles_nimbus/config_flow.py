@@ -10,8 +10,13 @@ from homeassistant import config_entries
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .hoymiles_client import HoymilesClient
+from .async_hoymiles_client import AsyncHoymilesClient
+from .coordinator import DEFAULT_MAX_STALENESS
+from .response_cache import DEFAULT_CACHE_POLICIES
+from .token_manager import AuthenticationError
 
 DOMAIN = "hoymiles_nimbus"
 
@@ -25,6 +30,10 @@ class InvalidAuth(HomeAssistantError):
 
 _LOGGER = logging.getLogger(__name__)
 
+CREDENTIAL_KEYS = ("username", "password", "base_url")
+DEFAULT_REALTIME_CACHE_TTL = int(DEFAULT_CACHE_POLICIES["count_station_real_data"].ttl)
+DEFAULT_TOPOLOGY_CACHE_TTL = int(DEFAULT_CACHE_POLICIES["select_by_page"].ttl)
+
 STEP_USER_DATA_SCHEMA = vol.Schema({
     vol.Required("username"): str,
     vol.Required("password"): str,
@@ -35,17 +44,20 @@ STEP_USER_DATA_SCHEMA = vol.Schema({
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
     try:
-        client = HoymilesClient(
+        client = AsyncHoymilesClient(
             username=data["username"],
             password=data["password"],
             base_url=data.get("base_url", "https://neapi.hoymiles.com/"),
+            session=async_get_clientsession(hass),
         )
         
         # Test the connection
-        await hass.async_add_executor_job(client.login)
+        await client.login()
         
         # Return info that you want to store in the config entry.
         return {"title": "Hoymiles Nimbus"}
+    except AuthenticationError as ex:
+        raise InvalidAuth from ex
     except Exception as ex:
         # You can be more specific about different types of connection errors
         if "401" in str(ex) or "authentication" in str(ex).lower():
@@ -103,11 +115,13 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         if user_input is not None:
             try:
                 await validate_input(self.hass, user_input)
-                # Update the config entry with new data
+                # Credentials live in the entry data, cache settings in its options
                 self.hass.config_entries.async_update_entry(
-                    self.config_entry, data=user_input
+                    self.config_entry, data={key: user_input[key] for key in CREDENTIAL_KEYS if key in user_input}
                 )
-                return self.async_create_entry(title="", data={})
+                return self.async_create_entry(title="", data={
+                    key: value for key, value in user_input.items() if key not in CREDENTIAL_KEYS
+                })
             except CannotConnect:
                 errors = {"base": "cannot_connect"}
             except InvalidAuth:
@@ -120,11 +134,40 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
         # Pre-fill the form with existing values
         current_data = self.config_entry.data
+        current_options = self.config_entry.options
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        stations = {
+            str(station.get("id")): station.get("name") or str(station.get("id"))
+            for station in (coordinator.stations if coordinator else [])
+        }
         options_schema = vol.Schema({
             vol.Required("username", default=current_data.get("username", "")): str,
             vol.Required("password", default=current_data.get("password", "")): str,
             vol.Optional("base_url", default=current_data.get("base_url", "https://neapi.hoymiles.com/")): str,
+            vol.Optional(
+                "realtime_cache_ttl",
+                default=current_options.get("realtime_cache_ttl", DEFAULT_REALTIME_CACHE_TTL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+            vol.Optional(
+                "topology_cache_ttl",
+                default=current_options.get("topology_cache_ttl", DEFAULT_TOPOLOGY_CACHE_TTL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
+            vol.Optional(
+                "max_staleness",
+                default=current_options.get("max_staleness", DEFAULT_MAX_STALENESS),
+            ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
+            vol.Optional("archive_payloads", default=current_options.get("archive_payloads", False)): bool,
         })
+        if stations:
+            options_schema = options_schema.extend({
+                vol.Optional(
+                    "experimental_station_curve_stations",
+                    default=[
+                        sid for sid in current_options.get("experimental_station_curve_stations", [])
+                        if sid in stations
+                    ],
+                ): cv.multi_select(stations),
+            })
 
         return self.async_show_form(
             step_id="init",
@@ -0,0 +1,350 @@
+"""Data update coordinator for the Hoymiles S-Cloud integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import SUN_EVENT_SUNRISE
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.sun import get_astral_event_next, is_up
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .async_hoymiles_client import AsyncHoymilesClient
+from .classes.system import System
+from .commands import PowerLimitQueue
+from .payload_archive import ARCHIVE_DIR, PayloadArchive
+from .polling import PollScheduler
+from .response_cache import TOPOLOGY_ENDPOINTS
+from .topology_cache import TopologyCache
+
+DOMAIN = "hoymiles_nimbus"
+
+# Initial interval; afterwards PollScheduler picks the delay until the next poll
+UPDATE_INTERVAL = timedelta(seconds=30)
+TOPOLOGY_REFRESH_INTERVAL = timedelta(hours=1)
+
+# A refresh taking longer than this keeps running in the background while the
+# last good snapshot is served
+REFRESH_SOFT_TIMEOUT = timedelta(seconds=20)
+DEFAULT_MAX_STALENESS = 900  # seconds
+
+# The station curve layout is inferred, not documented: a curve is only used
+# once its power in a slot matches the sum of the station's module data
+CURVE_MATCH_TOLERANCE = 0.1  # relative
+CURVE_MATCH_MIN_WATT = 50.0
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HoymilesDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+    """
+    Fetches all data for one config entry in a single batch per interval.
+
+    The snapshot in ``self.data`` contains:
+      - "real_data": station id -> count_station_real_data response
+      - "station_info": station id -> findStation response
+      - "system": the Station hierarchy filled with today's module data
+      - "station_day": station id -> StationDayDataDecoder for the stations
+        selected in the experimental "experimental_station_curve_stations"
+        option, once the curve has been checked against the module data
+
+    When the cloud is slow or failing, the last good snapshot is served
+    (stale-while-revalidate) while a single fetch runs in the background.
+    Entities become unavailable once that snapshot is older than
+    max_staleness.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, client: AsyncHoymilesClient) -> None:
+        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=UPDATE_INTERVAL)
+        self.entry = entry
+        self.client = client
+        self.topology = TopologyCache(hass, entry.entry_id)
+        self.stations: list[dict] = []
+        self.system = System()
+        self._topology_listeners: list[Callable[[], None]] = []
+        self.max_staleness = timedelta(seconds=entry.options.get("max_staleness", DEFAULT_MAX_STALENESS))
+        self.snapshot_time: datetime | None = None
+        self._fetch_task: asyncio.Task | None = None
+        self.scheduler = PollScheduler()
+        # Experimental: stations whose power/energy sensors use the
+        # down_station_day_data curve; sid -> True/False once checked
+        self.curve_stations = {str(sid) for sid in entry.options.get("experimental_station_curve_stations", [])}
+        self._curve_verified: dict[Any, bool] = {}
+        self.commands = PowerLimitQueue(client, on_batch_done=self.async_request_refresh)
+        self.backfill_task: asyncio.Task | None = None
+        # Optional archive of each station day's final module payload
+        self.archive: PayloadArchive | None = None
+        if entry.options.get("archive_payloads"):
+            self.archive = PayloadArchive(hass.config.path(ARCHIVE_DIR, entry.entry_id))
+        self._latest_payloads: dict[Any, tuple[str, bytes]] = {}
+
+    # ============================================================================
+    # TOPOLOGY
+    # ============================================================================
+
+    async def async_setup(self) -> None:
+        """Log in and load the topology, from the cache when available."""
+        await self.client.login()
+
+        cached = await self.topology.async_load()
+        if cached is None:
+            _LOGGER.warning("Fetching device data from Hoymiles S-Cloud...")
+            self.stations, self.system = await self._async_fetch_topology()
+            await self.topology.async_update(self.stations, self.system)
+        else:
+            # Start from the cached layout and verify it in the background
+            _LOGGER.debug("Using cached Hoymiles topology")
+            self.stations, self.system = cached
+            self.entry.async_create_background_task(
+                self.hass, self.async_refresh_topology(), "hoymiles_nimbus topology refresh"
+            )
+
+        self.entry.async_on_unload(
+            async_track_time_interval(self.hass, self._async_scheduled_topology_refresh, TOPOLOGY_REFRESH_INTERVAL)
+        )
+        _LOGGER.warning("Found %d station(s) in Hoymiles account", len(self.stations))
+
+    async def _async_fetch_topology(self):
+        stations = await self.client.select_by_page("station")
+        system = await self.client.map_system()
+        return stations, system
+
+    async def _async_scheduled_topology_refresh(self, _now) -> None:
+        await self.async_refresh_topology()
+
+    async def async_refresh_topology(self) -> None:
+        """Re-check the cloud topology and notify platforms when it changed."""
+        # Bypass the long-lived topology cache entries for this check
+        for endpoint in TOPOLOGY_ENDPOINTS:
+            self.client.cache.invalidate(endpoint)
+        try:
+            stations, system = await self._async_fetch_topology()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Background topology refresh failed: %s", err)
+            return
+
+        if not await self.topology.async_update(stations, system):
+            _LOGGER.debug("Cached topology is up to date")
+            return
+
+        _LOGGER.info("Hoymiles topology changed, updating entities")
+        self.stations = stations
+        # Keep the live objects (and their samples), only apply the differences
+        self.system.merge_topology(system)
+        for listener in list(self._topology_listeners):
+            listener()
+        await self.async_request_refresh()
+
+    @callback
+    def async_add_topology_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call listener whenever the topology changes; returns a remove callback."""
+        self._topology_listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            self._topology_listeners.remove(listener)
+
+        return remove_listener
+
+    def find_module(self, station_id, module_id):
+        """Find a specific module in the system."""
+        return self.system.find_module(station_id, module_id)
+
+    # ============================================================================
+    # DATA REFRESH
+    # ============================================================================
+
+    @property
+    def snapshot_age(self) -> timedelta | None:
+        """Age of the data currently served, or None before the first fetch."""
+        if self.snapshot_time is None:
+            return None
+        return dt_util.utcnow() - self.snapshot_time
+
+    def snapshot_is_usable(self) -> bool:
+        age = self.snapshot_age
+        return age is not None and age <= self.max_staleness
+
+    def snapshot_attributes(self) -> dict[str, Any]:
+        """State attributes describing the served snapshot."""
+        age = self.snapshot_age
+        if age is None:
+            return {}
+        return {"snapshot_age": int(age.total_seconds())}
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """Return fresh data, or the last good snapshot while the cloud is slow or failing."""
+        if self._fetch_task is None:
+            self._fetch_task = self.entry.async_create_background_task(
+                self.hass, self._async_fetch_data(), "hoymiles_nimbus data refresh"
+            )
+        task = self._fetch_task
+
+        if self.data is None:
+            # Nothing to serve yet, wait for the first fetch
+            try:
+                return await task
+            except Exception as err:
+                raise UpdateFailed(f"Error fetching Hoymiles data: {err}") from err
+
+        done, _ = await asyncio.wait({task}, timeout=REFRESH_SOFT_TIMEOUT.total_seconds())
+        if not done:
+            _LOGGER.debug("Hoymiles cloud is slow, serving the snapshot from %s", self.snapshot_time)
+            task.remove_done_callback(self._async_late_fetch_done)
+            task.add_done_callback(self._async_late_fetch_done)
+            return self._stale_snapshot()
+        try:
+            return task.result()
+        except Exception as err:  # pylint: disable=broad-except
+            return self._stale_snapshot(err)
+
+    def _stale_snapshot(self, err: Exception | None = None) -> dict[str, Any]:
+        if not self.snapshot_is_usable():
+            raise UpdateFailed(f"Error fetching Hoymiles data: {err or 'timed out'}") from err
+        if err is not None:
+            _LOGGER.warning("Hoymiles refresh failed, serving data from %s: %s", self.snapshot_time, err)
+        return self.data
+
+    @callback
+    def _async_late_fetch_done(self, task: asyncio.Task) -> None:
+        """Publish a fetch that outlived the update it was started for."""
+        if not task.cancelled() and task.exception() is None:
+            self.async_set_updated_data(task.result())
+
+    async def _async_fetch_data(self) -> dict[str, Any]:
+        """Fetch station data, power limits and module data for all stations."""
+        try:
+            data, downloaded = await self._async_fetch_all()
+        finally:
+            self._fetch_task = None
+        self.snapshot_time = dt_util.utcnow()
+        self._schedule_next_poll(downloaded)
+        return data
+
+    # ============================================================================
+    # PAYLOAD ARCHIVE
+    # ============================================================================
+
+    @callback
+    def _on_payload(self, station_id, date: str, data) -> None:
+        """Keep the newest payload per station; archive the previous day once the date moves on."""
+        if self.archive is None:
+            return
+        previous = self._latest_payloads.get(station_id)
+        self._latest_payloads[station_id] = (date, data.original)
+        if previous is not None and previous[0] != date:
+            self.entry.async_create_background_task(
+                self.hass,
+                self._async_archive(station_id, previous[0], previous[1], True),
+                f"hoymiles_nimbus archive {station_id} {previous[0]}",
+            )
+
+    async def _async_archive(self, station_id, date: str, blob: bytes, complete: bool) -> None:
+        """Write one station day to the archive in the executor, logging failures."""
+        try:
+            await self.hass.async_add_executor_job(self.archive.write, station_id, date, blob, complete)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Failed to archive the payload of station %s for %s", station_id, date)
+
+    async def async_archive_pending(self) -> None:
+        """Archive the (possibly incomplete) payloads of the current day, e.g. on unload."""
+        if self.archive is None:
+            return
+        for station_id, (date, blob) in self._latest_payloads.items():
+            await self._async_archive(station_id, date, blob, False)
+
+    def _latest_slot(self) -> str | None:
+        """Latest slot ingested for today over all stations."""
+        today = dt_util.now().strftime("%Y-%m-%d")
+        slots = [station.last_slot for station in self.system if station.data_date == today and station.last_slot]
+        return max(slots, default=None)
+
+    def _schedule_next_poll(self, downloaded: int) -> None:
+        """
+        Adapt update_interval to daylight and the cloud's 5-minute data cadence.
+
+        Only refreshes that downloaded day data count towards the backoff;
+        extra refreshes (commands, topology changes, manual updates) that
+        skipped every station keep the slot-aligned schedule.
+        """
+        if downloaded:
+            self.scheduler.record(self._latest_slot())
+        now = dt_util.now()
+        sun_up = is_up(self.hass)
+        next_sunrise = None if sun_up else get_astral_event_next(self.hass, SUN_EVENT_SUNRISE)
+        self.update_interval = self.scheduler.next_interval(now, sun_up, next_sunrise)
+        _LOGGER.debug(
+            "Next Hoymiles poll in %s (latest slot %s, %d poll(s) without new data)",
+            self.update_interval, self.scheduler.last_slot, self.scheduler.misses,
+        )
+
+    def _checked_curve(self, sid, curve):
+        """
+        Return curve once it agrees with the station's module data, else None.
+
+        The station's latest module slot decides, once per station and
+        session: an unknown layout or a power mismatch means the layout guess
+        does not hold, and the station keeps using count_station_real_data.
+        """
+        station = self.system.find_station(sid)
+        verified = self._curve_verified.get(sid)
+        if verified is None and curve is None:
+            verified = self._curve_verified[sid] = False
+            _LOGGER.warning("Unknown station day curve layout for %s, using count_station_real_data instead", sid)
+        elif verified is None and station is not None and station.last_slot in curve.times:
+            curve_power = curve.power[curve.times.index(station.last_slot)]
+            module_power = station.power_at(station.last_slot)
+            if module_power is not None and not math.isnan(curve_power):
+                tolerance = max(CURVE_MATCH_TOLERANCE * module_power, CURVE_MATCH_MIN_WATT)
+                verified = self._curve_verified[sid] = abs(curve_power - module_power) <= tolerance
+                if not verified:
+                    _LOGGER.warning(
+                        "Station day curve of %s does not match its module data at %s (%.0f W vs %.0f W), "
+                        "using count_station_real_data instead", sid, station.last_slot, curve_power, module_power,
+                    )
+        return curve if verified else None
+
+    async def _async_fetch_all(self) -> tuple[dict[str, Any], int]:
+        """Fetch one snapshot; also returns the number of stations whose day data was downloaded."""
+        sids = [station.get("id") for station in self.stations]
+        # One aware timestamp in Home Assistant's time zone for the requested
+        # date, the incremental check and _latest_slot()
+        now = dt_util.now()
+        today = now.strftime("%Y-%m-%d")
+        # Curves are only downloaded along with new module data to check them against
+        curve_sids = [
+            sid for sid in sids
+            if str(sid) in self.curve_stations and self._curve_verified.get(sid) is not False
+            and (station := self.system.find_station(sid)) is not None and station.needs_refresh(today, now)
+        ]
+        try:
+            real_data, station_info, curves, downloaded = await asyncio.gather(
+                asyncio.gather(*(self.client.count_station_real_data(sid) for sid in sids)),
+                asyncio.gather(*(self.client.findStation(sid) for sid in sids)),
+                asyncio.gather(*(self.client.down_station_day_data(sid, today) for sid in curve_sids)),
+                self.client.fill_system_data(
+                    self.system, date=today, incremental=True, on_payload=self._on_payload, now=now
+                ),
+            )
+        except Exception as err:
+            raise UpdateFailed(f"Error fetching Hoymiles data: {err}") from err
+
+        station_day = {
+            sid: curve for sid, curve in ((self.data or {}).get("station_day", {})).items()
+            if curve.date == today and self._curve_verified.get(sid)
+        }
+        for sid, curve in zip(curve_sids, curves):
+            if (curve := self._checked_curve(sid, curve)) is not None:
+                station_day[sid] = curve
+        return {
+            "real_data": dict(zip(sids, real_data)),
+            "station_info": dict(zip(sids, station_info)),
+            "station_day": station_day,
+            "system": self.system,
+        }, downloaded
@@ -0,0 +1,23 @@
+"""Base entity for the Hoymiles Nimbus platforms."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+
+class HoymilesEntity(CoordinatorEntity):
+    """
+    Coordinator entity served from the coordinator's last good snapshot.
+
+    The entity reports the snapshot age and becomes unavailable once the
+    snapshot is older than the configured maximum staleness.
+    """
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.coordinator.snapshot_is_usable()
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return self.coordinator.snapshot_attributes()
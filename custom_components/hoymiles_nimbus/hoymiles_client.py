@@ -1,24 +1,147 @@
 import datetime
+import functools
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 import yaml
 import logging
 import hashlib
-from cachetools import TTLCache, cached
 
 # Handle imports for both standalone and Home Assistant contexts
 try:
     from .classes.micro_inverter import Microinverter
     from .classes.solar_module import SolarModule
     from .classes.station import Station
-    from .parsers import ProtobufParser
+    from .classes.system import System
+    from .parsers import ProtobufParser, decode_module_day_data, decode_station_day_data
+    from .rate_limit import DEFAULT_MAX_RETRIES, DEFAULT_RATE_BURST, DEFAULT_RATE_LIMIT, TokenBucket
+    from .request_policy import AUTH_ATTEMPTS, RequestPolicy
+    from .response_cache import ResponseCache
+    from .token_manager import (
+        DEFAULT_TOKEN_MAX_AGE,
+        AuthenticationError,
+        TokenManager,
+        is_auth_failure,
+        is_auth_failure_body,
+    )
 except ImportError:
     from classes.micro_inverter import Microinverter
     from classes.solar_module import SolarModule
     from classes.station import Station
-    from parsers import ProtobufParser
+    from classes.system import System
+    from parsers import ProtobufParser, decode_module_day_data, decode_station_day_data
+    from rate_limit import DEFAULT_MAX_RETRIES, DEFAULT_RATE_BURST, DEFAULT_RATE_LIMIT, TokenBucket
+    from request_policy import AUTH_ATTEMPTS, RequestPolicy
+    from response_cache import ResponseCache
+    from token_manager import (
+        DEFAULT_TOKEN_MAX_AGE,
+        AuthenticationError,
+        TokenManager,
+        is_auth_failure,
+        is_auth_failure_body,
+    )
 
 _LOGGER = logging.getLogger(__name__)
 
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_POOL_SIZE = 10
+DEFAULT_DISCOVERY_CONCURRENCY = 8
+
+# API endpoint URIs
+API_URIS = {
+    "login": "iam/pub/0/auth/login",
+    "user_info": "iam/api/1/user/me",
+    "count_station_data": "pvm-data/api/0/station/data/count_station_real_data",
+    "find": "pvm/api/0/station/find",
+    "select_by_station": "pvm/api/0/dev/micro/select_by_station",
+    "micro_find": "pvm/api/0/dev/micro/find",
+    "module_details": "pvm-data/api/0/module/data/find_details",
+    "select_all_arrays": "pvm/api/0/dev/array_v3/select_all",
+    "down_module_day_data": "pvm-data/api/0/module/data/down_module_day_data",
+    "down_station_day_data": "pvm-data/api/0/station/down_station_day_data",
+    "command_put": "pvm-ctl/api/0/dev/command/put",
+}
+
+SELECT_BY_PAGE_URIS = {
+    "station":  "pvm/api/0/station/select_by_page",
+    "dtu":      "pvm/api/0/dev/dtu/select_by_page",
+    "micro":    "pvm/api/0/dev/micro/select_by_page",
+    # Add more types here if needed
+}
+
+
+def build_power_limit_payload(sid, power_limit):
+    """Build the command payload for a station power limit, clamped to 5-100%."""
+    power_limit = min(100, int(power_limit))
+    power_limit = max(5, int(power_limit))
+    return {
+        "action": 8,
+        "data": {
+            "sid": sid,
+            "power_limit": power_limit,
+            "enable": 1
+        }
+    }
+
+
+def add_modules_from_layout(microinverter, micro_details):
+    """Create SolarModule objects on a microinverter from a micro_find layout."""
+    for port_info in micro_details.get("layout_list", []):
+        module_id = f"{microinverter.sn}-{port_info.get('port')}"
+        port = port_info.get("port")
+        x = port_info.get("x")
+        y = port_info.get("y")
+        solar_module = SolarModule(module_id, port, x, y)
+        microinverter.add_module(solar_module)
+
+
+def assemble_station(station_data, micro_list, micro_details):
+    """
+    Build a Station hierarchy from already fetched discovery responses.
+
+    Args:
+        station_data: Station entry from select_by_page("station")
+        micro_list: List of microinverter entries from select_by_station
+        micro_details: Dict mapping micro id to its micro_find response
+    """
+    station = Station(station_data.get("id"), station_data.get("name"))
+    for micro_data in micro_list:
+        micro_id = micro_data.get("id")
+        microinverter = Microinverter(micro_id, micro_data.get("sn"))
+        station.add_microinverter(microinverter)
+        add_modules_from_layout(microinverter, micro_details.get(micro_id) or {})
+    return station
+
+
+def cached_endpoint(endpoint):
+    """Cache a HoymilesClient method's result in the client's ResponseCache under endpoint."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            key = args + tuple(sorted(kwargs.items()))
+            return self._cached_call(endpoint, key, lambda: func(self, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def request_key(uri, payload, response_type='json'):
+    """Key identifying identical API calls for single-flight deduplication."""
+    return uri, response_type, json.dumps(payload, sort_keys=True, default=str)
+
+
+def log_discovery_timings(timings, station_count, micro_count):
+    """Log the per-phase timings of a map_system run."""
+    _LOGGER.info(
+        "Discovered %d station(s) and %d microinverter(s) in %.2fs "
+        "(stations %.2fs, microinverter lists %.2fs, microinverter details %.2fs, concurrency %d)",
+        station_count, micro_count, timings["total"], timings["stations"],
+        timings["micro_lists"], timings["micro_details"], timings["concurrency"],
+    )
+
 
 class HoymilesClient:
     """
@@ -26,6 +149,7 @@ class HoymilesClient:
     
     This class provides methods organized into different categories:
     - Authentication: login, token management
+    - Transport: pooled keep-alive HTTP session
     - HTTP helpers: internal request methods
     - Data fetching: retrieve information from API
     - Control operations: send commands to devices
@@ -33,7 +157,16 @@ class HoymilesClient:
     - Utilities: helper functions
     """
     
-    def __init__(self, username, password, base_url):
+    def __init__(self, username, password, base_url,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT,
+                 pool_size=DEFAULT_POOL_SIZE,
+                 discovery_concurrency=DEFAULT_DISCOVERY_CONCURRENCY,
+                 token_max_age=DEFAULT_TOKEN_MAX_AGE,
+                 cache_policies=None,
+                 rate_limit=DEFAULT_RATE_LIMIT,
+                 rate_burst=DEFAULT_RATE_BURST,
+                 max_retries=DEFAULT_MAX_RETRIES):
         """Initialize the Hoymiles client with credentials and base URL."""
         _LOGGER.debug("Initializing HoymilesClient")
         
@@ -42,63 +175,194 @@ class HoymilesClient:
         self.base_url = base_url
         
         # API endpoint URIs
-        self.uris = {
-            "login": "iam/pub/0/auth/login",
-            "user_info": "iam/api/1/user/me",
-            "count_station_data": "pvm-data/api/0/station/data/count_station_real_data",
-            "find": "pvm/api/0/station/find",
-            "select_by_station": "pvm/api/0/dev/micro/select_by_station",
-            "micro_find": "pvm/api/0/dev/micro/find",
-            "module_details": "pvm-data/api/0/module/data/find_details",
-            "select_all_arrays": "pvm/api/0/dev/array_v3/select_all",
-            "down_module_day_data": "pvm-data/api/0/module/data/down_module_day_data",
-            "down_station_day_data": "pvm-data/api/0/station/down_station_day_data",
-        }
+        self.uris = dict(API_URIS)
         
-        self.token = None
-        self.cache = TTLCache(maxsize=100, ttl=300)
+        self.tokens = TokenManager(self._authenticate, token_max_age)
+        # Per-endpoint response cache, see response_cache.DEFAULT_CACHE_POLICIES
+        self.cache = ResponseCache(cache_policies)
+        self._revalidating = set()
+
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = self._create_session(max(pool_size, discovery_concurrency))
+
+        # Parallelism used by map_system; 1 keeps discovery fully sequential
+        self.discovery_concurrency = max(1, int(discovery_concurrency))
+        self.last_map_timings = {}
+
+        # Single-flight: identical requests in flight share one response
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.request_stats = {"issued": 0, "coalesced": 0, "throttled": 0, "retried": 0, "failed": 0}
+
+        # Pacing and retries for everything sent by this client
+        self.limiter = TokenBucket(rate_limit, rate_burst)
+        self.policy = RequestPolicy(
+            max_retries, self.limiter, self.request_stats,
+            retryable=(requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+        )
+
+    # ============================================================================
+    # TRANSPORT
+    # ============================================================================
+
+    @staticmethod
+    def _create_session(pool_size):
+        """Create a keep-alive session with a bounded connection pool."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        return session
+
+    def close(self):
+        """Close the HTTP session and release pooled connections."""
+        _LOGGER.debug("Closing HoymilesClient session")
+        self.session.close()
 
     # ============================================================================
     # HTTP HELPER METHODS
     # ============================================================================
 
+    def _post_request(self, uri, payload=None, headers=None, use_auth=True, binary=False, response_type='json', parser=ProtobufParser):
+        """
+        Helper method to make POST requests.
+
+        Concurrent calls with the same endpoint and payload are coalesced:
+        only the first one is sent and the others wait for its result.
+        """
+        key = request_key(uri, payload, response_type)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.request_stats["issued"] += 1
+            else:
+                self.request_stats["coalesced"] += 1
+        if not leader:
+            return future.result()
 
-    def _post_request(self, uri, payload=None, headers=None, use_auth=True, binary=False, response_type='json'):
-        """Helper method to make POST requests."""
+        try:
+            result = self._request(uri, payload, headers, use_auth, binary, response_type, parser)
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
+    def _cached_call(self, endpoint, key, fetch):
+        """
+        Return the cached result for (endpoint, key), calling fetch() on a miss.
+
+        A stale entry within the policy's stale_ttl is returned immediately
+        and refreshed in a background thread.
+        """
+        value, fresh = self.cache.lookup(endpoint, key)
+        if value is ResponseCache.MISS:
+            value = fetch()
+            self.cache.store(endpoint, key, value)
+        elif not fresh:
+            self._revalidate(endpoint, key, fetch)
+        return value
+
+    def _revalidate(self, endpoint, key, fetch):
+        with self._inflight_lock:
+            if (endpoint, key) in self._revalidating:
+                return
+            self._revalidating.add((endpoint, key))
+
+        def refresh():
+            try:
+                self.cache.store(endpoint, key, fetch())
+            except Exception as e:
+                _LOGGER.debug("Background refresh of %s %s failed: %s", endpoint, key, e)
+            finally:
+                with self._inflight_lock:
+                    self._revalidating.discard((endpoint, key))
+
+        threading.Thread(target=refresh, name=f"hoymiles-refresh-{endpoint}", daemon=True).start()
+
+    def _request(self, uri, payload, headers, use_auth, binary, response_type, parser):
+        """
+        Send a POST request, handling authentication.
+
+        With use_auth, a token is obtained from the token manager (logging in
+        when needed). If the cloud rejects it, the client logs in once more and
+        replays the request.
+        """
         url = f"{self.base_url}{uri}"
         if headers is None:
             headers = {"Content-Type": "application/json"}
-        if use_auth:
-            if self.token:
-                headers["Authorization"] = self.token
-            else:
-                raise Exception("Token is not set. Please authenticate first.")
 
         _LOGGER.debug(f"POST Request URL: {url}")
         _LOGGER.debug(f"POST Request Payload: {payload}")
-        _LOGGER.debug(f"POST Request Headers: {headers}")
-        
-        response = requests.post(url, json=payload, headers=headers)
+
+        if not use_auth:
+            return self._send_with_retry(url, payload, headers, binary, response_type, parser)[1]
+
+        for attempt in range(AUTH_ATTEMPTS):
+            token = self.tokens.get()
+            auth_failed, result = self._send_with_retry(url, payload, {**headers, "Authorization": token}, binary, response_type, parser)
+            if not auth_failed:
+                return result
+            self.policy.token_rejected(self.tokens, token, attempt, uri)
+
+    def _send_with_retry(self, url, payload, headers, binary, response_type, parser):
+        """
+        Send a request through the rate limiter, retrying transient failures.
+
+        Connection errors, timeouts, 429 and 5xx responses are retried up to
+        max_retries times with exponential backoff and jitter; a Retry-After
+        header sets the minimum delay and also holds back the other requests.
+        The decisions are made by RequestPolicy, shared by both clients.
+        """
+        for attempt in self.policy.attempts():
+            self.policy.record_wait(self.limiter.acquire())
+            try:
+                return self._send(url, payload, headers, binary, response_type, parser)
+            except Exception as err:
+                delay = self.policy.retry_delay(attempt, err, url)
+            time.sleep(delay)
+
+    def _send(self, url, payload, headers, binary, response_type, parser):
+        """Send one POST request; returns (auth_failed, result)."""
+        response = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
         
+        _LOGGER.debug(f"Response Status Code: {response.status_code}")
+        _LOGGER.debug(f"Response Headers: {response.headers}")
+        # Raises RetryableStatusError outside the error logging below; the retry loop logs it
+        if self.policy.check_status(response.status_code, response.headers):
+            return True, None
+
         try:
-            _LOGGER.debug(f"Response Status Code: {response.status_code}")
-            _LOGGER.debug(f"Response Headers: {response.headers}")
             response.raise_for_status()
             
             # Attempt to parse the response as JSON
             try:
                 if response_type == 'protobuf' and binary:
-                    parser = ProtobufParser(response.content)
+                    if is_auth_failure_body(response.content):
+                        return True, None
+                    parser = parser(response.content)
                     _LOGGER.debug("API Response: %s - Protobuf data received", response.status_code)
-                    return parser
+                    return False, parser
                 response_data = response.json()
                 logging.debug(f"Response JSON: {response_data}")
+                if is_auth_failure(response_data):
+                    return True, None
                 _LOGGER.debug("API Response: %s - Success", response.status_code)
-                return response_data
+                return False, response_data
             except ValueError:
                 logging.error("Failed to parse response as JSON")
                 _LOGGER.debug("API Response: %s - Failed to parse JSON", response.status_code)
-                return None
+                return False, None
         except requests.exceptions.RequestException as e:
             logging.error(f"Request failed: {e}")
             _LOGGER.warning("API Response: Request failed - %s", str(e))
@@ -109,32 +373,9 @@ class HoymilesClient:
             raise
         
     def _put_request(self, uri, payload=None, headers=None):
-        """Helper method to make PUT requests."""
-        url = f"{self.base_url}{uri}"
-        if headers is None:
-            headers = {"Content-Type": "application/json"}
-        if self.token:
-            headers["Authorization"] = self.token
-        else:
-            raise Exception("Token is not set. Please authenticate first.")
-
-        _LOGGER.debug(f"PUT Request URL: {url}")
-        _LOGGER.debug(f"PUT Request Payload: {payload}")
-        _LOGGER.debug(f"PUT Request Headers: {headers}")
-
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        
-        # Attempt to parse the response as JSON
-        try:
-            response_data = response.json()
-            _LOGGER.debug(f"Response JSON: {response_data}")
-            _LOGGER.debug("API Response: %s - Success", response.status_code)
-            return response_data
-        except ValueError:
-            _LOGGER.error("Failed to parse response as JSON")
-            _LOGGER.debug("API Response: %s - Failed to parse JSON", response.status_code)
-            return None
+        """Helper method for command requests (sent as POST, like the web app does)."""
+        _LOGGER.debug(f"PUT Request URL: {self.base_url}{uri}")
+        return self._post_request(uri, payload=payload, headers=headers)
 
     # ============================================================================
     # AUTHENTICATION METHODS
@@ -145,7 +386,6 @@ class HoymilesClient:
       passwordHash = hashlib.md5(password)
       return passwordHash.hexdigest()
 
-    @cached(cache=TTLCache(maxsize=100, ttl=300))
     def get_token(self,username, password):
       payload = {
           "user_name": username,
@@ -155,23 +395,32 @@ class HoymilesClient:
       return self._post_request(self.uris['login'], payload=payload, use_auth=False)
     
 
+    @property
+    def token(self):
+      """The current token, or None before the first login."""
+      return self.tokens.token
+
     def login(self):
-      """Authenticate with Hoymiles S-Cloud and retrieve a token."""
+      """Authenticate with Hoymiles S-Cloud and retrieve a fresh token."""
+      self.tokens.refresh()
+      return True
+
+    def _authenticate(self):
+      """Perform the login request; called by the token manager."""
       _LOGGER.warning("Logging into Hoymiles S-Cloud for user: %s", self.username)
       response_data = self.get_token(username=self.username, password=self.get_password_hash())
       if response_data and "data" in response_data and "token" in response_data["data"]:
-          self.token = response_data["data"]["token"]
           _LOGGER.warning("Successfully authenticated with Hoymiles S-Cloud")
-          return True
+          return response_data["data"]["token"]
       else:
           _LOGGER.error("Login failed: Token not found in response")
-          raise Exception("Login failed: Token not found in response")
+          raise AuthenticationError("Login failed: Token not found in response")
 
     # ============================================================================
     # DATA FETCHING METHODS
     # ============================================================================
 
-    @cached(cache=TTLCache(maxsize=100, ttl=300))
+    @cached_endpoint("select_by_station")
     def select_by_station(self, station_id):
         """Select microinverters by station ID."""
         payload = {
@@ -184,7 +433,7 @@ class HoymilesClient:
 
         return response.get("data", {})
     
-    @cached(cache=TTLCache(maxsize=100, ttl=300))
+    @cached_endpoint("micro_find")
     def micro_find(self, micro_id, station_id):
         """Find a microinverter by its ID."""
         payload = {
@@ -194,7 +443,7 @@ class HoymilesClient:
         response = self._post_request(self.uris['micro_find'], payload=payload)
         return response.get('data', {})
 
-    @cached(cache=TTLCache(maxsize=100, ttl=300))
+    @cached_endpoint("module_details")
     def module_details(self, station_id, micro_id, micro_sn, port, time):
         """Retrieve module details by its ID."""
         payload = {
@@ -209,22 +458,15 @@ class HoymilesClient:
         response = self._post_request(self.uris['module_details'], payload=payload)
         return response.get('data', {})
 
-    @cached(cache=TTLCache(maxsize=100, ttl=300))
+    @cached_endpoint("get_user_info")
     def get_user_info(self):
         """Retrieve user information from Hoymiles S-Cloud. [UNUSED]"""
         return self._post_request(self.uris['user_info'])
 
-    @cached(cache=TTLCache(maxsize=100, ttl=300))
+    @cached_endpoint("select_by_page")
     def select_by_page(self, type):
-        uri_map = {
-            "station":  "pvm/api/0/station/select_by_page",
-            "dtu":      "pvm/api/0/dev/dtu/select_by_page",
-            "micro":    "pvm/api/0/dev/micro/select_by_page",
-            # Add more types here if needed
-        }
-
         # Get the URI based on the type
-        uri = uri_map.get(type)
+        uri = SELECT_BY_PAGE_URIS.get(type)
         if not uri:
             raise ValueError(f"Invalid type for select_by_page: {type}")
 
@@ -236,7 +478,7 @@ class HoymilesClient:
 
         return response.get("data", {}).get("list", [])
 
-    @cached(cache=TTLCache(maxsize=100, ttl=300))
+    @cached_endpoint("count_station_real_data")
     def count_station_real_data(self,id):
         """Get the count of station real data."""
         _LOGGER.debug(f"Getting count of station real data for ID: {id}")
@@ -245,7 +487,7 @@ class HoymilesClient:
         }
         return self._post_request(self.uris['count_station_data'], payload=payload)
 
-    @cached(cache=TTLCache(maxsize=100, ttl=300))
+    @cached_endpoint("findStation")
     def findStation(self, sid):
         """Find a station by its ID."""
         payload = {
@@ -260,9 +502,17 @@ class HoymilesClient:
             "sid": sid,
             "date": date,
         }
-        response = self._post_request(self.uris['down_module_day_data'], payload=payload, response_type='protobuf', binary=True)
+        response = self._post_request(self.uris['down_module_day_data'], payload=payload, response_type='protobuf', binary=True, parser=decode_module_day_data)
         return response
 
+    def down_station_day_data(self, sid, date):
+        """Download the station power curve for a specific date (None if it cannot be decoded)."""
+        payload = {
+            "sid": sid,
+            "date": date,
+        }
+        return self._post_request(self.uris['down_station_day_data'], payload=payload, response_type='protobuf', binary=True, parser=decode_station_day_data)
+
     # ============================================================================
     # CONTROL OPERATIONS
     # ============================================================================
@@ -274,70 +524,96 @@ class HoymilesClient:
 
     def set_power_limit(self, sid, power_limit):
         """Set the power limit for a microinverter."""
-        power_limit = min(100, int(power_limit))
-        power_limit = max(5, int(power_limit))
-        payload = {
-            "action": 8,
-            "data": {
-                "sid": sid,
-                "power_limit": power_limit,
-                "enable": 1
-            }
-        }
+        payload = build_power_limit_payload(sid, power_limit)
+        power_limit = payload["data"]["power_limit"]
 
         _LOGGER.debug(f"Setting power limit for SID {sid} to {power_limit}%")
         
-        uri = 'pvm-ctl/api/0/dev/command/put'
-        return self._put_request(uri, payload=payload)
+        response = self._put_request(self.uris['command_put'], payload=payload)
+        # The cached station config still holds the previous limit
+        self.cache.invalidate("findStation", (sid,))
+        return response
 
     # ============================================================================
     # SYSTEM MAPPING AND DATA PROCESSING
     # ============================================================================
     
-    @cached(cache=TTLCache(maxsize=100, ttl=300))
+    @cached_endpoint("map_system")
     def map_system(self):
-        """Build a hierarchical system map of stations, microinverters, and modules."""
+        """
+        Build a hierarchical system map of stations, microinverters, and modules.
+
+        Microinverter lists and microinverter details are fetched in parallel
+        with at most ``discovery_concurrency`` requests in flight. Per-phase
+        timings of the last run are kept in ``last_map_timings``.
+        """
+        started = time.monotonic()
+        timings = {"concurrency": self.discovery_concurrency}
+
         stations = self.select_by_page("station")
-        system = []
+        timings["stations"] = time.monotonic() - started
+        system = System()
         if not stations:
             _LOGGER.warning("No stations found.")
             return system
-        
-        for station_data in stations:
-            station = Station(station_data.get("id"), station_data.get("name"))
-            
-            # Fetch microinverters for the station
-            microinverters = self.select_by_station(station.station_id)
+
+        with ThreadPoolExecutor(max_workers=self.discovery_concurrency) as executor:
+            # Fetch microinverters for every station
+            phase = time.monotonic()
+            micro_lists = list(executor.map(
+                lambda station_data: self.select_by_station(station_data.get("id")), stations
+            ))
+            timings["micro_lists"] = time.monotonic() - phase
+
+            # Fetch module details for every microinverter
+            phase = time.monotonic()
+            jobs = [
+                (station_data.get("id"), micro_data.get("id"))
+                for station_data, microinverters in zip(stations, micro_lists)
+                if microinverters
+                for micro_data in microinverters.get("list", [])
+            ]
+            details = list(executor.map(lambda job: self.micro_find(job[1], job[0]), jobs))
+            timings["micro_details"] = time.monotonic() - phase
+
+        details_by_micro = {micro_id: detail for (_, micro_id), detail in zip(jobs, details)}
+        for station_data, microinverters in zip(stations, micro_lists):
             if not microinverters:
-                _LOGGER.warning(f"No microinverters found for station ID {station.station_id}.")
+                _LOGGER.warning(f"No microinverters found for station ID {station_data.get('id')}.")
                 continue
-                
-            for micro_data in microinverters.get("list", []):
-                micro_id = micro_data.get("id")
-                sn = micro_data.get("sn")
-                microinverter = Microinverter(micro_id, sn)
-                station.add_microinverter(microinverter)
-                
-                # Fetch module details for each port
-                micro_details = self.micro_find(micro_id, station.station_id)
-                for port_info in micro_details.get("layout_list", []):
-                    module_id = f"{sn}-{port_info.get('port')}"
-                    port = port_info.get("port")
-                    x = port_info.get("x")
-                    y = port_info.get("y")
-                    solar_module = SolarModule(module_id, port, x, y)
-                    microinverter.add_module(solar_module)
-                    
-            system.append(station)
+            system.append(assemble_station(station_data, microinverters.get("list", []), details_by_micro))
+
+        timings["total"] = time.monotonic() - started
+        self.last_map_timings = timings
+        log_discovery_timings(timings, len(system), len(jobs))
         return system
     
     
-    def fill_system_data(self, system, date=None):
-        """Fill system hierarchy with actual performance data for a given date."""
+    def fill_system_data(self, system, date=None, incremental=False, on_payload=None, now=None):
+        """
+        Fill system hierarchy with actual performance data for a given date.
+
+        With incremental=True, stations that cannot have a new 5-minute slot
+        yet are skipped without a download, and only new slots are ingested.
+        on_payload(station_id, date, data) is called for every downloaded
+        payload, e.g. to archive it. Returns the number of stations whose day
+        data was downloaded. now (default: local time) is the current
+        time used for date and the incremental check; pass an aware datetime
+        in the configured time zone when it differs from the process's.
+        """
+        if now is None:
+            now = datetime.datetime.now()
         if date is None:
-            date = datetime.datetime.now().strftime("%Y-%m-%d")
+            date = now.strftime("%Y-%m-%d")
         _LOGGER.debug(f"Filling system data for date: {date}")
+        downloaded = 0
         for station in system:
-            sid = station.station_id
-            data = self.down_module_day_data(sid, date)
-            station.set_data(data)
+            if incremental and not station.needs_refresh(date, now):
+                _LOGGER.debug("Skipping day data for station %s, no new slot expected after %s", station.station_id, station.last_slot)
+                continue
+            data = self.down_module_day_data(station.station_id, date)
+            downloaded += 1
+            station.set_data(data, incremental=incremental, date=date)
+            if on_payload is not None:
+                on_payload(station.station_id, date, data)
+        return downloaded
@@ -1,46 +1,60 @@
 import logging
-from datetime import datetime, timedelta
 from homeassistant.components.number import NumberEntity
-from homeassistant.const import CONF_SCAN_INTERVAL
-from .hoymiles_client import HoymilesClient
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
 from .device_registry import create_station_device_info
+from .entity import HoymilesEntity
 
 DOMAIN = "hoymiles_nimbus"
 
 _LOGGER = logging.getLogger(__name__)
 
-# Define the throttling interval (5 minutes)
-UPDATE_INTERVAL = timedelta(seconds=30)
-
-SCAN_INTERVAL = timedelta(seconds=30)
-
-async def async_setup_entry(hass, config_entry, async_add_entities):
-    client = hass.data[DOMAIN][config_entry.entry_id]
-
-    _LOGGER.debug("[numbers] Logging into Hoymiles S-Cloud...")
-    await hass.async_add_executor_job(client.login)
-
-    _LOGGER.debug("[numbers] Fetching stations from Hoymiles S-Cloud...")
-    stations = await hass.async_add_executor_job(client.select_by_page, "station")
-
-    _LOGGER.debug(f"[numbers] Found {len(stations)} stations")
 
+def _build_entities(coordinator, known_ids):
+    """Create power level numbers for stations whose unique id is not in known_ids."""
     entities = []
-    for station in stations:
+    for station in coordinator.stations:
         station_name = station.get('name', 'Unknown')
         sid = station.get("id")
         device_info = create_station_device_info(sid, station_name)
         name = device_info["name"]
 
-        entities.append(HoymilesMicroInverterLevel(client, name, sid, device_info))
+        entities.append(HoymilesMicroInverterLevel(coordinator, name, sid, device_info))
+
+    new_entities = [entity for entity in entities if entity.unique_id not in known_ids]
+    known_ids.update(entity.unique_id for entity in new_entities)
+    return new_entities
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    _LOGGER.debug(f"[numbers] Found {len(coordinator.stations)} stations")
+
+    known_ids = set()
+    async_add_entities(_build_entities(coordinator, known_ids))
+
+    @callback
+    def async_topology_changed():
+        """Add numbers for new stations and remove those that disappeared."""
+        new_entities = _build_entities(coordinator, known_ids)
+        if new_entities:
+            async_add_entities(new_entities)
+
+        current_ids = {f"hoymiles_{station.get('id')}_power_level" for station in coordinator.stations}
+        entity_registry = er.async_get(hass)
+        for entry in er.async_entries_for_config_entry(entity_registry, config_entry.entry_id):
+            if entry.domain == "number" and entry.unique_id not in current_ids:
+                entity_registry.async_remove(entry.entity_id)
+                known_ids.discard(entry.unique_id)
 
-    async_add_entities(entities)
+    config_entry.async_on_unload(coordinator.async_add_topology_listener(async_topology_changed))
 
-class HoymilesMicroInverterLevel(NumberEntity):
+class HoymilesMicroInverterLevel(HoymilesEntity, NumberEntity):
     """Representation of a Hoymiles power level sensor."""
-    def __init__(self, client, name, sid, device_info):
+    def __init__(self, coordinator, name, sid, device_info):
         _LOGGER.debug(f"[numbers] Creating HoymilesMicroInverterLevel entity for {name} with SID {sid}")
-        self._client = client
+        super().__init__(coordinator)
         self._sid = sid
         self._attr_name = f"{name} Power Level (%)"
         self._attr_unique_id = f"hoymiles_{sid}_power_level"
@@ -51,64 +65,47 @@ class HoymilesMicroInverterLevel(NumberEntity):
         self._attr_device_info = device_info
         self._attr_icon = "mdi:power-socket-eu"
 
-        self._attr_should_poll = True
-
-        self._last_write = datetime.min
-        self._write_interval = timedelta(seconds=30)
-        self._pending_value = None
-
-     
-
     async def async_set_native_value(self, value):
-        """Set the power level of the inverter."""
-        now = datetime.now()
-
-        if now - self._last_write < self._write_interval:
-            _LOGGER.info(f"[numbers] Throttling: storing {value}% to apply later")
-            self._pending_value = value
-            self._attr_native_value = value
-            self.async_write_ha_state() 
-            return
-        await self._apply_power_limit(value)
-
-        # If a pending value exists and is different, schedule it after delay
-        if self._pending_value is not None and self._pending_value != value:
-            delay = (self._last_write + self._write_interval - now).total_seconds()
-            self.hass.loop.call_later(delay, self._schedule_pending_write)
-
-
-    async def _apply_power_limit(self, value):
-        _LOGGER.debug(f"[numbers] Applying power limit: {value}%")
+        """Queue the power level; the coordinator's command queue batches the writes."""
+        _LOGGER.debug(f"[numbers] Queueing power limit {value}% for station {self._sid}")
         self._attr_native_value = value
-        await self.hass.async_add_executor_job(self._client.set_power_limit, self._sid, value)
-        self._last_write = datetime.now()
+        self.coordinator.commands.submit(self._sid, value)
         self.async_write_ha_state()
 
-
-    def _schedule_pending_write(self):
-        if self._pending_value is not None:
-            value = self._pending_value
-            self._pending_value = None
-            _LOGGER.info(f"[numbers] Executing delayed write of {value}%")
-            self.hass.async_create_task(self._apply_power_limit(value))
-
-
-    async def async_update(self):
-        """Fetch the latest state of the inverter."""
-        
-        _LOGGER.debug(f"[numbers] Updating power level for SID {self._sid}")
-
-        station = await self.hass.async_add_executor_job(self._client.findStation, self._sid)
+    @property
+    def extra_state_attributes(self):
+        attrs = dict(super().extra_state_attributes)
+        result = self.coordinator.commands.results.get(self._sid)
+        if result:
+            attrs["last_write_value"] = result["value"]
+            attrs["last_write_confirmed"] = result["confirmed"]
+        return attrs
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self._update_from_station()
+
+    @callback
+    def _handle_coordinator_update(self):
+        self._update_from_station()
+        super()._handle_coordinator_update()
+
+    def _update_from_station(self):
+        """Read the current power level from the coordinator's findStation data."""
+        pending = self.coordinator.commands.pending_value(self._sid)
+        if pending is not None:
+            # The cloud does not know the queued value yet
+            self._attr_native_value = pending
+            return
+        station = (self.coordinator.data or {}).get("station_info", {}).get(self._sid)
         if not station:
             _LOGGER.warning(f"[numbers] Station with SID {self._sid} not found")
             return
         
-        _LOGGER.debug(f"[numbers] Station data: {station}")
         config = station.get("config")
         if not config:
             _LOGGER.warning(f"[numbers] No configuration found for station with SID {self._sid}")
             return
-        _LOGGER.debug(f"[numbers] Station configuration: {config}")
         power_level = config.get("power_limit")
         if power_level is None:
             _LOGGER.warning(f"[numbers] No power level found for station with SID {self._sid}")
@@ -116,4 +113,3 @@ class HoymilesMicroInverterLevel(NumberEntity):
         _LOGGER.debug(f"[numbers] Power level for station with SID {self._sid}: {power_level}")
     
         self._attr_native_value = power_level
-        
\ No newline at end of file
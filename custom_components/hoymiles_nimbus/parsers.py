@@ -1,10 +1,93 @@
+import logging
+import math
 import re
 import string
 import struct
+from array import array
+from itertools import chain
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 TIME_RE = re.compile(rb"^[0-2][0-9]:[0-5][0-9]$")
 
+# Layout of a module sample: these leading fields are float32 values sent as
+# fixed32; any further fields are unknown and kept as raw integers.
+SAMPLE_SCHEMA = ("volt", "ampere", "watt")
+
+_NAN_BITS = 0x7FC00000
+
+DATE_RE = re.compile(rb"^[0-9]{4}-[0-9]{2}-[0-9]{2}$")
+# Minutes covered by one sample slot in the day data payloads
+SLOT_MINUTES = 5
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FieldNode:
+    """
+    A parsed protobuf field.
+
+    Stores offsets into the parser's shared memoryview instead of byte copies;
+    value_bytes and raw are zero-copy views. Supports the dict-style access
+    (node['field'], node.get('is_time'), 'subfields' in node) of tree nodes.
+    """
+
+    __slots__ = ('_view', '_base', 'field', 'wire_type', 'start', 'end',
+                 'value_start', 'value_end', '_depth', 'decoded', 'is_time', 'subfields')
+
+    _KEYS = frozenset(('field', 'wire_type', 'value_bytes', 'raw', 'start', 'end',
+                       '_depth', 'decoded', 'is_time', 'subfields'))
+
+    def __init__(self, view, base, field, wire_type, start, end, value_start, value_end, depth):
+        self._view = view
+        self._base = base  # absolute offset of the containing message
+        self.field = field
+        self.wire_type = wire_type
+        self.start = start  # relative to the containing message
+        self.end = end
+        self.value_start = value_start  # absolute
+        self.value_end = value_end
+        self._depth = depth
+        self.decoded = None
+        self.is_time = None
+        self.subfields = None
+
+    @property
+    def value_bytes(self):
+        return self._view[self.value_start:self.value_end]
+
+    @property
+    def raw(self):
+        return self._view[self._base + self.start:self._base + self.end]
+
+    def __getitem__(self, key):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None and key in ('is_time', 'subfields'):
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __repr__(self):
+        return f"FieldNode(field={self.field}, wire_type={self.wire_type}, len={self.value_end - self.value_start})"
+
 
 class ProtobufParser:
     """
@@ -17,36 +100,88 @@ class ProtobufParser:
       - Length-delimited printable UTF-8 -> str
       - Time (HH:MM) -> str
       - Otherwise -> {'field': int, 'wire_type': int, 'hex': str, 'len': int}
+
+    Tree nodes are FieldNode objects referencing offsets into one shared
+    memoryview of the payload; bytes are only materialized when a value is
+    decoded or printed.
+
+    With lazy=True neither representation is built up front: the tree is
+    materialized on first use of recursive_fields()/debug_print_tree(), the
+    compact list is built directly from the bytes on first get_compact(), and
+    iter_fields()/iter_compact() stream top-level fields on demand.
     """
 
-    def __init__(self, blob: bytes):
+    def __init__(self, blob: bytes, lazy: bool = False):
         self.original = blob
-        self.tree = self._parse_message(blob)
+        self._view = memoryview(blob)
+        self._tree = None
+        self._compact = None
         self.id = None
         self.date = None
-        if self.tree:
-            if self.tree[0]['wire_type'] == 0:
-                self.id = self.tree[0].get('decoded')
-            if len(self.tree) > 1 and self.tree[1]['wire_type'] == 2:
-                if isinstance(self.tree[1].get('decoded'), str):
-                    self.date = self.tree[1]['decoded']
-        # Build compact representation
-        self.compact = self._compact_list(self.tree)
+        if lazy:
+            head = []
+            for field_number, wire_type, _, vs, ve in self._scan(0, len(blob)):
+                head.append({'wire_type': wire_type, 'decoded': self._decode_value(wire_type, self._view[vs:ve])})
+                if len(head) == 2:
+                    break
+            nodes = head
+        else:
+            nodes = self.tree
+        if nodes:
+            if nodes[0]['wire_type'] == 0:
+                self.id = nodes[0].get('decoded')
+            if len(nodes) > 1 and nodes[1]['wire_type'] == 2:
+                if isinstance(nodes[1].get('decoded'), str):
+                    self.date = nodes[1]['decoded']
+        if not lazy:
+            # Build compact representation
+            self._compact = self._compact_list(self.tree)
 
     def __str__(self):
-        return f"HoymilesParser(id={self.id}, date={self.date}, root_fields={len(self.tree)})"
+        root_fields = len(self._tree) if self._tree is not None else '?'
+        return f"HoymilesParser(id={self.id}, date={self.date}, root_fields={root_fields})"
 
     # -------- Public API --------
 
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = self._parse_range(0, len(self.original))
+        return self._tree
+
+    @property
+    def compact(self):
+        return self.get_compact()
+
     def recursive_fields(self):
         return self.tree
 
     def get_compact(self):
-        return self.compact
+        if self._compact is None:
+            self._compact = list(self.iter_compact())
+        return self._compact
+
+    def iter_fields(self, submessages=False):
+        """
+        Yield top-level field nodes one at a time without building the tree.
+
+        Nodes have the same keys as tree nodes; 'subfields' is only filled
+        in when submessages=True.
+        """
+        for field_number, wire_type, start, vs, ve, end in self._scan_nodes(0, len(self.original)):
+            yield self._make_node(0, field_number, wire_type, start, end, vs, ve, 0, submessages)
+
+    def iter_compact(self):
+        """Yield the compact value of each top-level field one at a time."""
+        if self._compact is not None:
+            yield from self._compact
+            return
+        for field_number, wire_type, _, vs, ve in self._scan(0, len(self.original)):
+            yield self._compact_value(field_number, wire_type, vs, ve)
 
     def collect_times(self):
         return [
-            f['value_bytes'].decode('ascii')
+            str(f['value_bytes'], 'ascii')
             for f in self._walk(self.tree)
             if f.get('is_time')
         ]
@@ -73,7 +208,7 @@ class ProtobufParser:
                 else:
                     extras.append(f"dec={dv!r}")
             vb = f['value_bytes']
-            show = vb[:24]
+            show = bytes(vb[:24])
             if len(vb) > 24:
                 show = show + b'...'
             lines.append(f"{indent}F{f['field']} wt={f['wire_type']} len={len(vb)} {' '.join(extras)} val={show}")
@@ -81,85 +216,87 @@ class ProtobufParser:
 
     # -------- Recursive parsing --------
 
-    def _parse_message(self, data: bytes, depth: int = 0, max_fields: int = 100000):
-        offset = 0
-        fields = []
+    def _scan(self, start: int, end: int, max_fields: int = 100000):
+        """
+        Yield (field, wire_type, field_start, value_start, value_end) for the
+        message in [start, end) of the shared view, up to the first malformed
+        field. All offsets are absolute.
+        """
+        data = self._view
+        offset = start
         for _ in range(max_fields):
-            if offset >= len(data):
+            if offset >= end:
                 break
-            start = offset
+            field_start = offset
             try:
-                key, offset = self._read_varint(data, offset)
+                key, offset = self._read_varint(data, offset, end)
             except Exception:
                 break
             field_number = key >> 3
             wire_type = key & 0x07
             try:
                 if wire_type == 0:  # varint
-                    _, off2 = self._read_varint(data, offset)
-                    value_bytes = data[offset:off2]
+                    _, off2 = self._read_varint(data, offset, end)
+                    vs, ve = offset, off2
                     offset = off2
                 elif wire_type == 1:  # 64-bit
-                    value_bytes = data[offset:offset+8]
-                    if len(value_bytes) < 8:
+                    if offset + 8 > end:
                         break
+                    vs, ve = offset, offset + 8
                     offset += 8
                 elif wire_type == 2:  # length-delimited
-                    length, off2 = self._read_varint(data, offset)
+                    length, off2 = self._read_varint(data, offset, end)
                     vs = off2
                     ve = vs + length
-                    if ve > len(data):
+                    if ve > end:
                         break
-                    value_bytes = data[vs:ve]
                     offset = ve
                 elif wire_type == 5:  # 32-bit
-                    value_bytes = data[offset:offset+4]
-                    if len(value_bytes) < 4:
+                    if offset + 4 > end:
                         break
+                    vs, ve = offset, offset + 4
                     offset += 4
                 else:
                     break
             except Exception:
                 break
+            yield field_number, wire_type, field_start, vs, ve
+
+    def _scan_nodes(self, start: int, end: int):
+        """Like _scan, but also yields the field end (relative offsets for start/end)."""
+        for field_number, wire_type, field_start, vs, ve in self._scan(start, end):
+            yield field_number, wire_type, field_start - start, vs, ve, ve - start
+
+    def _parse_range(self, start: int, end: int, depth: int = 0):
+        return [
+            self._make_node(start, field_number, wire_type, field_start, field_end, vs, ve, depth)
+            for field_number, wire_type, field_start, vs, ve, field_end in self._scan_nodes(start, end)
+        ]
 
-            end = offset
-            node = {
-                'field': field_number,
-                'wire_type': wire_type,
-                'value_bytes': value_bytes,
-                'raw': data[start:end],
-                'start': start,
-                'end': end,
-                '_depth': depth,
-            }
-
-            # Primitive decode
-            node['decoded'] = self._decode_primitive(node)
-
-            # Mark time strings
-            if wire_type == 2 and len(value_bytes) == 5 and TIME_RE.match(value_bytes):
-                try:
-                    value_bytes.decode('ascii')
-                    node['is_time'] = True
-                except Exception:
-                    pass
-
-            # Attempt recursive parse for length-delimited (if not time and not a simple decoded string)
-            if wire_type == 2 and not node.get('is_time') and not (
-                isinstance(node.get('decoded'), str) and len(value_bytes) == len(node['decoded'])
-            ):
-                sub = self._attempt_subparse(value_bytes, depth + 1)
-                if sub is not None:
-                    node['subfields'] = sub
-
-            fields.append(node)
-        return fields
-
-    def _attempt_subparse(self, value: bytes, depth: int):
-        subfields = self._parse_message(value, depth=depth)
+    def _make_node(self, base, field_number, wire_type, start, end, vs, ve, depth, subparse=True):
+        node = FieldNode(self._view, base, field_number, wire_type, start, end, vs, ve, depth)
+        value_bytes = node.value_bytes
+
+        # Primitive decode
+        node.decoded = self._decode_value(wire_type, value_bytes)
+
+        # Mark time strings
+        if wire_type == 2 and ve - vs == 5 and TIME_RE.match(value_bytes):
+            node.is_time = True
+
+        # Attempt recursive parse for length-delimited (if not time and not a simple decoded string)
+        if subparse and wire_type == 2 and not node.is_time and not (
+            isinstance(node.decoded, str) and ve - vs == len(node.decoded)
+        ):
+            node.subfields = self._attempt_subparse(vs, ve, depth + 1)
+
+        return node
+
+    def _attempt_subparse(self, start: int, end: int, depth: int):
+        subfields = self._parse_range(start, end, depth=depth)
         if not subfields:
             return None
-        if subfields[-1]['end'] != len(value):
+        if subfields[-1].end != end - start:
             return None
         return subfields
 
@@ -169,25 +306,22 @@ class ProtobufParser:
         compact = []
         for n in nodes:
             # If submessage
-            if 'subfields' in n:
-                compact.append(self._compact_list(n['subfields']))
+            if n.subfields is not None:
+                compact.append(self._compact_list(n.subfields))
                 continue
 
             # Primitive (int) or decoded string/time
-            decoded = n.get('decoded')
+            decoded = n.decoded
 
             # If we have a decoded primitive (int) from wire types 0/1/5
-            if decoded is not None and n['wire_type'] in (0, 1, 5) and not isinstance(decoded, (bytes, bytearray)):
+            if decoded is not None and n.wire_type in (0, 1, 5) and not isinstance(decoded, (bytes, bytearray)):
                 compact.append(decoded)
                 continue
 
             # Time always as string
-            if n.get('is_time'):
-                try:
-                    compact.append(n['value_bytes'].decode('ascii'))
-                    continue
-                except Exception:
-                    pass  # fallback to dict
+            if n.is_time:
+                compact.append(str(n.value_bytes, 'ascii'))
+                continue
 
             # Decoded printable string
             if isinstance(decoded, str):
@@ -195,20 +329,50 @@ class ProtobufParser:
                 continue
 
             # Fallback: minimal dict
-            vb = n['value_bytes']
+            vb = n.value_bytes
             compact.append({
-                'field': n['field'],
-                'wire_type': n['wire_type'],
+                'field': n.field,
+                'wire_type': n.wire_type,
                 'hex': vb.hex(),
                 'len': len(vb),
             })
         return compact
 
+    def _compact_value(self, field_number, wire_type, vs, ve):
+        """Compact value of a single field, built straight from the view (no tree)."""
+        value_bytes = self._view[vs:ve]
+        decoded = self._decode_value(wire_type, value_bytes)
+
+        if wire_type == 2:
+            is_time = ve - vs == 5 and TIME_RE.match(value_bytes) is not None
+            if not is_time and not (isinstance(decoded, str) and ve - vs == len(decoded)):
+                # Submessage if the whole value parses as fields
+                sub = []
+                sub_end = vs
+                for sub_field, sub_wt, _, sub_vs, sub_end in self._scan(vs, ve):
+                    sub.append(self._compact_value(sub_field, sub_wt, sub_vs, sub_end))
+                if sub and sub_end == ve:
+                    return sub
+            if is_time:
+                return str(value_bytes, 'ascii')
+            if isinstance(decoded, str):
+                return decoded
+        elif decoded is not None and not isinstance(decoded, (bytes, bytearray)):
+            return decoded
+
+        return {
+            'field': field_number,
+            'wire_type': wire_type,
+            'hex': value_bytes.hex(),
+            'len': ve - vs,
+        }
+
     # -------- Decoding helpers --------
 
     def _decode_primitive(self, node):
-        wt = node['wire_type']
-        vb = node['value_bytes']
+        return self._decode_value(node['wire_type'], node['value_bytes'])
+
+    def _decode_value(self, wt, vb):
         try:
             if wt == 0:  # varint
                 return self._decode_varint_bytes(vb)
@@ -222,11 +386,11 @@ class ProtobufParser:
             return None
         return None
 
-    def _maybe_decode_length_delimited(self, b: bytes):
+    def _maybe_decode_length_delimited(self, b):
         if not b:
             return ""
         try:
-            txt = b.decode('utf-8')
+            txt = str(b, 'utf-8')
         except UnicodeDecodeError:
             return None
         printable_ratio = sum(ch in string.printable for ch in txt) / max(1, len(txt))
@@ -239,16 +403,18 @@ class ProtobufParser:
     def _walk(self, nodes):
         for n in nodes:
             yield n
-            if 'subfields' in n:
-                yield from self._walk(n['subfields'])
+            if n.subfields is not None:
+                yield from self._walk(n.subfields)
 
     # -------- Low-level varint helpers --------
 
-    def _read_varint(self, data: bytes, offset: int):
+    def _read_varint(self, data, offset: int, limit: int = None):
+        if limit is None:
+            limit = len(data)
         shift = 0
         result = 0
         while True:
-            if offset >= len(data):
+            if offset >= limit:
                 raise ValueError("Truncated varint")
             b = data[offset]
             result |= (b & 0x7F) << shift
@@ -260,7 +426,7 @@ class ProtobufParser:
                 raise ValueError("Varint too long")
         return result, offset
 
-    def _decode_varint_bytes(self, b: bytes):
+    def _decode_varint_bytes(self, b):
         shift = 0
         result = 0
         for by in b:
@@ -272,13 +438,385 @@ class ProtobufParser:
     
     @staticmethod
     def decode_data_point(data_point: list):
-        decoded = []
-        for i, val in enumerate(data_point):
-            if isinstance(val, (int, float)) and val < 10:
-                decoded.append(val)
-            elif isinstance(val, (int, float)):
-                decoded.append(struct.unpack('<f', struct.pack('<I', val))[0])
+        """Decode one sample: schema fields as float32, remaining fields as-is."""
+        columns = decode_samples([data_point])
+        decoded = [float(columns[name][0]) for name in SAMPLE_SCHEMA]
+        decoded = [None if math.isnan(value) else value for value in decoded]
+        return decoded + columns["other"][0]
+
+
+def _schema_bits(value):
+    """Return value if it can be raw float32 bits, else the NaN pattern (missing)."""
+    if isinstance(value, int) and 0 <= value <= 0xFFFFFFFF:
+        return value
+    return _NAN_BITS
+
+
+def decode_samples(samples):
+    """
+    Decode a module's whole sample series in one call.
+
+    samples is a list of per-slot value lists as found in the compact data
+    (raw float32 bits). Returns a dict with one float32 column per
+    SAMPLE_SCHEMA field (NumPy arrays when NumPy is available, otherwise
+    array('f')) plus "other": a list with the remaining raw values per slot.
+    Missing or non-numeric schema values decode as NaN.
+    """
+    width = len(SAMPLE_SCHEMA)
+    try:
+        bits = array('I', chain.from_iterable(
+            row[:width] if len(row) >= width else list(row) + [_NAN_BITS] * (width - len(row))
+            for row in samples
+        ))
+    except (TypeError, OverflowError):
+        bits = array('I', (
+            _schema_bits(row[i]) if i < len(row) else _NAN_BITS
+            for row in samples
+            for i in range(width)
+        ))
+
+    if np is not None:
+        floats = np.frombuffer(bits.tobytes(), dtype=np.float32).reshape(-1, width)
+        columns = {name: floats[:, i] for i, name in enumerate(SAMPLE_SCHEMA)}
+    else:
+        floats = array('f')
+        floats.frombytes(bits.tobytes())
+        columns = {name: floats[i::width] for i, name in enumerate(SAMPLE_SCHEMA)}
+
+    columns["other"] = [list(row[width:]) for row in samples]
+    return columns
+
+
+class UnknownLayoutError(ValueError):
+    """Raised when a payload does not match the module-day-data layout."""
+
+
+def _read_varint_at(view, offset):
+    """Read a varint from a memoryview; returns (value, new_offset)."""
+    b = view[offset]
+    if b < 0x80:
+        return b, offset + 1
+    result = b & 0x7F
+    shift = 7
+    offset += 1
+    while True:
+        if offset >= len(view):
+            raise UnknownLayoutError("Truncated varint")
+        b = view[offset]
+        result |= (b & 0x7F) << shift
+        offset += 1
+        if not (b & 0x80):
+            return result, offset
+        shift += 7
+        if shift > 63:
+            raise UnknownLayoutError("Varint too long")
+
+
+class ModuleDayDataDecoder:
+    """
+    Schema-driven decoder for down_module_day_data payloads.
+
+    Reads the known layout straight from a memoryview and produces the same
+    compact structure as ProtobufParser.get_compact():
+
+      [station_id, date, micro, micro, ...]
+      micro  -> [micro_id, day]
+      day    -> [int, "HH:MM", "HH:MM", ..., port, port, ...]
+      port   -> [port_number, [sample, sample, ...]]
+      sample -> [u32, u32, ...]  (raw float32 bits, as ProtobufParser yields them)
+
+    Any deviation raises UnknownLayoutError; use decode_module_day_data() to
+    fall back to the generic parser in that case.
+    """
+
+    def __init__(self, blob: bytes):
+        self.original = blob
+        self._view = memoryview(blob)
+        self.compact = self._decode_root(0, len(blob))
+        if len(self.compact) < 2 or not isinstance(self.compact[0], int) or not isinstance(self.compact[1], str):
+            raise UnknownLayoutError("Missing station id or date")
+        self.id = self.compact[0]
+        self.date = self.compact[1]
+
+    def __str__(self):
+        return f"ModuleDayDataDecoder(id={self.id}, date={self.date}, micros={len(self.compact) - 2})"
+
+    def get_compact(self):
+        return self.compact
+
+    def iter_compact(self):
+        return iter(self.compact)
+
+    # -------- Message levels --------
+
+    def _decode_root(self, start, end):
+        view = self._view
+        out = []
+        offset = start
+        while offset < end:
+            key, offset = _read_varint_at(view, offset)
+            wire_type = key & 0x07
+            if wire_type == 0:
+                value, offset = _read_varint_at(view, offset)
+                out.append(value)
+            elif wire_type == 2:
+                length, offset = _read_varint_at(view, offset)
+                value_end = offset + length
+                if value_end > end:
+                    raise UnknownLayoutError("Truncated root field")
+                if len(out) == 1:
+                    out.append(self._decode_text(offset, value_end))
+                else:
+                    out.append(self._decode_micro(offset, value_end))
+                offset = value_end
             else:
-                # Skip non-numeric values
-                continue
-        return decoded
+                raise UnknownLayoutError(f"Unexpected wire type {wire_type} at root")
+        return out
+
+    def _decode_micro(self, start, end):
+        view = self._view
+        out = []
+        offset = start
+        while offset < end:
+            key, offset = _read_varint_at(view, offset)
+            wire_type = key & 0x07
+            if wire_type == 0:
+                value, offset = _read_varint_at(view, offset)
+                out.append(value)
+            elif wire_type == 2:
+                length, offset = _read_varint_at(view, offset)
+                value_end = offset + length
+                if value_end > end:
+                    raise UnknownLayoutError("Truncated micro field")
+                out.append(self._decode_day(offset, value_end))
+                offset = value_end
+            else:
+                raise UnknownLayoutError(f"Unexpected wire type {wire_type} in micro")
+        if offset != end or not out or not isinstance(out[0], int):
+            raise UnknownLayoutError("Malformed micro block")
+        return out
+
+    def _decode_day(self, start, end):
+        view = self._view
+        out = []
+        offset = start
+        while offset < end:
+            key, offset = _read_varint_at(view, offset)
+            wire_type = key & 0x07
+            if wire_type == 0:
+                value, offset = _read_varint_at(view, offset)
+                out.append(value)
+            elif wire_type == 2:
+                length, offset = _read_varint_at(view, offset)
+                value_end = offset + length
+                if value_end > end:
+                    raise UnknownLayoutError("Truncated day field")
+                if length == 5 and TIME_RE.match(view[offset:value_end]):
+                    out.append(str(view[offset:value_end], 'ascii'))
+                else:
+                    try:
+                        out.append(self._decode_port(offset, value_end))
+                    except (UnknownLayoutError, IndexError):
+                        out.append(self._decode_text(offset, value_end))
+                offset = value_end
+            else:
+                raise UnknownLayoutError(f"Unexpected wire type {wire_type} in day")
+        if offset != end:
+            raise UnknownLayoutError("Malformed day block")
+        return out
+
+    def _decode_port(self, start, end):
+        view = self._view
+        out = []
+        offset = start
+        while offset < end:
+            key, offset = _read_varint_at(view, offset)
+            wire_type = key & 0x07
+            if wire_type == 0:
+                value, offset = _read_varint_at(view, offset)
+                out.append(value)
+            elif wire_type == 2:
+                length, offset = _read_varint_at(view, offset)
+                value_end = offset + length
+                if value_end > end:
+                    raise UnknownLayoutError("Truncated port field")
+                out.append(self._decode_samples(offset, value_end))
+                offset = value_end
+            else:
+                raise UnknownLayoutError(f"Unexpected wire type {wire_type} in port")
+        if offset != end or len(out) < 2 or not isinstance(out[1], list):
+            raise UnknownLayoutError("Malformed port block")
+        return out
+
+    def _decode_samples(self, start, end):
+        view = self._view
+        samples = []
+        offset = start
+        while offset < end:
+            key, offset = _read_varint_at(view, offset)
+            if key & 0x07 != 2:
+                raise UnknownLayoutError("Sample is not a submessage")
+            length, offset = _read_varint_at(view, offset)
+            sample_end = offset + length
+            if sample_end > end:
+                raise UnknownLayoutError("Truncated sample")
+            sample = []
+            while offset < sample_end:
+                key, offset = _read_varint_at(view, offset)
+                wire_type = key & 0x07
+                if wire_type == 5:
+                    sample.append(_UNPACK_U32(view, offset)[0])
+                    offset += 4
+                elif wire_type == 0:
+                    value, offset = _read_varint_at(view, offset)
+                    sample.append(value)
+                else:
+                    raise UnknownLayoutError(f"Unexpected wire type {wire_type} in sample")
+            if offset != sample_end:
+                raise UnknownLayoutError("Malformed sample")
+            samples.append(sample)
+        return samples
+
+    def _decode_text(self, start, end):
+        try:
+            return str(self._view[start:end], 'utf-8')
+        except UnicodeDecodeError as err:
+            raise UnknownLayoutError("Expected a text field") from err
+
+
+_UNPACK_U32 = struct.Struct('<I').unpack_from
+
+
+def decode_module_day_data(blob: bytes):
+    """
+    Decode a down_module_day_data payload.
+
+    Uses ModuleDayDataDecoder and falls back to the generic ProtobufParser
+    when the payload does not match the known layout.
+    """
+    try:
+        return ModuleDayDataDecoder(blob)
+    except (UnknownLayoutError, IndexError, struct.error) as err:
+        _LOGGER.debug("Unknown module day data layout (%s), using generic parser", err)
+        return ProtobufParser(blob, lazy=True)
+
+
+class StationDayDataDecoder:
+    """
+    Decoder for down_station_day_data payloads (the station power curve).
+
+    The layout mirrors the module data one level up:
+
+      [station_id, date, "HH:MM", ..., sample, sample, ...]
+
+    where every sample is a submessage of fixed32 fields, the first being
+    the station power in W as float32. Slot labels and samples are collected
+    in order wherever they are nested. Raises UnknownLayoutError when no id,
+    date or a matching number of labels and samples is found.
+    """
+
+    def __init__(self, blob: bytes):
+        self.original = blob
+        self._view = memoryview(blob)
+        self.id = None
+        self.date = None
+        self.times = []
+        bits = array('I')
+        self._walk(0, len(blob), bits, 0)
+        if self.id is None or self.date is None:
+            raise UnknownLayoutError("Missing station id or date")
+        if len(bits) != len(self.times):
+            raise UnknownLayoutError(f"{len(self.times)} slot labels but {len(bits)} samples")
+        self.power = array('f')
+        self.power.frombytes(bits.tobytes())
+
+    def __str__(self):
+        return f"StationDayDataDecoder(id={self.id}, date={self.date}, slots={len(self.times)})"
+
+    @property
+    def latest_time(self):
+        return self.times[-1] if self.times else None
+
+    @property
+    def current_power(self):
+        """Power of the latest slot with a value, in W (0 without samples)."""
+        for value in reversed(self.power):
+            if not math.isnan(value):
+                return value
+        return 0.0
+
+    @property
+    def energy_kwh(self):
+        """Energy produced so far on this day, integrated from the power curve."""
+        total = sum(value for value in self.power if not math.isnan(value))
+        return total * SLOT_MINUTES / 60 / 1000
+
+    def _walk(self, start, end, bits, depth):
+        view = self._view
+        offset = start
+        while offset < end:
+            key, offset = _read_varint_at(view, offset)
+            wire_type = key & 0x07
+            if wire_type == 0:
+                value, offset = _read_varint_at(view, offset)
+                if depth == 0 and self.id is None:
+                    self.id = value
+            elif wire_type == 5:
+                offset += 4
+            elif wire_type == 1:
+                offset += 8
+            elif wire_type == 2:
+                length, offset = _read_varint_at(view, offset)
+                value_end = offset + length
+                if value_end > end:
+                    raise UnknownLayoutError("Truncated field")
+                field = view[offset:value_end]
+                if length == 5 and TIME_RE.match(field):
+                    self.times.append(str(field, 'ascii'))
+                elif length == 10 and DATE_RE.match(field):
+                    if self.date is None:
+                        self.date = str(field, 'ascii')
+                else:
+                    sample = self._sample_bits(offset, value_end)
+                    if sample is not None:
+                        bits.append(sample)
+                    else:
+                        try:
+                            self._walk(offset, value_end, bits, depth + 1)
+                        except (UnknownLayoutError, IndexError):
+                            pass  # text or an unknown blob
+                offset = value_end
+            else:
+                raise UnknownLayoutError(f"Unexpected wire type {wire_type}")
+        if offset != end:
+            raise UnknownLayoutError("Malformed message")
+
+    def _sample_bits(self, start, end):
+        """Return the first float32 of a sample submessage, or None if this is no sample."""
+        view = self._view
+        offset = start
+        first = None
+        try:
+            while offset < end:
+                key, offset = _read_varint_at(view, offset)
+                wire_type = key & 0x07
+                if wire_type == 5:
+                    if first is None:
+                        first = _UNPACK_U32(view, offset)[0]
+                    offset += 4
+                elif wire_type == 0:
+                    _, offset = _read_varint_at(view, offset)
+                else:
+                    return None
+        except (UnknownLayoutError, IndexError, struct.error):
+            return None
+        return first if offset == end else None
+
+
+def decode_station_day_data(blob: bytes):
+    """Decode a down_station_day_data payload; returns None for an unknown layout."""
+    try:
+        return StationDayDataDecoder(blob)
+    except (UnknownLayoutError, IndexError, struct.error) as err:
+        _LOGGER.warning("Unknown station day data layout: %s", err)
+        return None
@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+import threading
+import zlib
+
+try:
+    from .parsers import decode_module_day_data
+except ImportError:
+    from parsers import decode_module_day_data
+
+_LOGGER = logging.getLogger(__name__)
+
+# Directory under the Home Assistant config directory
+ARCHIVE_DIR = "hoymiles_nimbus_archive"
+INDEX_FILE = "index.json"
+PAYLOAD_SUFFIX = ".pb.z"
+COMPRESSION_LEVEL = 6
+
+
+class PayloadArchive:
+    """
+    On-disk archive of raw down_module_day_data payloads.
+
+    Every station day is stored zlib-compressed in <root>/<sid>/<date>.pb.z.
+    <root>/index.json lists the stored days per station with the raw and
+    stored size, a CRC32 of the payload and whether the day was complete.
+    Each day is one zlib stream that has to be inflated as a whole, so reads
+    simply load the file; a memory map would not save any copies.
+
+    All methods do blocking file I/O; call them from an executor inside
+    Home Assistant. The archive can also be opened standalone for offline
+    analysis and benchmarks.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._index = None
+
+    @property
+    def index(self):
+        """{sid: {date: {"size", "stored", "crc32", "complete"}}}"""
+        if self._index is None:
+            try:
+                with open(os.path.join(self.root, INDEX_FILE), encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                self._index = self._scan()
+            except ValueError as err:
+                _LOGGER.warning("Rebuilding unreadable payload archive index: %s", err)
+                self._index = self._scan()
+        return self._index
+
+    def path(self, sid, date):
+        return os.path.join(self.root, str(sid), f"{date}{PAYLOAD_SUFFIX}")
+
+    def write(self, sid, date, blob, complete=True):
+        """Store the payload of one station day, replacing an earlier version."""
+        blob = bytes(blob)
+        compressed = zlib.compress(blob, COMPRESSION_LEVEL)
+        path = self.path(sid, date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write_atomic(path, compressed)
+        with self._lock:
+            self.index.setdefault(str(sid), {})[date] = {
+                "size": len(blob),
+                "stored": len(compressed),
+                "crc32": zlib.crc32(blob),
+                "complete": complete,
+            }
+            self._write_atomic(os.path.join(self.root, INDEX_FILE), json.dumps(self.index, sort_keys=True).encode())
+        _LOGGER.debug("Archived %s %s: %d -> %d bytes", sid, date, len(blob), len(compressed))
+
+    def read(self, sid, date):
+        """Return the raw payload of one station day, or None when it is not archived."""
+        try:
+            with open(self.path(sid, date), "rb") as f:
+                blob = zlib.decompress(f.read())
+        except FileNotFoundError:
+            return None
+        entry = self.index.get(str(sid), {}).get(date)
+        if entry and zlib.crc32(blob) != entry["crc32"]:
+            _LOGGER.warning("Archived payload %s %s is corrupt", sid, date)
+            return None
+        return blob
+
+    def decode(self, sid, date):
+        """Decode an archived day like a fresh download (None when not archived)."""
+        blob = self.read(sid, date)
+        return None if blob is None else decode_module_day_data(blob)
+
+    def days(self, sid=None):
+        """Sorted (sid, date) pairs in the archive, optionally for one station."""
+        stations = [str(sid)] if sid is not None else sorted(self.index)
+        return [(station, date) for station in stations for date in sorted(self.index.get(station, {}))]
+
+    def iter_payloads(self, sid=None, start=None, end=None):
+        """Yield (sid, date, blob) for archived days, optionally within start..end ("YYYY-MM-DD")."""
+        for station, date in self.days(sid):
+            if (start is None or date >= start) and (end is None or date <= end):
+                blob = self.read(station, date)
+                if blob is not None:
+                    yield station, date, blob
+
+    def _scan(self):
+        """Rebuild the index from the files on disk."""
+        index = {}
+        if not os.path.isdir(self.root):
+            return index
+        for station in os.listdir(self.root):
+            folder = os.path.join(self.root, station)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if not name.endswith(PAYLOAD_SUFFIX):
+                    continue
+                with open(os.path.join(folder, name), "rb") as f:
+                    compressed = f.read()
+                blob = zlib.decompress(compressed)
+                index.setdefault(station, {})[name[:-len(PAYLOAD_SUFFIX)]] = {
+                    "size": len(blob), "stored": len(compressed), "crc32": zlib.crc32(blob), "complete": True,
+                }
+        return index
+
+    @staticmethod
+    def _write_atomic(path, data):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
@@ -0,0 +1,75 @@
+import datetime
+import logging
+
+try:
+    from .classes.station import SLOT_MINUTES, SLOT_PUBLISH_DELAY
+except ImportError:
+    from classes.station import SLOT_MINUTES, SLOT_PUBLISH_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+SLOT = datetime.timedelta(minutes=SLOT_MINUTES)
+MIN_INTERVAL = datetime.timedelta(seconds=30)
+NIGHT_INTERVAL = datetime.timedelta(minutes=30)
+RETRY_INTERVAL = datetime.timedelta(minutes=1)
+MAX_BACKOFF = datetime.timedelta(minutes=15)
+# Scheduled refreshes may fire slightly early; stay clear of the slot boundary
+SLOT_ALIGN_MARGIN = datetime.timedelta(seconds=5)
+
+
+class PollScheduler:
+    """
+    Chooses the delay until the next cloud poll.
+
+    - At night (sun below the horizon) poll every NIGHT_INTERVAL, or at
+      sunrise if that comes first.
+    - During the day poll just after the next 5-minute slot is expected to
+      be published.
+    - When downloads bring no new slot, back off exponentially from
+      RETRY_INTERVAL up to MAX_BACKOFF. Without sun data this is what slows
+      polling down after the last sample of the day. Refreshes that did not
+      download anything are not recorded and do not count as misses.
+    - Misses are forgotten at night and at sunrise, so the day starts with
+      slot-aligned polls.
+    """
+
+    def __init__(self):
+        self.last_slot = None
+        self.misses = 0
+        self._sun_up = None
+
+    def record(self, latest_slot):
+        """Record the latest slot ("HH:MM") after a download; returns True when it is new."""
+        is_new = latest_slot is not None and latest_slot != self.last_slot
+        self.misses = 0 if is_new else self.misses + 1
+        self.last_slot = latest_slot
+        return is_new
+
+    def next_interval(self, now, sun_up=None, next_sunrise=None):
+        """
+        Return the timedelta until the next poll.
+
+        now is an aware local datetime, sun_up is True/False or None when sun
+        data is unavailable and next_sunrise an aware datetime or None.
+        """
+        if sun_up is False or (sun_up and self._sun_up is False):
+            self.misses = 0
+        self._sun_up = sun_up
+        if sun_up is False:
+            interval = NIGHT_INTERVAL
+            if next_sunrise is not None:
+                interval = min(interval, next_sunrise - now)
+        elif self.misses:
+            interval = min(RETRY_INTERVAL * 2 ** (self.misses - 1), MAX_BACKOFF)
+        else:
+            interval = self._until_next_slot(now)
+        return max(interval, MIN_INTERVAL)
+
+    @staticmethod
+    def _until_next_slot(now):
+        """Time until the next slot boundary plus the cloud's publish delay."""
+        start = now.replace(minute=now.minute - now.minute % SLOT_MINUTES, second=0, microsecond=0)
+        target = start + SLOT_PUBLISH_DELAY + SLOT_ALIGN_MARGIN
+        while target - now < MIN_INTERVAL:
+            target += SLOT
+        return target - now
@@ -0,0 +1,106 @@
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Requests per second allowed towards the cloud, and the burst size
+DEFAULT_RATE_LIMIT = 5.0
+DEFAULT_RATE_BURST = 10
+# Retries after the first attempt for transient failures
+DEFAULT_MAX_RETRIES = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+# HTTP statuses worth retrying
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RetryableStatusError(Exception):
+    """The cloud answered 429 or a 5xx status; retry_after is in seconds or None."""
+
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value, now=None):
+    """Return the Retry-After header (seconds or HTTP date) as seconds, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if now is None:
+        now = time.time()
+    return max(0.0, moment.timestamp() - now)
+
+
+def backoff_delay(attempt, retry_after=None, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """
+    Delay before retry number attempt (0-based): exponential backoff with full jitter.
+
+    A Retry-After from the server is used as the lower bound.
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class _BaseTokenBucket:
+    def __init__(self, rate=DEFAULT_RATE_LIMIT, burst=DEFAULT_RATE_BURST):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def pause(self, seconds):
+        """Hold back every caller for seconds, e.g. after a 429 with Retry-After."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def _reserve(self):
+        """Take a token; returns how long the caller must wait before sending."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+
+class TokenBucket(_BaseTokenBucket):
+    """Thread-safe token bucket for HoymilesClient."""
+
+    def __init__(self, rate=DEFAULT_RATE_LIMIT, burst=DEFAULT_RATE_BURST):
+        super().__init__(rate, burst)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait for a token; returns the seconds waited."""
+        with self._lock:
+            wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class AsyncTokenBucket(_BaseTokenBucket):
+    """Token bucket for AsyncHoymilesClient, shared by all its requests."""
+
+    async def acquire(self):
+        """Wait for a token; returns the seconds waited."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
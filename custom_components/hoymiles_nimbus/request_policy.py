@@ -0,0 +1,93 @@
+import logging
+import threading
+
+try:
+    from .rate_limit import RETRY_STATUSES, RetryableStatusError, backoff_delay, parse_retry_after
+    from .token_manager import AUTH_FAILURE_HTTP_STATUSES, AuthenticationError
+except ImportError:
+    from rate_limit import RETRY_STATUSES, RetryableStatusError, backoff_delay, parse_retry_after
+    from token_manager import AUTH_FAILURE_HTTP_STATUSES, AuthenticationError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Sends of one request with a token: the first and one replay after a new login
+AUTH_ATTEMPTS = 2
+
+
+class RequestPolicy:
+    """
+    Retry and re-login decisions shared by HoymilesClient and AsyncHoymilesClient.
+
+    The clients only differ in how they send, wait and sleep. This class
+    classifies responses and errors, chooses the backoff and keeps the
+    throttled/retried/failed counters of request_stats. retryable lists the
+    transport's exceptions worth retrying (connection errors, timeouts);
+    retryable HTTP statuses are raised as RetryableStatusError by
+    check_status(). Counters are updated under a lock, as the sync client
+    sends from several threads.
+    """
+
+    def __init__(self, max_retries, limiter, stats, retryable=()):
+        self.max_retries = max_retries
+        self.limiter = limiter
+        self.stats = stats
+        self.retryable = (RetryableStatusError,) + tuple(retryable)
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        """Increment the request_stats counter name."""
+        with self._lock:
+            self.stats[name] += 1
+
+    def attempts(self):
+        """Attempt numbers (0-based) for one request: the first send plus max_retries."""
+        return range(self.max_retries + 1)
+
+    def record_wait(self, waited):
+        """Count a send the rate limiter held back; waited is what acquire() returned."""
+        if waited > 0:
+            self.count("throttled")
+
+    @staticmethod
+    def check_status(status, headers):
+        """
+        Classify an HTTP status before the body is read.
+
+        Returns True when the token was rejected. Raises RetryableStatusError
+        (with the Retry-After delay) for 429 and transient 5xx responses.
+        """
+        if status in AUTH_FAILURE_HTTP_STATUSES:
+            return True
+        if status in RETRY_STATUSES:
+            raise RetryableStatusError(status, parse_retry_after(headers.get("Retry-After")))
+        return False
+
+    def retry_delay(self, attempt, error, url):
+        """
+        Seconds to wait before retrying after error on attempt.
+
+        Re-raises error when it is not transient or no attempts are left. A
+        429 also pauses the rate limiter, holding back the other requests.
+        """
+        if not isinstance(error, self.retryable) or attempt >= self.max_retries:
+            self.count("failed")
+            raise error
+        delay = backoff_delay(attempt, getattr(error, "retry_after", None))
+        if getattr(error, "status", None) == 429:
+            self.limiter.pause(delay)
+        self.count("retried")
+        _LOGGER.info("Request to %s failed (%s), retrying in %.1fs", url, str(error) or type(error).__name__, delay)
+        return delay
+
+    @staticmethod
+    def token_rejected(tokens, token, attempt, uri):
+        """
+        Drop a token the cloud rejected on attempt (out of AUTH_ATTEMPTS).
+
+        Raises AuthenticationError when the replay with a new token was
+        rejected as well; otherwise the caller logs in again and replays.
+        """
+        tokens.invalidate(token)
+        if attempt + 1 >= AUTH_ATTEMPTS:
+            raise AuthenticationError(f"Request to {uri} rejected after re-authentication")
+        _LOGGER.info("Hoymiles token rejected, logging in again")
@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from typing import NamedTuple
+
+from cachetools import TTLCache
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CachePolicy(NamedTuple):
+    """
+    Caching rules for one endpoint.
+
+    ttl: seconds a response is fresh.
+    maxsize: number of distinct requests (e.g. station ids) kept.
+    stale_ttl: extra seconds an expired response may still be served while
+        it is refreshed in the background (stale-while-revalidate); 0 disables.
+    """
+
+    ttl: float
+    maxsize: int = 128
+    stale_ttl: float = 0
+
+
+# Real-time data expires before the shortest poll interval (30 s) and is
+# never served stale: the coordinator already keeps serving its last snapshot
+# while the cloud is slow, so each poll gets a fresh response. Topology
+# changes rarely and is kept for an hour.
+DEFAULT_CACHE_POLICIES = {
+    "count_station_real_data": CachePolicy(ttl=25, maxsize=64, stale_ttl=0),
+    "findStation": CachePolicy(ttl=25, maxsize=64, stale_ttl=0),
+    "select_by_page": CachePolicy(ttl=3600, maxsize=16, stale_ttl=3600),
+    "select_by_station": CachePolicy(ttl=3600, maxsize=256, stale_ttl=3600),
+    "micro_find": CachePolicy(ttl=3600, maxsize=1024, stale_ttl=3600),
+    "map_system": CachePolicy(ttl=3600, maxsize=1, stale_ttl=0),
+    "module_details": CachePolicy(ttl=300, maxsize=256),
+    "get_user_info": CachePolicy(ttl=300, maxsize=1),
+}
+DEFAULT_POLICY = CachePolicy(ttl=300, maxsize=100)
+
+# Endpoints grouped for the options flow
+REALTIME_ENDPOINTS = ("count_station_real_data", "findStation")
+TOPOLOGY_ENDPOINTS = ("select_by_page", "select_by_station", "micro_find", "map_system")
+
+
+def build_cache_policies(realtime_ttl=None, topology_ttl=None):
+    """Return the default policies with the TTLs configured in the options applied."""
+    policies = dict(DEFAULT_CACHE_POLICIES)
+    for endpoints, ttl in ((REALTIME_ENDPOINTS, realtime_ttl), (TOPOLOGY_ENDPOINTS, topology_ttl)):
+        if ttl is None:
+            continue
+        for endpoint in endpoints:
+            policies[endpoint] = policies[endpoint]._replace(ttl=ttl)
+    return policies
+
+
+class _EndpointCache(TTLCache):
+    """TTLCache counting entries dropped to make room (not expiries)."""
+
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+
+    def popitem(self):
+        self.evictions += 1
+        return super().popitem()
+
+
+class ResponseCache:
+    """
+    Per-client response cache with one policy per endpoint.
+
+    Entries are kept for ttl + stale_ttl; lookup() tells whether a hit is
+    still fresh. Hits, stale hits, misses and evictions are counted per
+    endpoint. The sync client uses one cache from several threads (map_system
+    workers, background revalidation), so every access takes a lock;
+    TTLCache itself is not thread-safe.
+    """
+
+    MISS = object()
+
+    def __init__(self, policies=None):
+        self.policies = dict(DEFAULT_CACHE_POLICIES)
+        if policies:
+            self.policies.update(policies)
+        self._caches = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def policy(self, endpoint):
+        return self.policies.get(endpoint, DEFAULT_POLICY)
+
+    def _cache(self, endpoint):
+        cache = self._caches.get(endpoint)
+        if cache is None:
+            policy = self.policy(endpoint)
+            cache = self._caches[endpoint] = _EndpointCache(policy.maxsize, policy.ttl + policy.stale_ttl)
+            self._stats[endpoint] = {"hits": 0, "stale_hits": 0, "misses": 0}
+        return cache
+
+    def lookup(self, endpoint, key):
+        """Return (value, fresh); value is ResponseCache.MISS when nothing is cached."""
+        with self._lock:
+            cache = self._cache(endpoint)
+            stats = self._stats[endpoint]
+            entry = cache.get(key)
+            if entry is None:
+                stats["misses"] += 1
+                return self.MISS, False
+            value, stored_at = entry
+            if time.monotonic() - stored_at < self.policy(endpoint).ttl:
+                stats["hits"] += 1
+                return value, True
+            stats["stale_hits"] += 1
+            return value, False
+
+    def store(self, endpoint, key, value):
+        with self._lock:
+            self._cache(endpoint)[key] = (value, time.monotonic())
+
+    def invalidate(self, endpoint=None, key=None):
+        """Drop one key of an endpoint, a whole endpoint, or everything."""
+        with self._lock:
+            if endpoint is None:
+                for cache in self._caches.values():
+                    cache.clear()
+                return
+            cache = self._caches.get(endpoint)
+            if cache is None:
+                return
+            if key is None:
+                cache.clear()
+            else:
+                cache.pop(key, None)
+
+    @property
+    def stats(self):
+        """Per-endpoint counters, e.g. {"findStation": {"hits": 3, ...}}."""
+        with self._lock:
+            return {
+                endpoint: {**self._stats[endpoint], "evictions": cache.evictions, "size": len(cache)}
+                for endpoint, cache in self._caches.items()
+            }
@@ -1,86 +1,37 @@
 # custom_components/hoymiles_cloud/sensor.py
 
 import logging
+from abc import ABC, abstractmethod
+
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.const import UnitOfPower, UnitOfEnergy, UnitOfElectricPotential, UnitOfElectricCurrent
-
-from .hoymiles_client import HoymilesClient
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
 from .device_registry import create_station_device_info, create_module_device_info
+from .entity import HoymilesEntity
 
 DOMAIN = "hoymiles_nimbus"
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class HoymilesSystemCoordinator:
-    """Coordinator to manage system data updates for all module sensors."""
-    
-    def __init__(self, hass, client, initial_system):
-        self._hass = hass
-        self._client = client
-        self._system = initial_system
-        self._last_update = None
-        
-    async def get_system(self):
-        """Get the current system data, updating if needed."""
-        import datetime
-        now = datetime.datetime.now()
-        
-        # Update every 30 seconds to avoid too frequent API calls
-        if (self._last_update is None or 
-            (now - self._last_update).total_seconds() > 30):
-            
-            self._system = await self._hass.async_add_executor_job(self._client.map_system)
-            await self._hass.async_add_executor_job(self._client.fill_system_data, self._system)
-            self._last_update = now
-            
-        return self._system
-    
-    def find_module(self, station_id, module_id):
-        """Find a specific module in the system."""
-        for station in self._system:
-            if station.station_id == station_id:
-                for microinverter in station.microinverters:
-                    for module in microinverter.modules:
-                        if module.id == module_id:
-                            return module
-        return None
-
-
-async def async_setup_entry(hass, config_entry, async_add_entities):
-    client = hass.data[DOMAIN][config_entry.entry_id]
-
-    # Ensure the client is authenticated
-    await hass.async_add_executor_job(client.login)
-
-    _LOGGER.warning("Fetching device data from Hoymiles S-Cloud...")
-    stations = await hass.async_add_executor_job(client.select_by_page, "station")
-
-    # Build system map with individual modules
-    system = await hass.async_add_executor_job(client.map_system)
-    await hass.async_add_executor_job(client.fill_system_data, system)
-
-    _LOGGER.warning("Found %d station(s) in Hoymiles account", len(stations))
-
+def _build_entities(coordinator, known_ids):
+    """Create sensors for stations and modules whose unique id is not in known_ids."""
     entities = []
-    
-    # Create a shared system coordinator for all module sensors
-    system_coordinator = HoymilesSystemCoordinator(hass, client, system)
-    
-    for station in stations:
+
+    for station in coordinator.stations:
         station_name = station.get('name', 'Unknown')
         sid = station.get("id")
         device_info = create_station_device_info(sid, station_name)
         name = device_info["name"]
 
-        entities.append(HoymilesStationPowerSensor(client, name, sid, device_info))
-        entities.append(HoymilesStationEnergySensor(client, name, sid, device_info))
-        entities.append(HoymilesStationRatioSensor(client, name, sid, device_info))
+        entities.append(HoymilesStationPowerSensor(coordinator, name, sid, device_info))
+        entities.append(HoymilesStationEnergySensor(coordinator, name, sid, device_info))
+        entities.append(HoymilesStationRatioSensor(coordinator, name, sid, device_info))
 
     # Add individual solar module sensors
-    for station in system:
+    for station in coordinator.system:
         station_name = station.name
-        sid = station.station_id
         station_identifier = f"hoymiles_station_{station.station_id}"
 
         for microinverter in station.microinverters:
@@ -91,46 +42,154 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
                 module_device_info = create_module_device_info(module.id, station_identifier)
                 
                 # Add power, voltage, and current sensors for each module
-                entities.append(HoymilesSolarModulePowerSensor(system_coordinator, module_name, station.station_id, module, module_device_info))
-                entities.append(HoymilesSolarModuleVoltageSensor(system_coordinator, module_name, station.station_id, module, module_device_info))
-                entities.append(HoymilesSolarModuleCurrentSensor(system_coordinator, module_name, station.station_id, module, module_device_info))
+                entities.append(HoymilesSolarModulePowerSensor(coordinator, module_name, station.station_id, module, module_device_info))
+                entities.append(HoymilesSolarModuleVoltageSensor(coordinator, module_name, station.station_id, module, module_device_info))
+                entities.append(HoymilesSolarModuleCurrentSensor(coordinator, module_name, station.station_id, module, module_device_info))
+
+    new_entities = [entity for entity in entities if entity.unique_id not in known_ids]
+    known_ids.update(entity.unique_id for entity in new_entities)
+    return new_entities
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    known_ids = set()
+    entities = _build_entities(coordinator, known_ids)
 
     _LOGGER.warning("Created %d sensors for Hoymiles devices", len(entities))
     async_add_entities(entities)
 
-class HoymilesStationPowerSensor(SensorEntity):
-    def __init__(self, client, name, sid, device_info):
-        self._client = client
+    @callback
+    def async_topology_changed():
+        """Add sensors for new modules and remove those that disappeared."""
+        new_entities = _build_entities(coordinator, known_ids)
+        if new_entities:
+            async_add_entities(new_entities)
+
+        current_ids = set()
+        _build_entities(coordinator, current_ids)
+        entity_registry = er.async_get(hass)
+        for entry in er.async_entries_for_config_entry(entity_registry, config_entry.entry_id):
+            if entry.domain == "sensor" and entry.unique_id not in current_ids:
+                _LOGGER.info("Removing sensor %s that is no longer in the Hoymiles topology", entry.entity_id)
+                entity_registry.async_remove(entry.entity_id)
+                known_ids.discard(entry.unique_id)
+
+    config_entry.async_on_unload(coordinator.async_add_topology_listener(async_topology_changed))
+
+
+class HoymilesStationSensor(HoymilesEntity, SensorEntity, ABC):
+    """Base class for station sensors fed by count_station_real_data."""
+
+    def __init__(self, coordinator, sid):
+        super().__init__(coordinator)
         self._sid = sid
-        self._attr_name = f"{name} Current Power"
-        self._attr_native_unit_of_measurement = UnitOfPower.WATT
-        self._attr_unique_id = f"hoymiles_nimbus_{sid}_power"
-        self._attr_device_class = "power"
-        self._attr_device_info = device_info
         self._state = None
 
     @property
     def native_value(self):
         return self._state
 
-    async def async_update(self):
-        # _LOGGER.debug(f"Fetching current power for station {self._sid}")
-        
-        # Fetch the current power data from the Hoymiles S-Cloud
-        data = await self.hass.async_add_executor_job(self._client.count_station_real_data, self._sid)
-        # _LOGGER.debug(f"Received power data for station {self._sid}: {data}")
-        val = data.get("data", {}).get("real_power", 0)
+    @property
+    def _real_data(self):
+        response = (self.coordinator.data or {}).get("real_data", {}).get(self._sid) or {}
+        return response.get("data", {}) or {}
+
+    @property
+    def _station_day(self):
+        """The station's day curve when it is selected as data source, else None."""
+        return (self.coordinator.data or {}).get("station_day", {}).get(self._sid)
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self._update_state()
+
+    @callback
+    def _handle_coordinator_update(self):
+        self._update_state()
+        super()._handle_coordinator_update()
+
+    @abstractmethod
+    def _update_state(self):
+        """Set self._state from the coordinator data."""
+
+
+class HoymilesSolarModuleSensor(HoymilesEntity, SensorEntity, ABC):
+    """Base class for per-module sensors reading the latest data point."""
+
+    def __init__(self, coordinator, station_id, module):
+        super().__init__(coordinator)
+        self._station_id = station_id
+        self._module_id = module.id
+        self._state = None
+
+    @property
+    def native_value(self):
+        return self._state
+
+    @property
+    def extra_state_attributes(self):
+        """Return additional state attributes."""
+        attrs = dict(super().extra_state_attributes)
+        module = self.coordinator.find_module(self._station_id, self._module_id)
+        if module:
+            attrs.update({
+                "module_id": module.id,
+                "port": module.port,
+                "position_x": module.x,
+                "position_y": module.y,
+            })
+            if module.getLatestTime():
+                attrs["last_updated"] = module.getLatestTime()
+        return attrs
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self._refresh_state()
+
+    @callback
+    def _handle_coordinator_update(self):
+        self._refresh_state()
+        super()._handle_coordinator_update()
+
+    def _refresh_state(self):
+        # Find our specific module in the updated system
+        module = self.coordinator.find_module(self._station_id, self._module_id)
+        if module:
+            self._update_state(module)
+        else:
+            # Module not found, set to 0
+            self._state = 0
+
+    @abstractmethod
+    def _update_state(self, module):
+        """Set self._state from module's latest samples."""
+
+
+class HoymilesStationPowerSensor(HoymilesStationSensor):
+    def __init__(self, coordinator, name, sid, device_info):
+        super().__init__(coordinator, sid)
+        self._attr_name = f"{name} Current Power"
+        self._attr_native_unit_of_measurement = UnitOfPower.WATT
+        self._attr_unique_id = f"hoymiles_nimbus_{sid}_power"
+        self._attr_device_class = "power"
+        self._attr_device_info = device_info
+
+    def _update_state(self):
+        if self._station_day is not None:
+            self._state = round(self._station_day.current_power, 1)
+            return
+        val = self._real_data.get("real_power", 0)
         if val is None:
             _LOGGER.warning(f"Received None value for power data for station {self._sid}")
             self._state = 0
         else:
-            # _LOGGER.debug(f" Current power for station {self._sid}: {val}")
             self._state = float(val)
         
-class HoymilesStationEnergySensor(SensorEntity):
-    def __init__(self, client, name, sid, device_info):
-        self._client = client
-        self._sid = sid
+class HoymilesStationEnergySensor(HoymilesStationSensor):
+    def __init__(self, coordinator, name, sid, device_info):
+        super().__init__(coordinator, sid)
         self._attr_name = f"{name} Daily Energy"
         self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
         self._attr_unique_id = f"hoymiles_nimbus_{sid}_energy"
@@ -138,29 +197,22 @@ class HoymilesStationEnergySensor(SensorEntity):
         self._attr_state_class = "total_increasing"
         self._attr_icon = "mdi:solar-power"
         self._attr_device_info = device_info
-        self._state = None
 
-    @property
-    def native_value(self):
-        return self._state
-
-    async def async_update(self):
-        data = await self.hass.async_add_executor_job(self._client.count_station_real_data, self._sid)
-        # _LOGGER.debug(f"Received energy data for station {self._sid}: {data}")
-        val = data.get("data", {}).get("today_eq", 0)
+    def _update_state(self):
+        if self._station_day is not None:
+            self._state = round(self._station_day.energy_kwh, 3)
+            return
+        val = self._real_data.get("today_eq", 0)
         if val is None:
             _LOGGER.warning(f"Received None value for energy data for station {self._sid}")
             self._state = 0
         else:
-            # _LOGGER.debug(f" Daily energy for station {self._sid}: {val}")
-            # Convert to kWh
             # Assuming the value is in Wh, convert to kWh
             self._state = float(val) / 1000
 
-class HoymilesStationRatioSensor(SensorEntity):
-    def __init__(self, client, name, sid, device_info):
-        self._client = client
-        self._sid = sid
+class HoymilesStationRatioSensor(HoymilesStationSensor):
+    def __init__(self, coordinator, name, sid, device_info):
+        super().__init__(coordinator, sid)
         self._attr_name = f"{name} Performance Ratio"
         self._attr_native_unit_of_measurement = "%"
         self._attr_unique_id = f"hoymiles_nimbus_{sid}_performance_ratio"
@@ -168,16 +220,11 @@ class HoymilesStationRatioSensor(SensorEntity):
         self._attr_state_class = "measurement"
         self._attr_icon = "mdi:percent"
         self._attr_device_info = device_info
-        self._state = None
 
-    @property
-    def native_value(self):
-        return self._state
-
-    async def async_update(self):
-        data = await self.hass.async_add_executor_job(self._client.count_station_real_data, self._sid)
-        capacity = data.get("data", {}).get("capacitor", 0)
-        current_power = data.get("data", {}).get("real_power", 0)
+    def _update_state(self):
+        data = self._real_data
+        capacity = data.get("capacitor", 0)
+        current_power = data.get("real_power", 0)
 
         if capacity is None:
             _LOGGER.warning(f"Received None value for capacity data for station {self._sid}")
@@ -198,11 +245,9 @@ class HoymilesStationRatioSensor(SensorEntity):
             self._state = round(ratio, 2)
         
 
-class HoymilesSolarModulePowerSensor(SensorEntity):
+class HoymilesSolarModulePowerSensor(HoymilesSolarModuleSensor):
     def __init__(self, coordinator, name, station_id, module, device_info):
-        self._coordinator = coordinator
-        self._station_id = station_id
-        self._module_id = module.id
+        super().__init__(coordinator, station_id, module)
         self._attr_name = f"{name} Power"
         self._attr_native_unit_of_measurement = UnitOfPower.WATT
         self._attr_unique_id = f"hoymiles_nimbus_module_{module.id}_power"
@@ -210,47 +255,15 @@ class HoymilesSolarModulePowerSensor(SensorEntity):
         self._attr_state_class = "measurement"
         self._attr_device_info = device_info
         self._attr_icon = "mdi:solar-panel"
-        self._state = None
 
-    @property
-    def native_value(self):
-        return self._state
+    def _update_state(self, module):
+        power = module.getCurrentPower()
+        self._state = power if power is not None else 0
 
-    @property
-    def extra_state_attributes(self):
-        """Return additional state attributes."""
-        module = self._coordinator.find_module(self._station_id, self._module_id)
-        if module:
-            attrs = {
-                "module_id": module.id,
-                "port": module.port,
-                "position_x": module.x,
-                "position_y": module.y,
-            }
-            if module.getLatestTime():
-                attrs["last_updated"] = module.getLatestTime()
-            return attrs
-        return {}
 
-    async def async_update(self):
-        # Get updated system data through coordinator
-        system = await self._coordinator.get_system()
-        
-        # Find our specific module in the updated system
-        module = self._coordinator.find_module(self._station_id, self._module_id)
-        if module:
-            power = module.getCurrentPower()
-            self._state = power if power is not None else 0
-        else:
-            # Module not found, set to 0
-            self._state = 0
-
-
-class HoymilesSolarModuleVoltageSensor(SensorEntity):
+class HoymilesSolarModuleVoltageSensor(HoymilesSolarModuleSensor):
     def __init__(self, coordinator, name, station_id, module, device_info):
-        self._coordinator = coordinator
-        self._station_id = station_id
-        self._module_id = module.id
+        super().__init__(coordinator, station_id, module)
         self._attr_name = f"{name} Voltage"
         self._attr_native_unit_of_measurement = UnitOfElectricPotential.VOLT
         self._attr_unique_id = f"hoymiles_nimbus_module_{module.id}_voltage"
@@ -258,50 +271,18 @@ class HoymilesSolarModuleVoltageSensor(SensorEntity):
         self._attr_state_class = "measurement"
         self._attr_device_info = device_info
         self._attr_icon = "mdi:flash"
-        self._state = None
 
-    @property
-    def native_value(self):
-        return self._state
-
-    @property
-    def extra_state_attributes(self):
-        """Return additional state attributes."""
-        module = self._coordinator.find_module(self._station_id, self._module_id)
-        if module:
-            attrs = {
-                "module_id": module.id,
-                "port": module.port,
-                "position_x": module.x,
-                "position_y": module.y,
-            }
-            if module.getLatestTime():
-                attrs["last_updated"] = module.getLatestTime()
-            return attrs
-        return {}
-
-    async def async_update(self):
-        # Get updated system data through coordinator
-        system = await self._coordinator.get_system()
-        
-        # Find our specific module in the updated system
-        module = self._coordinator.find_module(self._station_id, self._module_id)
-        if module:
-            latest_data_point = module.getLatestDataPoint()
-            if latest_data_point and latest_data_point.volt is not None:
-                self._state = float(latest_data_point.volt)
-            else:
-                self._state = 0
+    def _update_state(self, module):
+        latest_data_point = module.getLatestDataPoint()
+        if latest_data_point and latest_data_point.volt is not None:
+            self._state = float(latest_data_point.volt)
         else:
-            # Module not found, set to 0
             self._state = 0
 
 
-class HoymilesSolarModuleCurrentSensor(SensorEntity):
+class HoymilesSolarModuleCurrentSensor(HoymilesSolarModuleSensor):
     def __init__(self, coordinator, name, station_id, module, device_info):
-        self._coordinator = coordinator
-        self._station_id = station_id
-        self._module_id = module.id
+        super().__init__(coordinator, station_id, module)
         self._attr_name = f"{name} Current"
         self._attr_native_unit_of_measurement = UnitOfElectricCurrent.AMPERE
         self._attr_unique_id = f"hoymiles_nimbus_module_{module.id}_current"
@@ -309,40 +290,10 @@ class HoymilesSolarModuleCurrentSensor(SensorEntity):
         self._attr_state_class = "measurement"
         self._attr_device_info = device_info
         self._attr_icon = "mdi:current-ac"
-        self._state = None
 
-    @property
-    def native_value(self):
-        return self._state
-
-    @property
-    def extra_state_attributes(self):
-        """Return additional state attributes."""
-        module = self._coordinator.find_module(self._station_id, self._module_id)
-        if module:
-            attrs = {
-                "module_id": module.id,
-                "port": module.port,
-                "position_x": module.x,
-                "position_y": module.y,
-            }
-            if module.getLatestTime():
-                attrs["last_updated"] = module.getLatestTime()
-            return attrs
-        return {}
-
-    async def async_update(self):
-        # Get updated system data through coordinator
-        system = await self._coordinator.get_system()
-        
-        # Find our specific module in the updated system
-        module = self._coordinator.find_module(self._station_id, self._module_id)
-        if module:
-            latest_data_point = module.getLatestDataPoint()
-            if latest_data_point and latest_data_point.ampere is not None:
-                self._state = float(latest_data_point.ampere)
-            else:
-                self._state = 0
+    def _update_state(self, module):
+        latest_data_point = module.getLatestDataPoint()
+        if latest_data_point and latest_data_point.ampere is not None:
+            self._state = float(latest_data_point.ampere)
         else:
-            # Module not found, set to 0
             self._state = 0
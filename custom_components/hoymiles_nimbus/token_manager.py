@@ -0,0 +1,128 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Refresh the token proactively once it is this old (seconds)
+DEFAULT_TOKEN_MAX_AGE = 3600
+
+# HTTP status codes and API "status" values meaning the token was rejected
+AUTH_FAILURE_HTTP_STATUSES = (401, 403)
+AUTH_FAILURE_STATUSES = ("100",)
+
+
+class AuthenticationError(Exception):
+    """Raised when the cloud rejects the credentials or a freshly issued token."""
+
+
+def is_auth_failure(response_data):
+    """Return True when a decoded JSON response reports an invalid or expired token."""
+    return isinstance(response_data, dict) and str(response_data.get("status")) in AUTH_FAILURE_STATUSES
+
+
+def is_auth_failure_body(content):
+    """
+    Return True when a binary (protobuf) response body is a JSON auth error.
+
+    Day data payloads never start with "{", so only those bodies are decoded.
+    """
+    if not content[:1] == b"{":
+        return False
+    try:
+        return is_auth_failure(json.loads(content))
+    except ValueError:
+        return False
+
+
+class _BaseTokenManager:
+    def __init__(self, authenticate, max_age=DEFAULT_TOKEN_MAX_AGE):
+        self._authenticate = authenticate
+        self.max_age = max_age
+        self.token = None
+        self.issued_at = None
+        self.login_count = 0
+
+    @property
+    def age(self):
+        """Seconds since the current token was issued, or None without a token."""
+        if self.issued_at is None:
+            return None
+        return time.monotonic() - self.issued_at
+
+    def is_valid(self):
+        return self.token is not None and self.age < self.max_age
+
+    def invalidate(self, token=None):
+        """
+        Drop the current token after the cloud rejected it.
+
+        Pass the token that was rejected: when another caller already replaced
+        it, the new token is kept instead of triggering a second login.
+        """
+        if token is None or token == self.token:
+            self.token = None
+            self.issued_at = None
+
+    def _store(self, token):
+        self.token = token
+        self.issued_at = time.monotonic()
+        self.login_count += 1
+
+
+class TokenManager(_BaseTokenManager):
+    """
+    Thread-safe token holder for HoymilesClient.
+
+    authenticate() performs the login request and returns the new token.
+    Concurrent callers needing a token share a single login.
+    """
+
+    def __init__(self, authenticate, max_age=DEFAULT_TOKEN_MAX_AGE):
+        super().__init__(authenticate, max_age)
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return a valid token, logging in when it is missing or too old."""
+        if self.is_valid():
+            return self.token
+        with self._lock:
+            if not self.is_valid():
+                self._store(self._authenticate())
+            return self.token
+
+    def refresh(self):
+        """Force a new login and return the new token."""
+        with self._lock:
+            self._store(self._authenticate())
+            return self.token
+
+
+class AsyncTokenManager(_BaseTokenManager):
+    """
+    Token holder for AsyncHoymilesClient.
+
+    authenticate is a coroutine function returning the new token. Callers
+    waiting for a token while a login is in flight reuse its result.
+    """
+
+    def __init__(self, authenticate, max_age=DEFAULT_TOKEN_MAX_AGE):
+        super().__init__(authenticate, max_age)
+        self._lock = asyncio.Lock()
+
+    async def get(self):
+        """Return a valid token, logging in when it is missing or too old."""
+        if self.is_valid():
+            return self.token
+        async with self._lock:
+            if not self.is_valid():
+                self._store(await self._authenticate())
+            return self.token
+
+    async def refresh(self):
+        """Force a new login and return the new token."""
+        async with self._lock:
+            self._store(await self._authenticate())
+            return self.token
@@ -0,0 +1,64 @@
+"""Persistent cache of the discovered system topology."""
+from __future__ import annotations
+
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .classes.station import Station
+from .classes.system import System
+
+DOMAIN = "hoymiles_nimbus"
+STORAGE_VERSION = 1
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def topology_to_dict(stations: list[dict], system: list[Station]) -> dict:
+    """Serialize the station list and the map_system hierarchy."""
+    return {
+        "stations": [{"id": s.get("id"), "name": s.get("name")} for s in stations],
+        "system": [station.to_dict() for station in system],
+    }
+
+
+class TopologyCache:
+    """
+    Stores the result of map_system per config entry.
+
+    Only layout is persisted (station/microinverter ids, serials, ports and
+    x/y positions); measurements are always fetched from the cloud.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.topology")
+        self._data: dict | None = None
+
+    async def async_load(self) -> tuple[list[dict], System] | None:
+        """Return (stations, system) from disk, or None when nothing is cached."""
+        if self._data is None:
+            self._data = await self._store.async_load()
+        if not self._data:
+            return None
+        try:
+            stations = list(self._data["stations"])
+            system = System(Station.from_dict(item) for item in self._data["system"])
+        except (KeyError, TypeError) as err:
+            _LOGGER.warning("Ignoring unreadable topology cache: %s", err)
+            return None
+        return stations, system
+
+    async def async_update(self, stations: list[dict], system: list[Station]) -> bool:
+        """Persist the topology; return True when it differs from the cached one."""
+        data = topology_to_dict(stations, system)
+        if data == self._data:
+            return False
+        self._data = data
+        await self._store.async_save(data)
+        return True
+
+    async def async_remove(self) -> None:
+        """Delete the cache file."""
+        self._data = None
+        await self._store.async_remove()
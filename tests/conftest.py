@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+# The integration modules support standalone imports; no Home Assistant needed
+sys.path.insert(0, os.path.join(ROOT, "custom_components", "hoymiles_nimbus"))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from fake_cloud import FakeCloud, start_in_thread  # noqa: E402
+
+
+@pytest.fixture
+def fake_cloud():
+    """
+    Start FakeCloud servers: fake_cloud(**options) returns (cloud, base_url).
+
+    Pass cloud= to serve an already built (e.g. subclassed) FakeCloud.
+    """
+    servers = []
+
+    def start(cloud=None, **options):
+        cloud = cloud or FakeCloud(**options)
+        server, base_url = start_in_thread(cloud)
+        servers.append(server)
+        return cloud, base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
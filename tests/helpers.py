@@ -0,0 +1,18 @@
+import fleet
+
+SID = 100000
+DATE = "2026-06-21"
+
+
+def build_station(sid=SID, micros=2, ports=2):
+    """A small station matching generate_module_day_data(sid, ..., micros, ports, ...)."""
+    return fleet.build_station(sid, micros, ports)
+
+
+def samples(station):
+    """{module id: (minutes, volt, ampere, watt)} for comparing filled models."""
+    return {
+        module.id: (list(module.minutes), list(module.volt), list(module.ampere), list(module.watt))
+        for micro in station.microinverters
+        for module in micro.modules
+    }
@@ -0,0 +1,65 @@
+import asyncio
+import datetime
+import math
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.exceptions import ServiceValidationError  # noqa: E402
+
+from custom_components.hoymiles_nimbus.backfill import BackfillJob, _day_statistics, hourly_statistics  # noqa: E402
+from helpers import SID, build_station, samples  # noqa: E402
+from hoymiles_client import HoymilesClient  # noqa: E402
+
+DAY = datetime.date(2026, 6, 21)
+
+
+def test_day_statistics_leave_the_live_station_alone(fake_cloud):
+    _, base_url = fake_cloud(micros=2, ports=2)
+    client = HoymilesClient("user", "secret", base_url)
+    payload = client.down_module_day_data(SID, DAY.isoformat())
+    client.close()
+
+    station = build_station()
+    modules = _day_statistics(station, DAY, payload)
+    assert all(not minutes for minutes, *_ in samples(station).values())
+    assert len(modules) == 4
+
+    module, rows = modules[0]
+    watts = [watt for watt in module.watt if not math.isnan(watt)]
+    assert [row[0] for row in rows] == sorted({minute // 60 for minute in module.minutes})
+    assert sum(row[4] for row in rows) == pytest.approx(sum(watts) * 5 / 60 / 1000)
+    assert all(low <= mean <= high for _, mean, low, high, _ in rows)
+    assert rows == hourly_statistics(module)
+
+
+def check_range(tmp_path, done, start, end):
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        try:
+            job = BackfillJob(hass, "entry", client=None, system=[build_station()])
+            await job._store.async_save({"done": {str(SID): done}, "sums": {}})
+            job._checkpoint = None
+            await job.async_check_range(start, end)
+        finally:
+            await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+def test_range_may_only_add_later_days(tmp_path):
+    done = ["2026-06-20", "2026-06-21"]
+    check_range(tmp_path, done, DAY, DAY + datetime.timedelta(days=3))
+    with pytest.raises(ServiceValidationError):
+        check_range(tmp_path, done, DAY - datetime.timedelta(days=5), DAY)
+
+
+def test_reversed_range_is_rejected(tmp_path):
+    with pytest.raises(ServiceValidationError):
+        check_range(tmp_path, [], DAY, DAY - datetime.timedelta(days=1))
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+import commands
+from async_hoymiles_client import AsyncHoymilesClient
+from commands import PowerLimitQueue
+from fake_cloud import FakeCloud
+
+SID, OTHER = 100000, 100001
+
+
+class IgnoringCloud(FakeCloud):
+    """FakeCloud accepting power limit writes without applying them."""
+
+    def _api_command_put(self, payload):
+        return self._ok({})
+
+
+@pytest.fixture(autouse=True)
+def short_delays(monkeypatch):
+    monkeypatch.setattr(commands, "COMMAND_BATCH_DELAY", 0.05)
+    monkeypatch.setattr(commands, "CONFIRM_DELAYS", (0.1, 0.2))
+
+
+def run_queue(base_url, scenario, write_interval=0.0):
+    """Run scenario(queue) against base_url; returns (queue, batch completion times)."""
+    batches = []
+
+    async def main():
+        client = AsyncHoymilesClient("user", "secret", base_url)
+
+        async def batch_done():
+            batches.append(time.monotonic())
+
+        queue = PowerLimitQueue(client, write_interval=write_interval, on_batch_done=batch_done)
+        try:
+            await scenario(queue)
+            while queue._tasks or queue._timer is not None:
+                await asyncio.sleep(0.02)
+        finally:
+            queue.close()
+            await client.close()
+        return queue
+
+    return asyncio.run(main()), batches
+
+
+def test_latest_value_is_written_once_and_confirmed(fake_cloud):
+    cloud, base_url = fake_cloud()
+
+    async def scenario(queue):
+        queue.submit(SID, 30)
+        queue.submit(SID, 40)
+        assert queue.pending_value(SID) == 40
+
+    queue, batches = run_queue(base_url, scenario)
+    assert cloud.stats["command_put"] == 1
+    assert cloud._power_limits[SID] == 40
+    assert queue.results[SID]["value"] == 40 and queue.results[SID]["confirmed"]
+    assert len(batches) == 1
+
+
+def test_stations_are_written_in_one_batch(fake_cloud):
+    cloud, base_url = fake_cloud()
+
+    async def scenario(queue):
+        queue.submit(SID, 30)
+        queue.submit(OTHER, 60)
+
+    queue, batches = run_queue(base_url, scenario)
+    assert cloud.stats["command_put"] == 2
+    assert {sid: result["confirmed"] for sid, result in queue.results.items()} == {SID: True, OTHER: True}
+    assert len(batches) == 1
+
+
+def test_station_waits_for_its_cooldown_but_not_for_others(fake_cloud):
+    cloud, base_url = fake_cloud()
+    written = {}
+
+    async def scenario(queue):
+        started = time.monotonic()
+        queue.submit(SID, 30)
+        await asyncio.sleep(0.1)  # first write sent
+        queue.submit(SID, 50)
+        queue.submit(OTHER, 60)
+        while len(cloud._power_limits) < 2:
+            await asyncio.sleep(0.01)
+        written[OTHER] = time.monotonic() - started
+        while cloud._power_limits.get(SID) != 50:
+            await asyncio.sleep(0.01)
+        written[SID] = time.monotonic() - started
+
+    run_queue(base_url, scenario, write_interval=0.6)
+    assert written[OTHER] < 0.4
+    assert written[SID] >= 0.6
+    assert cloud.stats["command_put"] == 3
+
+
+def test_superseded_write_is_not_reported_as_failed(fake_cloud, caplog):
+    cloud, base_url = fake_cloud()
+
+    async def scenario(queue):
+        queue.submit(SID, 30)
+        await asyncio.sleep(0.1)  # written, now being confirmed
+        queue.submit(SID, 50)
+
+    with caplog.at_level(logging.WARNING, logger="commands"):
+        queue, _ = run_queue(base_url, scenario, write_interval=0.3)
+    assert not caplog.records
+    assert queue.results[SID]["value"] == 50 and queue.results[SID]["confirmed"]
+
+
+def test_unconfirmed_write_is_reported(fake_cloud, caplog):
+    cloud, base_url = fake_cloud(IgnoringCloud())
+
+    async def scenario(queue):
+        queue.submit(SID, 30)
+
+    with caplog.at_level(logging.WARNING, logger="commands"):
+        queue, _ = run_queue(base_url, scenario)
+    assert queue.results[SID] == {**queue.results[SID], "value": 30, "confirmed": False}
+    assert "did not report power limit 30%" in caplog.text
+    assert cloud.stats["find"] == len(commands.CONFIRM_DELAYS)
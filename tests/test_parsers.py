@@ -0,0 +1,50 @@
+import pytest
+
+from helpers import DATE, SID
+from parsers import ModuleDayDataDecoder, ProtobufParser, UnknownLayoutError, decode_module_day_data
+from payload_generator import generate_module_day_data
+
+
+@pytest.mark.parametrize("micros, ports, slots", [(1, 1, 1), (2, 4, 12), (5, 2, 204), (4, 4, 100)])
+def test_decoder_matches_generic_parser(micros, ports, slots):
+    # Seed 1 has no sample whose bytes happen to be printable, see below
+    blob = generate_module_day_data(SID, DATE, micros, ports, slots, seed=1)
+    decoded = ModuleDayDataDecoder(blob)
+    assert decoded.get_compact() == ProtobufParser(blob).get_compact()
+    assert list(decoded.iter_compact()) == list(ProtobufParser(blob, lazy=True).iter_compact())
+    assert (decoded.id, decoded.date) == (SID, DATE)
+
+
+def test_decoder_keeps_samples_the_generic_parser_reads_as_text():
+    # ProtobufParser guesses from the bytes: a sample that is valid printable
+    # UTF-8 becomes a string, an empty sample list an empty string
+    blob = generate_module_day_data(SID, DATE, 2, 4, 12, seed=3)
+    decoded, generic = ModuleDayDataDecoder(blob).get_compact(), ProtobufParser(blob).get_compact()
+    assert isinstance(generic[3][1][16][1][2], str)
+    assert all(isinstance(value, int) for value in decoded[3][1][16][1][2])
+
+    blob = generate_module_day_data(SID, DATE, 1, 1, 0)
+    assert ModuleDayDataDecoder(blob).get_compact()[2][1][1] == [1, []]
+    assert ProtobufParser(blob).get_compact()[2][1][1] == [1, ""]
+
+
+@pytest.mark.parametrize("cut", [3, 40])
+def test_truncated_payload_falls_back(cut):
+    blob = generate_module_day_data(SID, DATE, 2, 2, 6)[:-cut]
+    with pytest.raises((UnknownLayoutError, IndexError)):
+        ModuleDayDataDecoder(blob)
+    decoded = decode_module_day_data(blob)
+    assert isinstance(decoded, ProtobufParser)
+    assert decoded.get_compact()[:2] == [SID, DATE]
+
+
+def test_unknown_layout_falls_back():
+    # A trailing fixed64 field is not part of the known layout
+    blob = generate_module_day_data(SID, DATE, 2, 2, 6) + bytes([0x21]) + bytes(8)
+    decoded = decode_module_day_data(blob)
+    assert isinstance(decoded, ProtobufParser)
+    assert decoded.get_compact() == ProtobufParser(blob).get_compact()
+
+
+def test_known_layout_uses_decoder():
+    assert isinstance(decode_module_day_data(generate_module_day_data(SID, DATE, 1, 2, 3)), ModuleDayDataDecoder)
@@ -0,0 +1,76 @@
+import zlib
+
+from hoymiles_client import HoymilesClient
+from parsers import decode_module_day_data
+from payload_archive import INDEX_FILE, PayloadArchive
+
+SID = 100000
+DAYS = ["2026-06-19", "2026-06-20", "2026-06-21"]
+
+
+def download(fake_cloud):
+    """{date: raw payload} of station SID as delivered to fill_system_data's on_payload."""
+    _, base_url = fake_cloud(stations=1, micros=2, ports=2)
+    client = HoymilesClient("user", "secret", base_url)
+    system = client.map_system()
+    payloads = {}
+    for day in DAYS:
+        client.fill_system_data(system, date=day,
+                                on_payload=lambda sid, date, data: payloads.__setitem__(date, bytes(data.original)))
+    client.close()
+    return payloads
+
+
+def test_round_trip(fake_cloud, tmp_path):
+    payloads = download(fake_cloud)
+    archive = PayloadArchive(str(tmp_path))
+    for day, blob in payloads.items():
+        archive.write(SID, day, blob, complete=day != DAYS[-1])
+
+    assert archive.days() == [(str(SID), day) for day in DAYS]
+    for day, blob in payloads.items():
+        assert archive.read(SID, day) == blob
+        entry = archive.index[str(SID)][day]
+        assert entry["size"] == len(blob) and entry["stored"] < len(blob)
+        assert entry["crc32"] == zlib.crc32(blob)
+    assert [archive.index[str(SID)][day]["complete"] for day in DAYS] == [True, True, False]
+    assert archive.decode(SID, DAYS[0]).get_compact() == decode_module_day_data(payloads[DAYS[0]]).get_compact()
+    assert archive.read(SID, "2026-01-01") is None
+
+
+def test_iter_payloads_filters_the_range(fake_cloud, tmp_path):
+    payloads = download(fake_cloud)
+    archive = PayloadArchive(str(tmp_path))
+    for day, blob in payloads.items():
+        archive.write(SID, day, blob)
+    assert [date for _, date, _ in archive.iter_payloads(start=DAYS[1])] == DAYS[1:]
+    assert [blob for _, _, blob in archive.iter_payloads(SID, end=DAYS[0])] == [payloads[DAYS[0]]]
+
+
+def test_index_is_rebuilt_from_the_files(fake_cloud, tmp_path, caplog):
+    payloads = download(fake_cloud)
+    archive = PayloadArchive(str(tmp_path))
+    for day, blob in payloads.items():
+        archive.write(SID, day, blob)
+    index = archive.index
+
+    (tmp_path / INDEX_FILE).unlink()
+    rebuilt = PayloadArchive(str(tmp_path)).index
+    assert {day: entry["crc32"] for day, entry in rebuilt[str(SID)].items()} == {
+        day: entry["crc32"] for day, entry in index[str(SID)].items()
+    }
+
+    (tmp_path / INDEX_FILE).write_text("{not json")
+    assert PayloadArchive(str(tmp_path)).days(SID) == [(str(SID), day) for day in DAYS]
+    assert "Rebuilding unreadable payload archive index" in caplog.text
+
+
+def test_corrupt_payload_is_not_returned(fake_cloud, tmp_path, caplog):
+    payloads = download(fake_cloud)
+    archive = PayloadArchive(str(tmp_path))
+    archive.write(SID, DAYS[0], payloads[DAYS[0]])
+    # Valid zlib data, but not the payload the index describes
+    with open(archive.path(SID, DAYS[0]), "wb") as f:
+        f.write(zlib.compress(payloads[DAYS[0]][:-1]))
+    assert archive.read(SID, DAYS[0]) is None
+    assert "is corrupt" in caplog.text
@@ -0,0 +1,52 @@
+import datetime
+
+from polling import MAX_BACKOFF, MIN_INTERVAL, NIGHT_INTERVAL, RETRY_INTERVAL, PollScheduler
+
+TZ = datetime.timezone(datetime.timedelta(hours=2))
+
+
+def at(hour, minute, second=0):
+    return datetime.datetime(2026, 6, 21, hour, minute, second, tzinfo=TZ)
+
+
+def test_polls_after_next_slot_is_published():
+    scheduler = PollScheduler()
+    assert scheduler.record("12:00")
+    # Slot 12:05 is published at 12:06, polled with a 5 s margin
+    assert scheduler.next_interval(at(12, 2), sun_up=True) == datetime.timedelta(minutes=4, seconds=5)
+    assert scheduler.next_interval(at(12, 5, 50), sun_up=True) >= MIN_INTERVAL
+
+
+def test_backs_off_without_new_slots():
+    scheduler = PollScheduler()
+    scheduler.record("12:00")
+    intervals = []
+    for _ in range(8):
+        scheduler.record("12:00")
+        intervals.append(scheduler.next_interval(at(12, 2), sun_up=True))
+    assert intervals[0] == RETRY_INTERVAL
+    assert intervals[1] == 2 * RETRY_INTERVAL
+    assert intervals[-1] == MAX_BACKOFF
+    assert scheduler.record("12:05") and scheduler.misses == 0
+
+
+def test_night_interval_stops_at_sunrise():
+    scheduler = PollScheduler()
+    assert scheduler.next_interval(at(1, 0), sun_up=False) == NIGHT_INTERVAL
+    assert scheduler.next_interval(at(5, 0), sun_up=False, next_sunrise=at(5, 10)) == datetime.timedelta(minutes=10)
+    assert scheduler.next_interval(at(5, 0), sun_up=False, next_sunrise=at(5, 0, 5)) == MIN_INTERVAL
+
+
+def test_misses_reset_at_night_and_sunrise():
+    scheduler = PollScheduler()
+    for _ in range(6):
+        scheduler.record(None)
+    assert scheduler.next_interval(at(21, 0), sun_up=None) == MAX_BACKOFF
+    scheduler.next_interval(at(22, 0), sun_up=False)
+    assert scheduler.misses == 0
+
+    for _ in range(3):
+        scheduler.record(None)
+    # The first poll after sunrise is slot-aligned again
+    assert scheduler.next_interval(at(5, 2), sun_up=True) == datetime.timedelta(minutes=4, seconds=5)
+    assert scheduler.misses == 0
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+import request_policy
+from async_hoymiles_client import AsyncHoymilesClient
+from fake_cloud import FakeCloud
+from hoymiles_client import HoymilesClient
+from rate_limit import RetryableStatusError, TokenBucket, backoff_delay, parse_retry_after
+from request_policy import RequestPolicy
+
+SID = 100000
+
+
+class FlakyCloud(FakeCloud):
+    """FakeCloud answering the first failures count_station_data requests with status."""
+
+    def __init__(self, failures, status=500, retry_after=None, **options):
+        super().__init__(**options)
+        self.failures = failures
+        self.status = status
+        self.retry_header = retry_after
+
+    def handle(self, path, body, headers):
+        if path.endswith("count_station_real_data") and self.failures > 0:
+            self.failures -= 1
+            self.stats["count_station_data"] = self.stats.get("count_station_data", 0) + 1
+            extra = {"Retry-After": self.retry_header} if self.retry_header is not None else {}
+            return self.status, extra, b""
+        return super().handle(path, body, headers)
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    """Keep the exponential backoff shape, scaled down to milliseconds."""
+    monkeypatch.setattr(request_policy, "backoff_delay",
+                        lambda attempt, retry_after=None: backoff_delay(attempt, retry_after, base=0.01))
+
+
+def policy(max_retries=2):
+    stats = {"throttled": 0, "retried": 0, "failed": 0}
+    return RequestPolicy(max_retries, TokenBucket(1000, 1000), stats, retryable=(ConnectionError,)), stats
+
+
+def test_backoff_is_jittered_and_respects_retry_after():
+    for attempt in range(6):
+        assert 0 <= backoff_delay(attempt) <= min(30.0, 2 ** attempt)
+    assert backoff_delay(0, retry_after=5) >= 5
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Thu, 01 Jan 1970 00:01:40 GMT", now=40) == 60.0
+    assert parse_retry_after("soon") is None
+
+
+def test_check_status_classifies_responses():
+    assert RequestPolicy.check_status(401, {}) is True
+    assert RequestPolicy.check_status(200, {}) is False
+    with pytest.raises(RetryableStatusError) as raised:
+        RequestPolicy.check_status(503, {"Retry-After": "3"})
+    assert (raised.value.status, raised.value.retry_after) == (503, 3.0)
+
+
+def test_retry_delay_counts_and_gives_up():
+    rules, stats = policy(max_retries=2)
+    assert rules.retry_delay(0, ConnectionError("reset"), "url") >= 0
+    assert rules.retry_delay(1, RetryableStatusError(500), "url") >= 0
+    with pytest.raises(RetryableStatusError):
+        rules.retry_delay(2, RetryableStatusError(500), "url")
+    with pytest.raises(ValueError):
+        rules.retry_delay(0, ValueError("not transient"), "url")
+    assert stats == {"throttled": 0, "retried": 2, "failed": 2}
+
+
+def test_throttling_pauses_the_limiter():
+    rules, _ = policy()
+    rules.retry_delay(0, RetryableStatusError(429, retry_after=0.5), "url")
+    assert rules.limiter.blocked_until - time.monotonic() > 0.4
+
+
+def test_transient_errors_are_retried(fake_cloud, caplog):
+    cloud, base_url = fake_cloud(FlakyCloud(failures=2))
+    client = HoymilesClient("user", "secret", base_url)
+    with caplog.at_level(logging.INFO):
+        assert client.count_station_real_data(SID)["status"] == "0"
+    assert cloud.stats["count_station_data"] == 3
+    assert client.request_stats["retried"] == 2 and client.request_stats["failed"] == 0
+    # Retried statuses are logged by the retry loop only, never as errors
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+    client.close()
+
+
+def test_retries_are_bounded(fake_cloud):
+    cloud, base_url = fake_cloud(FlakyCloud(failures=10, status=503))
+    client = HoymilesClient("user", "secret", base_url, max_retries=2)
+    with pytest.raises(RetryableStatusError):
+        client.count_station_real_data(SID)
+    assert cloud.stats["count_station_data"] == 3
+    assert client.request_stats["retried"] == 2 and client.request_stats["failed"] == 1
+    client.close()
+
+
+def test_retry_after_holds_back_the_retry(fake_cloud):
+    cloud, base_url = fake_cloud(FlakyCloud(failures=1, status=429, retry_after="0.3"))
+    client = HoymilesClient("user", "secret", base_url)
+    client.login()
+    started = time.monotonic()
+    client.count_station_real_data(SID)
+    assert time.monotonic() - started >= 0.3
+    assert cloud.stats["count_station_data"] == 2
+    client.close()
+
+
+def test_async_client_retries_the_same_way(fake_cloud):
+    cloud, base_url = fake_cloud(FlakyCloud(failures=2))
+
+    async def run():
+        client = AsyncHoymilesClient("user", "secret", base_url)
+        try:
+            assert (await client.count_station_real_data(SID))["status"] == "0"
+            return dict(client.request_stats)
+        finally:
+            await client.close()
+
+    stats = asyncio.run(run())
+    assert cloud.stats["count_station_data"] == 3
+    assert stats["retried"] == 2 and stats["failed"] == 0
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+from async_hoymiles_client import AsyncHoymilesClient
+from hoymiles_client import HoymilesClient
+from response_cache import (
+    DEFAULT_CACHE_POLICIES, REALTIME_ENDPOINTS, TOPOLOGY_ENDPOINTS, CachePolicy, ResponseCache, build_cache_policies,
+)
+
+SID = 100000
+
+
+def test_concurrent_access_keeps_the_counters():
+    cache = ResponseCache({"micro_find": CachePolicy(ttl=60, maxsize=8)})
+    threads, rounds = 8, 2000
+
+    def worker(offset):
+        for i in range(rounds):
+            key = (offset + i) % 32
+            cache.lookup("micro_find", key)
+            cache.store("micro_find", key, i)
+            if i % 100 == 0:
+                cache.invalidate("micro_find", key)
+
+    workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    stats = cache.stats["micro_find"]
+    assert stats["hits"] + stats["stale_hits"] + stats["misses"] == threads * rounds
+    assert stats["size"] <= 8
+
+
+def test_build_cache_policies_applies_the_option_ttls():
+    policies = build_cache_policies(realtime_ttl=10, topology_ttl=600)
+    assert all(policies[endpoint].ttl == 10 for endpoint in REALTIME_ENDPOINTS)
+    assert all(policies[endpoint].ttl == 600 for endpoint in TOPOLOGY_ENDPOINTS)
+    assert policies["select_by_station"].stale_ttl == DEFAULT_CACHE_POLICIES["select_by_station"].stale_ttl
+    # Real-time data is never served stale, see the coordinator's own snapshot
+    assert all(DEFAULT_CACHE_POLICIES[endpoint].stale_ttl == 0 for endpoint in REALTIME_ENDPOINTS)
+
+
+def test_evictions_are_counted():
+    cache = ResponseCache({"micro_find": CachePolicy(ttl=60, maxsize=2)})
+    for key in range(5):
+        cache.store("micro_find", key, key)
+    assert cache.stats["micro_find"]["evictions"] == 3
+    assert cache.lookup("micro_find", 0) == (ResponseCache.MISS, False)
+    assert cache.lookup("micro_find", 4) == (4, True)
+
+
+def test_fresh_responses_are_served_from_the_cache(fake_cloud):
+    cloud, base_url = fake_cloud()
+    client = HoymilesClient("user", "secret", base_url)
+    for _ in range(3):
+        client.findStation(SID)
+    assert cloud.stats["find"] == 1
+    assert client.cache.stats["findStation"]["hits"] == 2
+    client.close()
+
+
+def test_expired_realtime_response_is_fetched_again(fake_cloud):
+    cloud, base_url = fake_cloud()
+    client = HoymilesClient("user", "secret", base_url,
+                            cache_policies={"findStation": CachePolicy(ttl=0.1, stale_ttl=0)})
+    client.findStation(SID)
+    time.sleep(0.15)
+    client.findStation(SID)
+    assert cloud.stats["find"] == 2
+    assert client.cache.stats["findStation"]["stale_hits"] == 0
+    client.close()
+
+
+def test_stale_topology_is_served_while_it_is_refreshed(fake_cloud):
+    cloud, base_url = fake_cloud()
+    client = HoymilesClient("user", "secret", base_url,
+                            cache_policies={"select_by_station": CachePolicy(ttl=0.1, stale_ttl=60)})
+    first = client.select_by_station(SID)
+    time.sleep(0.15)
+    assert client.select_by_station(SID) == first
+    assert client.cache.stats["select_by_station"]["stale_hits"] == 1
+    deadline = time.monotonic() + 5
+    while cloud.stats["select_by_station"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cloud.stats["select_by_station"] == 2
+    client.close()
+
+
+def test_power_limit_write_invalidates_the_station_config(fake_cloud):
+    cloud, base_url = fake_cloud()
+    client = HoymilesClient("user", "secret", base_url)
+    assert client.findStation(SID)["config"]["power_limit"] == 100
+    client.set_power_limit(SID, 40)
+    assert client.findStation(SID)["config"]["power_limit"] == 40
+    assert cloud.stats["find"] == 2
+    client.close()
+
+
+def test_async_client_uses_the_same_policies(fake_cloud):
+    cloud, base_url = fake_cloud()
+
+    async def run():
+        client = AsyncHoymilesClient("user", "secret", base_url,
+                                     cache_policies={"findStation": CachePolicy(ttl=0.1, stale_ttl=0)})
+        try:
+            await client.findStation(SID)
+            await client.findStation(SID)
+            await asyncio.sleep(0.15)
+            await client.findStation(SID)
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+    assert cloud.stats["find"] == 2
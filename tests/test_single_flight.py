@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from async_hoymiles_client import AsyncHoymilesClient
+from fake_cloud import FakeCloud
+from hoymiles_client import HoymilesClient
+from rate_limit import RetryableStatusError
+
+SID = 100000
+DATE = "2026-06-21"
+CALLERS = 8
+
+
+class SlowCloud(FakeCloud):
+    """FakeCloud answering day data after a fixed delay, so concurrent calls overlap."""
+
+    delay = 0.3
+
+    def handle(self, path, body, headers):
+        if "down_module_day_data" in path:
+            time.sleep(self.delay)
+        return super().handle(path, body, headers)
+
+
+def call_concurrently(func):
+    results, errors = [], []
+    barrier = threading.Barrier(CALLERS)
+
+    def run():
+        barrier.wait()
+        try:
+            results.append(func())
+        except Exception as err:  # pylint: disable=broad-except
+            errors.append(err)
+
+    threads = [threading.Thread(target=run) for _ in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_identical_requests_are_sent_once(fake_cloud):
+    cloud, base_url = fake_cloud(SlowCloud())
+    client = HoymilesClient("user", "secret", base_url)
+    client.login()
+    results, errors = call_concurrently(lambda: client.down_module_day_data(SID, DATE))
+    assert not errors and len(results) == CALLERS
+    assert all(result is results[0] for result in results)
+    assert cloud.stats["down_module_day_data"] == 1
+    assert client.request_stats["coalesced"] == CALLERS - 1
+    client.close()
+
+
+def test_waiters_get_the_error_of_the_shared_request(fake_cloud):
+    cloud, base_url = fake_cloud(SlowCloud())
+    client = HoymilesClient("user", "secret", base_url, max_retries=0)
+    client.login()
+    cloud.error_rate = 1.0
+    results, errors = call_concurrently(lambda: client.down_module_day_data(SID, DATE))
+    assert not results and len(errors) == CALLERS
+    assert all(isinstance(err, RetryableStatusError) for err in errors)
+    assert cloud.stats["down_module_day_data"] == 1
+    client.close()
+
+
+def test_different_requests_are_not_coalesced(fake_cloud):
+    cloud, base_url = fake_cloud(SlowCloud())
+    client = HoymilesClient("user", "secret", base_url)
+    client.login()
+    dates = iter(["2026-06-20", "2026-06-21"] * (CALLERS // 2))
+    lock = threading.Lock()
+
+    def fetch():
+        with lock:
+            date = next(dates)
+        return client.down_module_day_data(SID, date)
+
+    results, errors = call_concurrently(fetch)
+    assert not errors
+    assert cloud.stats["down_module_day_data"] == 2
+    assert {result.date for result in results} == {"2026-06-20", "2026-06-21"}
+    client.close()
+
+
+def test_async_identical_requests_are_sent_once(fake_cloud):
+    cloud, base_url = fake_cloud(SlowCloud())
+
+    async def run():
+        client = AsyncHoymilesClient("user", "secret", base_url)
+        try:
+            await client.login()
+            results = await asyncio.gather(*(client.down_module_day_data(SID, DATE) for _ in range(CALLERS)))
+            return results, client.request_stats["coalesced"]
+        finally:
+            await client.close()
+
+    results, coalesced = asyncio.run(run())
+    assert all(result is results[0] for result in results)
+    assert coalesced == CALLERS - 1
+    assert cloud.stats["down_module_day_data"] == 1
+
+
+def test_async_cancelled_caller_does_not_cancel_the_others(fake_cloud):
+    cloud, base_url = fake_cloud(SlowCloud())
+
+    async def run():
+        client = AsyncHoymilesClient("user", "secret", base_url)
+        try:
+            await client.login()
+            first = asyncio.ensure_future(client.down_module_day_data(SID, DATE))
+            second = asyncio.ensure_future(client.down_module_day_data(SID, DATE))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+        finally:
+            await client.close()
+
+    assert asyncio.run(run()).id == SID
+    assert cloud.stats["down_module_day_data"] == 1
@@ -0,0 +1,82 @@
+import datetime
+
+from helpers import DATE, SID, build_station, samples
+from parsers import ProtobufParser, StationDayDataDecoder, decode_module_day_data
+from payload_generator import generate_module_day_data, generate_station_day_data
+
+
+def payload(slots):
+    return decode_module_day_data(generate_module_day_data(SID, DATE, 2, 2, slots, seed=1))
+
+
+def test_set_data_fills_modules():
+    station = build_station()
+    station.set_data(payload(12))
+    module = station.microinverters[1].modules[0]
+    assert len(module.watt) == 12
+    assert module.getLatestTime() == "05:55"
+    assert (station.data_date, station.last_slot) == (DATE, "05:55")
+
+
+def test_incremental_matches_full_reload():
+    incremental = build_station()
+    for slots in (10, 14, 14, 30):
+        incremental.set_data(payload(slots), incremental=True, date=DATE)
+    full = build_station()
+    full.set_data(payload(30), date=DATE)
+    assert samples(incremental) == samples(full)
+    assert incremental.last_slot == full.last_slot
+
+
+def test_incremental_new_date_reloads():
+    station = build_station()
+    station.set_data(payload(20), incremental=True, date="2026-06-20")
+    station.set_data(payload(5), incremental=True, date=DATE)
+    assert all(len(minutes) == 5 for minutes, *_ in samples(station).values())
+
+
+def test_generic_parser_fills_the_same_model():
+    blob = generate_module_day_data(SID, DATE, 2, 2, 24)
+    decoded, generic = build_station(), build_station()
+    decoded.set_data(decode_module_day_data(blob))
+    generic.set_data(ProtobufParser(blob, lazy=True))
+    assert samples(decoded) == samples(generic)
+
+
+def test_needs_refresh_waits_for_next_slot():
+    station = build_station()
+    station.set_data(payload(12), date=DATE)  # last slot 05:55
+    tz = datetime.timezone(datetime.timedelta(hours=2))
+    assert not station.needs_refresh(DATE, datetime.datetime(2026, 6, 21, 6, 0, tzinfo=tz))
+    assert station.needs_refresh(DATE, datetime.datetime(2026, 6, 21, 6, 1, tzinfo=tz))
+    assert station.needs_refresh("2026-06-22", datetime.datetime(2026, 6, 22, 0, 0, tzinfo=tz))
+
+
+def test_power_at_sums_modules():
+    station = build_station()
+    station.set_data(payload(60), date=DATE)
+    curve = StationDayDataDecoder(generate_station_day_data(SID, DATE, 2, 2, 60, seed=1))
+    slot = station.last_slot
+    assert abs(station.power_at(slot) - curve.power[curve.times.index(slot)]) < 0.01
+    assert station.power_at("04:00") is None
+
+
+def test_decode_data_leaves_the_model_alone():
+    station = build_station()
+    station.set_data(payload(10), date=DATE)
+    before = samples(station)
+    update = station.decode_data(payload(14), incremental=True, date=DATE)
+    assert samples(station) == before and station.last_slot == "05:45"
+    station.apply_data(update)
+    full = build_station()
+    full.set_data(payload(14), date=DATE)
+    assert samples(station) == samples(full)
+
+
+def test_update_decoded_before_a_topology_change_is_dropped():
+    station = build_station()
+    update = station.decode_data(payload(10), date=DATE)
+    station.merge_topology(build_station(micros=3))
+    station.apply_data(update)
+    assert station.last_slot is None
+    assert all(not minutes for minutes, *_ in samples(station).values())
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from async_hoymiles_client import AsyncHoymilesClient
+from hoymiles_client import HoymilesClient
+from token_manager import AsyncTokenManager, AuthenticationError, TokenManager
+
+SID = 100000
+
+
+def test_concurrent_callers_share_one_login():
+    logins = []
+
+    def authenticate():
+        time.sleep(0.05)
+        logins.append(1)
+        return f"token-{len(logins)}"
+
+    tokens = TokenManager(authenticate)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tokens.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(logins) == 1
+    assert results == ["token-1"] * 8
+
+
+def test_invalidating_a_replaced_token_keeps_the_new_one():
+    issued = iter(["first", "second"])
+    tokens = TokenManager(lambda: next(issued))
+    stale = tokens.get()
+    tokens.invalidate(stale)
+    assert tokens.get() == "second"
+    tokens.invalidate(stale)  # a late caller reporting the old token
+    assert tokens.token == "second" and tokens.login_count == 2
+
+
+def test_token_is_renewed_after_max_age():
+    tokens = TokenManager(lambda: "token", max_age=0)
+    tokens.get()
+    tokens.get()
+    assert tokens.login_count == 2
+
+
+def test_async_callers_share_one_login():
+    logins = []
+
+    async def authenticate():
+        await asyncio.sleep(0.05)
+        logins.append(1)
+        return "token"
+
+    async def run():
+        tokens = AsyncTokenManager(authenticate)
+        return await asyncio.gather(*(tokens.get() for _ in range(8)))
+
+    assert asyncio.run(run()) == ["token"] * 8
+    assert len(logins) == 1
+
+
+def test_client_logs_in_again_when_the_token_expires(fake_cloud):
+    cloud, base_url = fake_cloud(token_lifetime=2)
+    client = HoymilesClient("user", "secret", base_url)
+    for _ in range(5):
+        client.cache.invalidate()
+        assert client.count_station_real_data(SID)["status"] == "0"
+    assert client.down_module_day_data(SID, "2026-06-21").id == SID
+    assert client.tokens.login_count >= 3
+    assert cloud.stats["login"] == client.tokens.login_count
+    client.close()
+
+
+def test_async_client_logs_in_again_when_the_token_expires(fake_cloud):
+    cloud, base_url = fake_cloud(token_lifetime=2)
+
+    async def run():
+        client = AsyncHoymilesClient("user", "secret", base_url)
+        try:
+            for _ in range(5):
+                client.cache.invalidate()
+                assert (await client.count_station_real_data(SID))["status"] == "0"
+            return client.tokens.login_count
+        finally:
+            await client.close()
+
+    assert asyncio.run(run()) >= 3
+    assert cloud.stats["login"] >= 3
+
+
+def test_login_without_token_raises(fake_cloud, tmp_path):
+    (tmp_path / "login.json").write_text(json.dumps({"status": "1", "message": "wrong password", "data": {}}))
+    _, base_url = fake_cloud(fixtures=str(tmp_path))
+    client = HoymilesClient("user", "wrong", base_url)
+    with pytest.raises(AuthenticationError):
+        client.login()
+    client.close()
+
+
+def test_rejected_again_after_login_raises(fake_cloud, tmp_path):
+    (tmp_path / "count_station_data.json").write_text(json.dumps({"status": "100", "message": "token verify error"}))
+    cloud, base_url = fake_cloud(fixtures=str(tmp_path))
+    client = HoymilesClient("user", "secret", base_url)
+    with pytest.raises(AuthenticationError):
+        client.count_station_real_data(SID)
+    assert cloud.stats["login"] == 2
+    client.close()
@@ -0,0 +1,59 @@
+from classes.micro_inverter import Microinverter
+from classes.solar_module import SolarModule
+from classes.system import System
+from helpers import DATE, SID, build_station
+from parsers import decode_module_day_data
+from payload_generator import generate_module_day_data
+
+
+def test_merge_unchanged_keeps_objects():
+    system = System([build_station()])
+    module = system.find_module(SID, build_station().microinverters[0].modules[0].id)
+    assert not system.merge_topology(System([build_station()]))
+    assert system.find_module(SID, module.id) is module
+
+
+def test_merge_adds_and_removes_nodes():
+    system = System([build_station(micros=2, ports=2)])
+    system[0].set_data(decode_module_day_data(generate_module_day_data(SID, DATE, 2, 2, 6)), date=DATE)
+    kept = system[0].microinverters[0].modules[0]
+
+    other = build_station(micros=2, ports=2)
+    removed_micro = other.microinverters.pop(1)
+    other._micros_by_id.pop(removed_micro.id)
+    new_micro = Microinverter(999, "SN999")
+    new_micro.add_module(SolarModule("SN999-1", 1, 0, 0))
+    other.add_microinverter(new_micro)
+    new_station = build_station(sid=SID + 1, micros=1, ports=1)
+
+    assert system.merge_topology(System([other, new_station]))
+    assert [station.station_id for station in system] == [SID, SID + 1]
+    assert [micro.id for micro in system[0].microinverters] == [other.microinverters[0].id, 999]
+    assert system.find_microinverter(removed_micro.id) is None
+    assert system.find_module(SID, "SN999-1") is not None
+    assert system.find_module_by_port("SN999", 1).id == "SN999-1"
+    assert system.find_station(SID + 1) is new_station
+    # Surviving modules keep their samples, the changed station reloads its day
+    assert system[0].microinverters[0].modules[0] is kept
+    assert len(kept.watt) == 6
+    assert system[0].last_slot is None
+
+
+def test_merge_drops_station_and_port():
+    system = System([build_station(micros=1, ports=2), build_station(sid=SID + 1)])
+    other = build_station(micros=1, ports=1)
+    assert system.merge_topology(System([other]))
+    assert [station.station_id for station in system] == [SID]
+    assert system.find_station(SID + 1) is None
+    micro = system[0].microinverters[0]
+    assert [module.port for module in micro.modules] == [1]
+    assert micro.find_module_by_port(2) is None
+    assert system.find_module_by_port(micro.sn, 2) is None
+
+
+def test_module_layout_change_is_merged():
+    system = System([build_station(micros=1, ports=1)])
+    other = build_station(micros=1, ports=1)
+    other.microinverters[0].modules[0].x = 42
+    assert system.merge_topology(System([other]))
+    assert system[0].microinverters[0].modules[0].x == 42
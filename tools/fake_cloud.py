@@ -0,0 +1,249 @@
+"""
+Local stand-in for the Hoymiles S-Cloud API.
+
+Serves every endpoint in API_URIS / SELECT_BY_PAGE_URIS from recorded
+fixtures or from a synthetic fleet, so the clients can be exercised and
+benchmarked without neapi.hoymiles.com.
+
+Usage:
+    python tools/fake_cloud.py [--port 8080] [--fixtures DIR]
+                               [--stations 50 --micros 40 --ports 4]
+                               [--latency 0.05] [--error-rate 0.01] [--throttle-rate 0.01]
+
+Then point a client at http://127.0.0.1:8080/.
+
+Fixtures are looked up by endpoint key (the API_URIS key, or
+"select_by_page_<type>") and the station id / date of the request:
+    <key>.<sid>.<date>.pb|json, <key>.<sid>.pb|json, <key>.pb|json
+Endpoints without a fixture are answered from the synthetic fleet.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "hoymiles_nimbus"))
+
+from hoymiles_client import API_URIS, SELECT_BY_PAGE_URIS  # noqa: E402
+from payload_generator import (  # noqa: E402
+    DEFAULT_SLOTS, generate_module_day_data, generate_station_day_data, micro_id, micro_sn,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+FIRST_STATION_ID = 100000
+
+
+# ============================================================================
+# FAKE CLOUD
+# ============================================================================
+
+class FakeCloud:
+    """
+    Request handling and fault injection, independent of the HTTP server.
+
+    latency: mean seconds added to every request (exponentially distributed)
+    error_rate: share of requests answered with HTTP 500
+    throttle_rate: share of requests answered with HTTP 429 and Retry-After
+    token_lifetime: requests a token stays valid for; afterwards the API
+        answers status "100" until the client logs in again (0 = forever)
+    """
+
+    def __init__(self, fixtures=None, stations=2, micros=4, ports=4, slots=DEFAULT_SLOTS,
+                 latency=0.0, error_rate=0.0, throttle_rate=0.0, retry_after=1, token_lifetime=0, seed=0):
+        self.fixtures = fixtures
+        self.stations = stations
+        self.micros = micros
+        self.ports = ports
+        self.slots = slots
+        self.seed = seed
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.token_lifetime = token_lifetime
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._routes = {uri: key for key, uri in API_URIS.items()}
+        self._routes.update({uri: f"select_by_page_{kind}" for kind, uri in SELECT_BY_PAGE_URIS.items()})
+        self._token = None
+        self._token_uses = 0
+        self._power_limits = {}
+        self._payload_cache = {}
+        self.stats = {}
+
+    def handle(self, path, body, headers):
+        """Return (status, headers, body bytes) for a POST to path."""
+        key = self._routes.get(path.lstrip("/"))
+        with self._lock:
+            self.stats[key or path] = self.stats.get(key or path, 0) + 1
+            roll = self._random.random()
+            delay = self._random.expovariate(1 / self.latency) if self.latency else 0
+        if delay:
+            time.sleep(delay)
+        if key is None:
+            return 404, {}, b"not found"
+        if roll < self.throttle_rate:
+            return 429, {"Retry-After": str(self.retry_after)}, b""
+        if roll < self.throttle_rate + self.error_rate:
+            return 500, {}, b"injected error"
+
+        payload = json.loads(body or b"{}")
+        if key != "login" and not self._check_token(headers.get("Authorization")):
+            return self._json({"status": "100", "message": "token verify error"})
+        fixture = self._fixture(key, payload)
+        if fixture is not None:
+            return fixture
+        return getattr(self, f"_api_{key}", self._api_unknown)(payload)
+
+    def _check_token(self, token):
+        with self._lock:
+            if token is None or token != self._token:
+                return False
+            self._token_uses += 1
+            return not self.token_lifetime or self._token_uses <= self.token_lifetime
+
+    def _fixture(self, key, payload):
+        if not self.fixtures:
+            return None
+        sid = payload.get("sid", payload.get("id"))
+        names = [f"{key}.{sid}.{payload.get('date')}", f"{key}.{sid}", key]
+        for name in names:
+            for ext, content_type in ((".pb", "application/octet-stream"), (".json", "application/json")):
+                path = os.path.join(self.fixtures, name + ext)
+                if os.path.exists(path):
+                    with open(path, "rb") as f:
+                        return 200, {"Content-Type": content_type}, f.read()
+        return None
+
+    @staticmethod
+    def _json(data):
+        return 200, {"Content-Type": "application/json"}, json.dumps(data).encode()
+
+    def _ok(self, data):
+        return self._json({"status": "0", "message": "success", "data": data})
+
+    def _station_ids(self):
+        return [FIRST_STATION_ID + index for index in range(self.stations)]
+
+    # -------- Endpoints --------
+
+    def _api_unknown(self, payload):
+        return self._ok({})
+
+    def _api_login(self, payload):
+        with self._lock:
+            self._token = f"fake-token-{self._random.getrandbits(32):08x}"
+            self._token_uses = 0
+            return self._ok({"token": self._token})
+
+    def _api_select_by_page_station(self, payload):
+        return self._ok({"list": [{"id": sid, "name": f"Station {sid}"} for sid in self._station_ids()]})
+
+    def _api_select_by_station(self, payload):
+        sid = payload.get("sid")
+        micros = [{"id": micro_id(sid, index), "sn": micro_sn(sid, index)} for index in range(self.micros)]
+        return self._ok({"list": micros})
+
+    def _api_micro_find(self, payload):
+        layout = [{"port": port, "x": port, "y": payload.get("id", 0) % 1000} for port in range(1, self.ports + 1)]
+        return self._ok({"layout_list": layout})
+
+    def _api_count_station_data(self, payload):
+        capacity = 0.4 * self.micros * self.ports
+        return self._ok({"real_power": str(round(capacity * 600, 1)), "today_eq": "12345.0", "capacitor": str(capacity)})
+
+    def _api_find(self, payload):
+        return self._ok({"id": payload.get("id"), "config": {"power_limit": self._power_limits.get(payload.get("id"), 100)}})
+
+    def _api_command_put(self, payload):
+        data = payload.get("data", {})
+        self._power_limits[data.get("sid")] = data.get("power_limit")
+        return self._ok({})
+
+    def _api_down_module_day_data(self, payload):
+        return self._day_payload(generate_module_day_data, payload)
+
+    def _api_down_station_day_data(self, payload):
+        return self._day_payload(generate_station_day_data, payload)
+
+    def _day_payload(self, generate, payload):
+        key = (generate.__name__, payload.get("sid"), payload.get("date"))
+        with self._lock:
+            blob = self._payload_cache.get(key)
+        if blob is None:
+            blob = generate(payload.get("sid"), payload.get("date"), self.micros, self.ports, self.slots, self.seed)
+            with self._lock:
+                self._payload_cache[key] = blob
+        return 200, {"Content-Type": "application/octet-stream"}, blob
+
+
+# ============================================================================
+# HTTP SERVER
+# ============================================================================
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        status, headers, data = self.server.cloud.handle(self.path, body, self.headers)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        _LOGGER.debug(format, *args)
+
+
+def start_in_thread(cloud, host="127.0.0.1", port=0):
+    """Serve cloud in a background thread; returns (server, base_url). Stop with server.shutdown()."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.cloud = cloud
+    threading.Thread(target=server.serve_forever, name="fake-cloud", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8080)
+    arg_parser.add_argument("--fixtures", help="directory with recorded responses")
+    arg_parser.add_argument("--stations", type=int, default=2)
+    arg_parser.add_argument("--micros", type=int, default=4, help="microinverters per station")
+    arg_parser.add_argument("--ports", type=int, default=4, help="ports per microinverter")
+    arg_parser.add_argument("--slots", type=int, default=DEFAULT_SLOTS, help="5-minute slots per day")
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="mean added latency in seconds")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="share of HTTP 500 responses")
+    arg_parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of HTTP 429 responses")
+    arg_parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429")
+    arg_parser.add_argument("--token-lifetime", type=int, default=0, help="requests per token, 0 = unlimited")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    cloud = FakeCloud(args.fixtures, args.stations, args.micros, args.ports, args.slots, args.latency,
+                      args.error_rate, args.throttle_rate, args.retry_after, args.token_lifetime, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), _Handler)
+    server.cloud = cloud
+    print(f"Fake Hoymiles cloud on http://{args.host}:{args.port}/ "
+          f"({args.stations} stations x {args.micros} micros x {args.ports} ports)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(cloud.stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Model objects matching the payloads of payload_generator.py and fake_cloud.py.
+
+build_station(sid, micros, ports) returns a Station with the microinverter
+ids, serial numbers and ports that fake_cloud serves for the same fleet, so
+generate_module_day_data(sid, date, micros, ports, ...) fills every module.
+Tests and benchmarks use it to exercise the model without a server.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "hoymiles_nimbus"))
+
+from classes.micro_inverter import Microinverter  # noqa: E402
+from classes.solar_module import SolarModule  # noqa: E402
+from classes.station import Station  # noqa: E402
+from payload_generator import micro_id, micro_sn  # noqa: E402
+
+
+def build_station(sid, micros=4, ports=4):
+    """A station whose layout matches generate_module_day_data(sid, ..., micros, ports, ...)."""
+    station = Station(sid, f"Station {sid}")
+    for index in range(micros):
+        micro = Microinverter(micro_id(sid, index), micro_sn(sid, index))
+        for port in range(1, ports + 1):
+            micro.add_module(SolarModule(f"{micro.sn}-{port}", port, port, index))
+        station.add_microinverter(micro)
+    return station
@@ -0,0 +1,187 @@
+"""
+Deterministic generator for down_module_day_data and down_station_day_data payloads.
+
+Usage:
+    python tools/payload_generator.py OUT [--micros 40 --ports 4 --slots 204]
+                                          [--station 100000 --date 2026-06-21 --days 1]
+                                          [--seed 0] [--station-day]
+
+Writes one payload per station day to OUT/<sid>.<date>.pb (or, with
+--station-day, the station curve to OUT/<sid>.<date>.station.pb). The
+same arguments always produce the same bytes, so generated files can be
+used as parser and model fixtures from a handful to tens of thousands of
+modules.
+
+Module payload layout, as read by Station.set_data / Microinverter.set_data:
+
+    1: station id (varint)      2: date "YYYY-MM-DD"
+    3: micro (repeated)
+        1: micro id (varint)
+        2: day
+            1: 1 (varint)   2: "HH:MM" (one per slot)
+            3: port (repeated)
+                1: port number (varint)
+                2: samples { 1: sample { 1: volt  2: ampere  3: watt } ... }  (float32 each)
+"""
+import argparse
+import datetime
+import math
+import os
+import random
+import struct
+
+FIRST_MICRO_ID = 5000000
+# Microinverter ids and serial numbers leave room for this many per station
+MAX_MICROS = 10000
+SLOT_MINUTES = 5
+FIRST_SLOT = 5 * 60  # 05:00
+DEFAULT_SLOTS = (22 * 60 - FIRST_SLOT) // SLOT_MINUTES  # 05:00 .. 21:55
+MAX_SLOTS = (24 * 60 - FIRST_SLOT) // SLOT_MINUTES
+
+# One sample submessage: tag, length, then three tagged float32 fields
+_SAMPLE = struct.Struct("<BBBfBfBf")
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field_varint(field, value):
+    return _varint(field << 3) + _varint(value)
+
+
+def _field_bytes(field, data):
+    return _varint(field << 3 | 2) + _varint(len(data)) + data
+
+
+def _field_float(field, value):
+    return _varint(field << 3 | 5) + struct.pack("<f", value)
+
+
+def slot_times(slots):
+    """The first slots "HH:MM" labels of a day, starting at FIRST_SLOT."""
+    if not 0 <= slots <= MAX_SLOTS:
+        raise ValueError(f"slots must be between 0 and {MAX_SLOTS}")
+    return [f"{minute // 60:02d}:{minute % 60:02d}"
+            for minute in range(FIRST_SLOT, FIRST_SLOT + slots * SLOT_MINUTES, SLOT_MINUTES)]
+
+
+def micro_id(sid, index):
+    """Id of the index-th microinverter of station sid, unique across stations."""
+    return FIRST_MICRO_ID + sid * MAX_MICROS + index
+
+
+def micro_sn(sid, index):
+    """Serial number of the index-th microinverter of station sid, as served by fake_cloud."""
+    return f"{sid}{index:04d}"
+
+
+def _rng(seed, sid, date, *stream):
+    # String seeds are hashed deterministically, unlike hash() of a tuple
+    return random.Random(":".join(str(part) for part in (seed, sid, date) + stream))
+
+
+def generate_samples(sid, date, micros, ports, slots, seed=0):
+    """
+    Per-module (volt, ampere, watt) series of one station day.
+
+    Returns {(micro index, port): [(volt, ampere, watt), ...]} with one
+    tuple per slot. Power follows a clear-sky curve scaled by a per-module
+    peak and a cloud factor shared by the whole station per slot.
+
+    The cloud factors and every module draw from their own seeded stream,
+    slot by slot, so the series for fewer slots is an exact prefix of the
+    series for more: a growing day can be simulated by raising slots.
+    """
+    daylight = DEFAULT_SLOTS - 1
+    sky = _rng(seed, sid, date, "clouds")
+    clouds = [0.6 + 0.4 * sky.random() if sky.random() < 0.3 else 1.0 for _ in range(slots)]
+    series = {}
+    for index in range(micros):
+        for port in range(1, ports + 1):
+            rng = _rng(seed, sid, date, index, port)
+            peak = rng.uniform(280.0, 420.0)
+            base_volt = rng.uniform(30.0, 38.0)
+            samples = []
+            for slot in range(slots):
+                noise = rng.uniform(-0.5, 0.5)
+                watt = peak * clouds[slot] * max(0.0, math.sin(math.pi * min(slot, daylight) / daylight))
+                volt = base_volt + noise if watt else 0.0
+                samples.append((volt, watt / volt if volt else 0.0, watt))
+            series[(index, port)] = samples
+    return series
+
+
+def generate_module_day_data(sid, date, micros=4, ports=4, slots=DEFAULT_SLOTS, seed=0):
+    """
+    down_module_day_data payload for micros × ports modules; identical arguments give identical bytes.
+
+    Microinverters are numbered micro_id(sid, 0) .. micro_id(sid, micros - 1).
+    """
+    if not 0 <= micros <= MAX_MICROS:
+        raise ValueError(f"micros must be between 0 and {MAX_MICROS}")
+    times = slot_times(slots)
+    series = generate_samples(sid, date, micros, ports, slots, seed)
+    time_fields = b"".join(_field_bytes(2, label.encode()) for label in times)
+    micro_blocks = []
+    for index in range(micros):
+        port_blocks = []
+        for port in range(1, ports + 1):
+            samples = b"".join(_SAMPLE.pack(0x0A, 15, 0x0D, volt, 0x15, ampere, 0x1D, watt)
+                               for volt, ampere, watt in series[(index, port)])
+            port_blocks.append(_field_bytes(3, _field_varint(1, port) + _field_bytes(2, samples)))
+        day = _field_varint(1, 1) + time_fields + b"".join(port_blocks)
+        micro_blocks.append(_field_bytes(3, _field_varint(1, micro_id(sid, index)) + _field_bytes(2, day)))
+    return _field_varint(1, sid) + _field_bytes(2, date.encode()) + b"".join(micro_blocks)
+
+
+def generate_station_day_data(sid, date, micros=4, ports=4, slots=DEFAULT_SLOTS, seed=0):
+    """down_station_day_data payload whose power is the sum of the matching module payload."""
+    times = slot_times(slots)
+    series = list(generate_samples(sid, date, micros, ports, slots, seed).values())
+    power = [sum(samples[slot][2] for samples in series) for slot in range(slots)]
+    day = b"".join(_field_bytes(2, label.encode()) for label in times) + b"".join(
+        _field_bytes(3, _field_float(1, value)) for value in power
+    )
+    return _field_varint(1, sid) + _field_bytes(2, date.encode()) + _field_bytes(3, day)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("out", help="output directory")
+    arg_parser.add_argument("--micros", type=int, default=40, help="microinverters per station")
+    arg_parser.add_argument("--ports", type=int, default=4, help="ports per microinverter")
+    arg_parser.add_argument("--slots", type=int, default=DEFAULT_SLOTS, help=f"5-minute slots from 05:00 (max {MAX_SLOTS})")
+    arg_parser.add_argument("--station", type=int, nargs="+", default=[100000], help="station ids")
+    arg_parser.add_argument("--date", default="2026-06-21", help="first day (YYYY-MM-DD)")
+    arg_parser.add_argument("--days", type=int, default=1)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--station-day", action="store_true", help="write down_station_day_data payloads")
+    args = arg_parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    first = datetime.date.fromisoformat(args.date)
+    for sid in args.station:
+        for offset in range(args.days):
+            date = (first + datetime.timedelta(days=offset)).isoformat()
+            if args.station_day:
+                blob = generate_station_day_data(sid, date, args.micros, args.ports, args.slots, args.seed)
+                path = os.path.join(args.out, f"{sid}.{date}.station.pb")
+            else:
+                blob = generate_module_day_data(sid, date, args.micros, args.ports, args.slots, args.seed)
+                path = os.path.join(args.out, f"{sid}.{date}.pb")
+            with open(path, "wb") as f:
+                f.write(blob)
+            print(f"{path}: {len(blob)} bytes")
+
+
+if __name__ == "__main__":
+    main()